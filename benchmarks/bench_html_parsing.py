@@ -0,0 +1,90 @@
+"""
+Parse-time and peak-memory comparison of the HTML parser backends used by
+_generic_scrape (see html_parsing.py).
+
+Each backend runs in a fresh subprocess so its peak resident memory can be
+measured on its own. Pass saved portal pages as arguments, or omit them to use
+a generated page with a few thousand anchors.
+
+Usage: python benchmarks/bench_html_parsing.py [page.html ...] [--repeat 10]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import html_parsing  # noqa: E402
+
+
+def load_pages(paths):
+    if not paths:
+        from bench_keyword_matcher import generate_portal_html
+        return {'generated portal': generate_portal_html()}
+    pages = {}
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def run_worker(backend, paths, repeat):
+    """Parse every page with one backend and print timings and peak RSS as JSON."""
+    pages = load_pages(paths)
+    parse = html_parsing.get_parser(backend)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    results = {}
+    for name, html in pages.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            page = parse(html)
+        elapsed_ms = (time.perf_counter() - start) / repeat * 1000
+        results[name] = {
+            'parse_ms': round(elapsed_ms, 2),
+            'text_chars': len(page.text),
+            'links': len(page.links),
+            'heading': page.heading,
+        }
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'results': results, 'peak_mb': round((peak_kb - baseline_kb) / 1024, 1)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages', nargs='*', help='saved portal HTML files')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.pages, args.repeat)
+        return
+
+    reports = {}
+    for backend in html_parsing.available_backends():
+        output = subprocess.run(
+            [sys.executable, __file__, '--worker', backend, '--repeat', str(args.repeat)] + args.pages,
+            check=True, capture_output=True, text=True,
+        ).stdout
+        reports[backend] = json.loads(output)
+
+    for name in load_pages(args.pages):
+        print(name)
+        reference = reports['bs4']['results'][name]
+        for backend, report in reports.items():
+            result = report['results'][name]
+            speedup = reference['parse_ms'] / result['parse_ms'] if result['parse_ms'] else float('inf')
+            print(f"  {backend:<11} {result['parse_ms']:9.2f} ms  ({speedup:5.1f}x)  "
+                  f"peak +{report['peak_mb']:6.1f} MB  links={result['links']}  text={result['text_chars']:,}")
+
+
+if __name__ == '__main__':
+    main()
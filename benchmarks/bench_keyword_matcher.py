@@ -0,0 +1,127 @@
+"""
+Micro-benchmark: compiled KeywordMatcher vs the per-keyword substring loops that
+_generic_scrape used for landing-page text and anchor filtering.
+
+Pass saved portal pages as arguments, or omit them to use a generated page with
+a few thousand anchors.
+
+With --sweep, times KeywordMatcher.matched() on the page text with one
+substring scan per keyword against one Aho-Corasick pass for growing keyword
+lists, which is where keyword_matcher.SUBSTRING_SCAN_LIMIT comes from.
+
+Usage: python benchmarks/bench_keyword_matcher.py [page.html ...] [--repeat 20] [--sweep]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import keyword_matcher  # noqa: E402
+from keyword_matcher import KeywordMatcher  # noqa: E402
+from scrapper import LINK_KEYWORDS, MEDICAID_KEYWORDS  # noqa: E402
+
+FILLER = (
+    'state agency department services contract vendor notice award health plan '
+    'managed care office of general services purchasing division annual report'
+).split()
+
+
+def generate_portal_html(anchors=3000, paragraphs=2000, seed=7):
+    rng = random.Random(seed)
+    words = FILLER + LINK_KEYWORDS
+    links = ''.join(
+        f'<li><a href="/{rng.choice(words)}/{i}">{" ".join(rng.choices(words, k=5))}</a></li>'
+        for i in range(anchors)
+    )
+    body = ''.join(f'<p>{" ".join(rng.choices(FILLER, k=40))}</p>' for _ in range(paragraphs))
+    return f'<html><body>{body}<p>Long-term services and supports</p><ul>{links}</ul></body></html>'
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def bench_page(name, html, repeat):
+    soup = BeautifulSoup(html, 'html.parser')
+    text = soup.get_text().lower()
+    anchors = [(a.get_text().lower(), a['href'].lower()) for a in soup.find_all('a', href=True)]
+    keyword_matcher = KeywordMatcher(MEDICAID_KEYWORDS)
+    link_matcher = KeywordMatcher(LINK_KEYWORDS)
+    # A site-specific list of program names, as per-site 'keywords' overrides tend to be
+    many_keywords = MEDICAID_KEYWORDS + [f'{word} waiver {i}' for i, word in enumerate(FILLER)]
+    many_matcher = KeywordMatcher(many_keywords)
+
+    cases = [
+        ('landing keywords',
+         lambda: [kw for kw in MEDICAID_KEYWORDS if kw in text],
+         lambda: keyword_matcher.matched(text)),
+        (f'{len(many_keywords)} keywords',
+         lambda: [kw for kw in many_keywords if kw in text],
+         lambda: many_matcher.matched(text)),
+        ('anchor filtering',
+         lambda: [t for t, h in anchors if any(kw in t or kw in h for kw in LINK_KEYWORDS)],
+         lambda: [t for t, h in anchors if link_matcher.search(t, h)]),
+    ]
+
+    print(f'{name}: {len(text):,} chars of text, {len(anchors):,} anchors')
+    for label, loops, compiled in cases:
+        loop_ms, loop_result = timed(loops, repeat)
+        matcher_ms, matcher_result = timed(compiled, repeat)
+        assert loop_result == matcher_result, label
+        print(f'  {label:<18} loops {loop_ms:8.2f} ms   matcher {matcher_ms:8.2f} ms   ({loop_ms / matcher_ms:.1f}x)')
+
+    offsets_ms, offsets = timed(lambda: keyword_matcher.find_all(text), repeat)
+    print(f'  {"all offsets":<18} matcher {offsets_ms:8.2f} ms   ({sum(map(len, offsets.values()))} hits)')
+
+
+def sweep(name, html, repeat, max_keywords=30):
+    """matched() per keyword-list size with each strategy, and the size where the automaton starts to win."""
+    if keyword_matcher.ahocorasick is None:
+        print('pyahocorasick is not installed; matched() always uses substring scans')
+        return
+    text = BeautifulSoup(html, 'html.parser').get_text().lower()
+    extra = [f'{word} waiver {i}' for i, word in enumerate(FILLER * 2)]
+    print(f'{name}: matched() on {len(text):,} chars, substring scans vs automaton')
+    crossover = None
+    limit = keyword_matcher.SUBSTRING_SCAN_LIMIT
+    try:
+        for count in range(1, max_keywords + 1):
+            matcher = KeywordMatcher((MEDICAID_KEYWORDS + extra)[:count])
+            keyword_matcher.SUBSTRING_SCAN_LIMIT = max_keywords
+            scan_ms, _ = timed(lambda: matcher.matched(text), repeat)
+            keyword_matcher.SUBSTRING_SCAN_LIMIT = 0
+            automaton_ms, _ = timed(lambda: matcher.matched(text), repeat)
+            if crossover is None and automaton_ms < scan_ms:
+                crossover = count
+            print(f'  {count:>3} keywords   scans {scan_ms:7.2f} ms   automaton {automaton_ms:7.2f} ms')
+    finally:
+        keyword_matcher.SUBSTRING_SCAN_LIMIT = limit
+    print(f'  automaton first faster at {crossover} keywords (SUBSTRING_SCAN_LIMIT is {limit})')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages', nargs='*', help='saved portal HTML files')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--sweep', action='store_true', help='find the substring-scan/automaton crossover')
+    args = parser.parse_args()
+
+    bench = sweep if args.sweep else bench_page
+    if args.pages:
+        for path in args.pages:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                bench(os.path.basename(path), f.read(), args.repeat)
+    else:
+        bench('generated portal', generate_portal_html(), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Scan wall-clock and CPU utilization with page parsing done in the fetching
+threads (the old design) versus the two-stage pipeline that hands pages to a
+ProcessPoolExecutor (parse_pool.py), for both scan engines.
+
+The fake portals run in a separate process so their CPU time isn't counted.
+Landing and sub-pages are large generated pages, so parsing dominates.
+
+Usage: python benchmarks/bench_parse_pipeline.py [--sites 30] [--workers N] [--latency 0.05]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import scrapper  # noqa: E402
+from bench_keyword_matcher import generate_portal_html  # noqa: E402
+from bench_scan_engine import PortalServer  # noqa: E402
+from crawl_planner import CrawlPlanner  # noqa: E402
+from http_cache import HTTPCache  # noqa: E402
+from parse_pool import ParsePool  # noqa: E402
+from rfp_identity import RFPDedupIndex  # noqa: E402
+from scan_jobs import NullProgress  # noqa: E402
+from site_fingerprints import SiteFingerprints  # noqa: E402
+
+
+class QuietPortalServer(PortalServer):
+    def handle_error(self, request, client_address):
+        pass  # connections reset by fetches the scan cancelled or skipped
+
+
+def serve(port_queue, latency):
+    landing = generate_portal_html(anchors=400, paragraphs=1500).encode()
+    sub_page = generate_portal_html(anchors=200, paragraphs=600, seed=11).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(latency)
+            data = landing if self.path.count('/') == 1 else sub_page
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = QuietPortalServer(('', 0), Handler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=30)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 1) - 1),
+                        help='parse pool size (default: one per spare core)')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds of server latency per request')
+    args = parser.parse_args()
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue, args.latency), daemon=True)
+    server.start()
+    port = port_queue.get()
+
+    sites = [
+        {'state': f'Site {i}', 'url': f'http://127.0.0.{i + 1}:{port}/site{i}', 'name': f'Fake Portal {i}'}
+        for i in range(args.sites)
+    ]
+    scrapper.RFPS_DB_FILE = os.path.join(tempfile.mkdtemp(), 'rfps.db')
+    tracker = scrapper.MedicaidRFPTracker()
+    scrapper.logger.setLevel('WARNING')
+    cores = os.cpu_count() or 1
+
+    print(f'{args.sites} sites, {cores} cores, parse pool of {args.workers} workers')
+    for engine_name, scan in (('threaded', tracker._scan_threaded), ('async', tracker._scan_async)):
+        for design in ('in-thread', 'pipeline'):
+            tracker.http_cache = HTTPCache(tempfile.mkdtemp())
+            tracker.crawl_planner = CrawlPlanner(max_fetches=scrapper.CRAWL_MAX_FETCHES)
+            tracker.fingerprints = SiteFingerprints()
+            tracker.rfp_dedup = RFPDedupIndex() # Each run should find the same RFPs afresh
+            tracker.parse_pool = ParsePool(args.workers, scrapper.HTML_PARSER) if design == 'pipeline' else None
+            if tracker.parse_pool is not None:
+                # Start the workers outside the timed run, as a long-lived server would have them
+                tracker.parse_pool._get_executor().submit(int).result()
+
+            cpu_start = time.process_time()
+            start = time.perf_counter()
+            found = scan(sites, NullProgress())
+            elapsed = time.perf_counter() - start
+            cpu = time.process_time() - cpu_start
+
+            worker_cpu = 0.0
+            if tracker.parse_pool is not None:
+                worker_cpu = tracker.parse_pool.get_stats()['worker_cpu_seconds']
+                tracker.parse_pool.shutdown()
+            utilization = (cpu + worker_cpu) / (elapsed * cores) * 100
+            print(f'{engine_name:>8} {design:>9}: {elapsed:7.2f}s wall, {cpu:6.2f}s main CPU, '
+                  f'{worker_cpu:6.2f}s worker CPU, {utilization:5.1f}% of {cores} cores  ({len(found)} RFPs)')
+
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main()
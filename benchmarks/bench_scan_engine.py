@@ -0,0 +1,102 @@
+"""
+Compare full-scan wall-clock time of the asyncio scan engine against the legacy
+ThreadPoolExecutor path, using a local HTTP stand-in for the state portals.
+
+Each fake portal lives on its own loopback address (127.0.0.N) so per-host
+connection limits behave as they would against real hosts.
+
+Usage: python benchmarks/bench_scan_engine.py [--sites 51] [--links 15] [--latency 0.05]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scrapper  # noqa: E402
+from crawl_planner import CrawlPlanner  # noqa: E402
+from http_cache import HTTPCache  # noqa: E402
+from rfp_identity import RFPDedupIndex  # noqa: E402
+from site_fingerprints import SiteFingerprints  # noqa: E402
+from scan_jobs import NullProgress  # noqa: E402
+
+
+def make_handler(links_per_site, latency):
+    class PortalHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(latency)
+            parts = self.path.strip('/').split('/')
+            if len(parts) == 1:
+                links = ''.join(
+                    f'<li><a href="/{parts[0]}/rfp/{j}">Procurement notice {j}</a></li>'
+                    for j in range(links_per_site)
+                )
+                body = f'<html><body><h1>Portal {parts[0]}</h1><p>HCBS and LTSS services</p><ul>{links}</ul></body></html>'
+            else:
+                # Only the last candidate mentions a keyword: worst case for sequential fetches
+                is_match = parts[-1] == str(links_per_site - 1)
+                text = 'Behavioral health RFP 2024-001' if is_match else 'Office supplies bid'
+                body = f'<html><head><title>Notice {parts[-1]}</title></head><body><h1>{text}</h1></body></html>'
+
+            data = body.encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return PortalHandler
+
+
+class PortalServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=51)
+    parser.add_argument('--links', type=int, default=15)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds of server latency per request')
+    args = parser.parse_args()
+
+    server = PortalServer(('', 0), make_handler(args.links, args.latency))
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    sites = [
+        {'state': f'Site {i}', 'url': f'http://127.0.0.{i + 1}:{port}/site{i}', 'name': f'Fake Portal {i}'}
+        for i in range(args.sites)
+    ]
+
+    scrapper.RFPS_DB_FILE = os.path.join(tempfile.mkdtemp(), 'rfps.db')
+    tracker = scrapper.MedicaidRFPTracker()
+    scrapper.logger.setLevel('WARNING')
+
+    for name, scan in (('threaded', tracker._scan_threaded), ('async', tracker._scan_async)):
+        # Fresh cache, crawl history and fingerprints per engine so neither run benefits from the other's
+        tracker.http_cache = HTTPCache(tempfile.mkdtemp())
+        tracker.crawl_planner = CrawlPlanner(max_fetches=scrapper.CRAWL_MAX_FETCHES)
+        tracker.fingerprints = SiteFingerprints()
+        tracker.rfp_dedup = RFPDedupIndex() # Each run should find the same RFPs afresh
+        start = time.perf_counter()
+        found = scan(sites, NullProgress())
+        elapsed = time.perf_counter() - start
+        crawl = tracker.crawl_planner.get_stats()['totals']
+        print(f'{name:>8}: {elapsed:7.2f}s  ({len(found)} RFPs from {len(sites)} sites, '
+              f'{crawl.get("fetched", 0)} sub-pages fetched, {crawl.get("fetches_saved", 0)} saved by the crawl budget)')
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Startup and snapshot timings as the RFP store grows.
+
+For each store size, synthetic RFPs are written to a fresh SQLite store and
+timed:
+
+  store.load       reading every RFP (and its found_ts) from SQLite
+  snapshot.save    writing the compact RFP snapshot (write-rename)
+  snapshot.load    reading it back
+  cold start       in a fresh interpreter: importing the app, the first
+                   /api/rfps (which loads the tracker) and the first
+                   /api/search (which builds the search index), once loading
+                   from the store and once from the snapshot
+
+Usage: python benchmarks/bench_startup.py [--sizes 1000,10000,100000] [--repeat 3] [--output report.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import rfp_snapshot  # noqa: E402
+from rfp_identity import rfp_id  # noqa: E402
+from rfp_snapshot import load_snapshot, save_snapshot  # noqa: E402
+from rfp_store import SQLiteRFPStore  # noqa: E402
+
+STATES = [f'State {i}' for i in range(50)]
+KEYWORD_SETS = (['hcbs'], ['ltss', 'behavioral health'], ['home and community-based services'])
+
+
+def synthetic_rfps(count):
+    now = datetime.now()
+    rfps = []
+    for i in range(count):
+        keywords = KEYWORD_SETS[i % len(KEYWORD_SETS)]
+        rfp = {
+            'rfp_number': f'RFP-{2024 + i % 3}-{i:06d}',
+            'title': f'Medicaid managed care services solicitation {i}',
+            'state': STATES[i % len(STATES)],
+            'source': 'Benchmark',
+            'url': f'https://bench.example.gov/rfp/{i}',
+            'found_date': (now - timedelta(minutes=i * 7)).isoformat(),
+            'keywords_found': keywords,
+            'status': 'Active',
+            'description': f"Healthcare procurement opportunity detected on Benchmark. Keywords found: {', '.join(keywords)}",
+        }
+        rfp['id'] = rfp_id(rfp)
+        rfps.append(rfp)
+    return rfps
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def cold_start(write_snapshot):
+    """Run in the child interpreter: time the app's import, first RFP listing and first search."""
+    started = time.perf_counter()
+    import scrapper
+    imported = time.perf_counter()
+    client = scrapper.app.test_client()
+    client.get('/api/rfps')
+    loaded = time.perf_counter()
+    client.get('/api/search?q=managed+care')
+    searched = time.perf_counter()
+    if write_snapshot:
+        scrapper.tracker.save_snapshot()
+    print(json.dumps({
+        'import': imported - started,
+        'first_rfps': loaded - imported,
+        'first_search': searched - loaded,
+    }))
+
+
+def run_cold_start(work_dir, write_snapshot=False):
+    env = dict(os.environ,
+               RFPS_DB_FILE=os.path.join(work_dir, 'rfps.db'),
+               RFP_SNAPSHOT_FILE=os.path.join(work_dir, 'rfps.db.snapshot'),
+               HTTP_CACHE_DIR=os.path.join(work_dir, 'http_cache'),
+               PARSE_WORKERS='0')
+    command = [sys.executable, os.path.abspath(__file__), '--cold-start']
+    if write_snapshot:
+        command.append('--write-snapshot')
+    # Run in the work directory so no stray rfps_data.json gets imported
+    result = subprocess.run(command, cwd=work_dir, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def bench_size(count, repeat):
+    work_dir = tempfile.mkdtemp(prefix='bench_startup_')
+    try:
+        store = SQLiteRFPStore(os.path.join(work_dir, 'rfps.db'))
+        store.upsert_rfps(synthetic_rfps(count))
+        results = {}
+
+        results['store.load'], (rfps, timestamps, _) = timed(store.load_rfps, repeat)
+        snapshot_path = os.path.join(work_dir, 'bench.snapshot')
+        results['snapshot.save'], _ = timed(lambda: save_snapshot(snapshot_path, rfps, timestamps, {}), repeat)
+        results['snapshot.load'], _ = timed(lambda: load_snapshot(snapshot_path), repeat)
+        results['snapshot.bytes'] = os.path.getsize(snapshot_path)
+
+        # The first run has no snapshot and writes one, as the scanner would
+        from_store = [run_cold_start(work_dir, write_snapshot=True)]
+        os.remove(os.path.join(work_dir, 'rfps.db.snapshot'))
+        for _ in range(repeat - 1):
+            from_store.append(run_cold_start(work_dir, write_snapshot=True))
+        from_snapshot = [run_cold_start(work_dir) for _ in range(repeat)]
+        for source, runs in (('store', from_store), ('snapshot', from_snapshot)):
+            for phase in ('import', 'first_rfps', 'first_search'):
+                results[f'cold_start.{source}.{phase}'] = statistics.median(run[phase] for run in runs)
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,100000', help='comma-separated store sizes')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='also write the results as JSON here')
+    parser.add_argument('--cold-start', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--write-snapshot', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_start:
+        cold_start(args.write_snapshot)
+        return
+
+    print(f"snapshot serializer: {'orjson' if rfp_snapshot.orjson is not None else 'json'}")
+    report = {}
+    for count in (int(size) for size in args.sizes.split(',')):
+        results = report[count] = bench_size(count, args.repeat)
+        print(f"{count:>7} RFPs: store.load {results['store.load']:6.2f}s  "
+              f"snapshot save {results['snapshot.save']:6.2f}s / load {results['snapshot.load']:6.2f}s "
+              f"({results['snapshot.bytes'] / 1024 / 1024:.1f} MB)")
+        for source in ('store', 'snapshot'):
+            print(f"{'':>13}cold start from {source:<8}: import {results[f'cold_start.{source}.import']:5.2f}s  "
+                  f"first /api/rfps {results[f'cold_start.{source}.first_rfps']:5.2f}s  "
+                  f"first /api/search {results[f'cold_start.{source}.first_search']:5.2f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
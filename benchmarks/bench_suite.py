@@ -0,0 +1,364 @@
+"""
+Offline benchmark suite: full scans replayed from a fixture archive, plus
+micro-benchmarks for HTML parsing, keyword matching and the API endpoints.
+Results go to a JSON report that can be compared against an earlier one.
+
+Record the live portals once (needs network):
+
+    python benchmarks/bench_suite.py record [--archive benchmarks/fixtures/portals.json.gz] [--states California,Texas]
+
+Then, on any machine:
+
+    python benchmarks/bench_suite.py run [--archive ...] [--latency 0.05] [--jitter 0.02] [--repeat 3]
+                                         [--output report.json] [--baseline old-report.json]
+
+Without an archive, `run` uses a generated one (see portal_fixtures.py). With
+--baseline, benchmarks whose median got slower by more than --tolerance are
+listed and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Keep the benchmark tracker away from the real database and page cache
+WORK_DIR = tempfile.mkdtemp(prefix='rfp-bench-')
+os.environ.setdefault('RFPS_DB_FILE', os.path.join(WORK_DIR, 'rfps.db'))
+os.environ.setdefault('HTTP_CACHE_DIR', os.path.join(WORK_DIR, 'http_cache'))
+
+import scrapper  # noqa: E402
+from crawl_planner import CrawlPlanner  # noqa: E402
+from host_health import HostHealth  # noqa: E402
+from html_parsing import available_backends, get_parser  # noqa: E402
+from http_cache import HTTPCache  # noqa: E402
+from keyword_matcher import KeywordMatcher  # noqa: E402
+from page_analysis import analyze_landing_page, analyze_rfp_page  # noqa: E402
+from portal_fixtures import (ReplayServer, archive_digest, load_archive, record_archive,  # noqa: E402
+                             save_archive, synthetic_archive)
+from rfp_identity import RFPDedupIndex, rfp_id  # noqa: E402
+from rfp_index import RFPIndex  # noqa: E402
+from rfp_search import SearchIndex  # noqa: E402
+from scan_jobs import NullProgress  # noqa: E402
+from scan_telemetry import ScanTelemetry  # noqa: E402
+from site_fingerprints import SiteFingerprints  # noqa: E402
+
+DEFAULT_ARCHIVE = os.path.join(ROOT, 'benchmarks', 'fixtures', 'portals.json.gz')
+
+
+def summarize(samples, **extra):
+    return dict({
+        'unit': 's',
+        'median': round(statistics.median(samples), 6),
+        'min': round(min(samples), 6),
+        'max': round(max(samples), 6),
+        'runs': len(samples),
+    }, **extra)
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+def reset_scan_state(tracker):
+    """Fresh page cache, crawl history, fingerprints, host health and dedup index: a cold scan."""
+    tracker.http_cache = HTTPCache(tempfile.mkdtemp(dir=WORK_DIR))
+    tracker.crawl_planner = CrawlPlanner(max_fetches=scrapper.CRAWL_MAX_FETCHES)
+    tracker.fingerprints = SiteFingerprints()
+    tracker.telemetry = ScanTelemetry(window=scrapper.TELEMETRY_WINDOW)
+    tracker.host_health = HostHealth(max_timeout=scrapper.FETCH_MAX_TIMEOUT)
+    tracker.rfp_dedup = RFPDedupIndex()
+
+
+def bench_scans(tracker, server, repeat):
+    """Cold and warm (second, conditional-GET) full scans with both engines."""
+    def scan_once(scan):
+        tracker.rfp_dedup = RFPDedupIndex()
+        tracker.fingerprints.begin_scan()
+        start = time.perf_counter()
+        found = scan(server.sites, NullProgress())
+        return time.perf_counter() - start, len(found)
+
+    results = {}
+    for engine, scan in (('threaded', tracker._scan_threaded), ('async', tracker._scan_async)):
+        cold, warm = [], []
+        for _ in range(repeat):
+            reset_scan_state(tracker)
+            elapsed, cold_rfps = scan_once(scan)
+            cold.append(elapsed)
+            subpages = tracker.crawl_planner.get_stats()['totals'].get('fetched', 0)
+            elapsed, warm_rfps = scan_once(scan)
+            warm.append(elapsed)
+        results[f'scan.{engine}.cold'] = summarize(cold, rfps=cold_rfps, subpages=subpages)
+        results[f'scan.{engine}.warm'] = summarize(warm, rfps=warm_rfps)
+        print(f"scan {engine:>8}: cold {statistics.median(cold):.3f}s, warm {statistics.median(warm):.3f}s "
+              f"({cold_rfps} RFPs, {subpages} sub-pages)", file=sys.stderr)
+    return results
+
+
+def archive_pages(archive):
+    """(landing pages as (url, html), sub-pages as html) that were fetched successfully."""
+    site_urls = {site['url'] for site in archive['sites']}
+    landing, subpages = [], []
+    for url, entry in archive['responses'].items():
+        if entry.get('status') == 200:
+            if url in site_urls:
+                landing.append((url, entry['body']))
+            else:
+                subpages.append(entry['body'])
+    return landing, subpages
+
+
+def bench_parsing(archive, repeat):
+    landing, subpages = archive_pages(archive)
+    matchers = scrapper.tracker.default_matchers
+    results = {}
+    for backend in available_backends():
+        parse_html = get_parser(backend)
+        samples, _ = timed(lambda: [analyze_landing_page(parse_html, url, html, matchers) for url, html in landing], repeat)
+        results[f'parse.{backend}.landing'] = summarize(samples, pages=len(landing))
+        samples, _ = timed(lambda: [analyze_rfp_page(parse_html, html, matchers[0]) for html in subpages], repeat)
+        results[f'parse.{backend}.subpages'] = summarize(samples, pages=len(subpages))
+    return results
+
+
+def bench_matching(archive, repeat):
+    landing, _ = archive_pages(archive)
+    parse_html = get_parser('auto')
+    pages = [parse_html(html) for _, html in landing]
+    texts = [page.text.lower() for page in pages]
+    anchors = [(text.lower(), href.lower()) for page in pages for text, href in page.links]
+    keyword_matcher = KeywordMatcher(scrapper.MEDICAID_KEYWORDS)
+    link_matcher = KeywordMatcher(scrapper.LINK_KEYWORDS)
+
+    samples, _ = timed(lambda: [keyword_matcher.matched(text) for text in texts], repeat)
+    results = {'match.landing_keywords': summarize(samples, chars=sum(map(len, texts)))}
+    samples, _ = timed(lambda: [link_matcher.search(text, href) for text, href in anchors], repeat)
+    results['match.anchor_filter'] = summarize(samples, anchors=len(anchors))
+    return results
+
+
+def synthetic_rfps(count, states):
+    now = datetime.now()
+    rfps = []
+    for i in range(count):
+        rfp = {
+            'rfp_number': f'RFP-{2024 + i % 3}-{i:05d}',
+            'title': f'Medicaid managed care services solicitation {i}',
+            'state': states[i % len(states)],
+            'source': 'Benchmark',
+            'url': f'https://bench.example.gov/rfp/{i}',
+            'found_date': (now - timedelta(minutes=i * 17)).isoformat(),
+            'keywords_found': ['medicaid', 'managed care'] if i % 2 else ['hcbs'],
+            'status': 'Active',
+            'description': 'Synthetic RFP for API benchmarks.',
+        }
+        rfp['id'] = rfp_id(rfp)
+        rfps.append(rfp)
+    return rfps
+
+
+def bench_api(rfp_count, repeat):
+    """Endpoint latency over a store of synthetic RFPs, with the response cache cold and hot."""
+    tracker = scrapper.tracker
+    states = [site['state'] for site in tracker.state_sites]
+    tracker.store.upsert_rfps(synthetic_rfps(rfp_count, states))
+    all_rfps = tracker.store.get_all_rfps()
+    tracker.rfp_index = RFPIndex(all_rfps)
+    tracker.search_index = SearchIndex(all_rfps)
+    client = scrapper.app.test_client()
+    requests_per_run = 20
+
+    results = {}
+    samples, recent = timed(lambda: tracker.get_recent_rfps(30), repeat * requests_per_run)
+    results['api.get_recent_rfps'] = summarize(samples, rfps=len(recent))
+    for path in ('/api/rfps', f'/api/rfps?state={states[0]}', '/api/rfps?keyword=hcbs', '/api/stats', '/api/scan/report'):
+        def cold():
+            tracker.data_version += 1 # Invalidates the cached response bodies
+            return client.get(path)
+
+        for name, call in (('cold', cold), ('hot', lambda: client.get(path))):
+            samples, response = timed(call, repeat * requests_per_run)
+            results[f'api.{path}.{name}'] = summarize(samples, bytes=len(response.data))
+
+    searches = ({'q': 'managed care'}, {'q': 'solicitation 12'}, {'q': 'hcbs', 'state': states[0]}, {'keyword': 'hcbs'})
+    for params in searches:
+        path = f'/api/search?{urlencode(params)}'
+
+        def cold():
+            tracker.search_index.add(()) # Drops the cached rankings
+            return client.get(path)
+
+        for name, call in (('cold', cold), ('hot', lambda: client.get(path))):
+            samples, response = timed(call, repeat * requests_per_run)
+            results[f'api.{path}.{name}'] = summarize(samples, matches=response.get_json()['total'])
+
+    def page_through():
+        params = {'q': 'managed care', 'limit': 100}
+        pages = 0
+        while True:
+            response = client.get(f'/api/search?{urlencode(params)}')
+            pages += 1
+            params['cursor'] = response.get_json()['next_cursor']
+            if not params['cursor']:
+                return pages
+
+    samples, pages = timed(page_through, repeat)
+    results['api./api/search.all_pages'] = summarize(samples, pages=pages)
+
+    for path in ('/api/export', '/api/export?format=csv'):
+        samples, size = timed(lambda: len(client.get(path).data), repeat)
+        results[f'api.{path}'] = summarize(samples, bytes=size)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, tolerance):
+    """Print median changes against a baseline report; returns the names that regressed."""
+    if baseline['meta'].get('archive_digest') != report['meta'].get('archive_digest'):
+        print('warning: the baseline was run against a different fixture archive', file=sys.stderr)
+    regressions = []
+    for name, result in sorted(report['results'].items()):
+        before = baseline['results'].get(name)
+        if not before or not before['median']:
+            continue
+        ratio = result['median'] / before['median']
+        flag = ''
+        if ratio > 1 + tolerance:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<40} {before['median']:10.5f}s -> {result['median']:10.5f}s  {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def run(args):
+    if os.path.exists(args.archive):
+        archive = load_archive(args.archive)
+        archive_name = args.archive
+    else:
+        print(f'{args.archive} not found; using a generated archive', file=sys.stderr)
+        archive = synthetic_archive()
+        archive_name = 'synthetic'
+
+    scrapper.logger.setLevel('ERROR')
+    only = set(args.only.split(',')) if args.only else {'scan', 'parse', 'match', 'api'}
+    results = {}
+    if 'scan' in only:
+        server = ReplayServer(archive, args.latency, args.jitter, args.seed).start()
+        try:
+            results.update(bench_scans(scrapper.tracker, server, args.repeat))
+        finally:
+            server.shutdown()
+    if 'parse' in only:
+        results.update(bench_parsing(archive, args.repeat))
+    if 'match' in only:
+        results.update(bench_matching(archive, args.repeat))
+    if 'api' in only:
+        results.update(bench_api(args.rfps, args.repeat))
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'archive': archive_name,
+            'archive_digest': archive_digest(archive),
+            'sites': len(archive['sites']),
+            'latency': args.latency,
+            'jitter': args.jitter,
+            'repeat': args.repeat,
+            'scan_engine_settings': {
+                'parse_workers': scrapper.PARSE_WORKERS,
+                'html_parser': scrapper.HTML_PARSER,
+                'max_concurrency': scrapper.SCAN_MAX_CONCURRENCY,
+                'per_host_limit': scrapper.SCAN_PER_HOST_LIMIT,
+            },
+        },
+        'results': results,
+    }
+    if scrapper.tracker.parse_pool is not None:
+        scrapper.tracker.parse_pool.shutdown()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+        print(f'report written to {args.output}', file=sys.stderr)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f'{len(regressions)} benchmarks regressed by more than {args.tolerance:.0%}', file=sys.stderr)
+            return 1
+    return 0
+
+
+def record(args):
+    sites = scrapper.tracker.state_sites
+    if args.states:
+        wanted = {state.strip() for state in args.states.split(',')}
+        sites = [site for site in sites if site['state'] in wanted]
+    archive = record_archive(sites, scrapper.DEFAULT_HEADERS, scrapper.MEDICAID_KEYWORDS,
+                             scrapper.LINK_KEYWORDS, max_subpages=args.subpages)
+    save_archive(archive, args.archive)
+    print(f"{len(archive['responses'])} responses from {len(sites)} sites written to {args.archive}", file=sys.stderr)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='record the live portals into a fixture archive')
+    record_parser.add_argument('--archive', default=DEFAULT_ARCHIVE)
+    record_parser.add_argument('--states', help='comma-separated states to record (default: all)')
+    record_parser.add_argument('--subpages', type=int, default=scrapper.CRAWL_MAX_FETCHES,
+                               help='candidate links to record per site')
+    record_parser.set_defaults(func=record)
+
+    run_parser = commands.add_parser('run', help='run the benchmarks against an archive')
+    run_parser.add_argument('--archive', default=DEFAULT_ARCHIVE)
+    run_parser.add_argument('--latency', type=float, default=0.05, help='seconds of server latency per request')
+    run_parser.add_argument('--jitter', type=float, default=0.02, help='latency varies by up to this many seconds')
+    run_parser.add_argument('--seed', type=int, default=0, help='seed for the latency jitter')
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--rfps', type=int, default=5000, help='synthetic RFPs in the store for the API benchmarks')
+    run_parser.add_argument('--only', help='comma-separated subset of scan,parse,match,api')
+    run_parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    run_parser.add_argument('--baseline', help='earlier report to compare medians against')
+    run_parser.add_argument('--tolerance', type=float, default=0.15, help='allowed slowdown before flagging, e.g. 0.15')
+    run_parser.set_defaults(func=run)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == '__main__':
+    main()
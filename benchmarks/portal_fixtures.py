@@ -0,0 +1,224 @@
+"""
+Fixture archives of portal responses for offline benchmarks, and a local
+server that replays them.
+
+An archive is a gzipped JSON document holding the sites that were scanned and
+every response fetched from them (landing pages plus the candidate RFP pages a
+scan follows), keyed by URL. record_archive() builds one from the live portals;
+synthetic_archive() generates one for machines that have never had network.
+
+ReplayServer serves an archive with configurable latency and jitter. Every
+origin in the archive gets its own loopback address (127.0.0.N), absolute links
+in the bodies are rewritten to point at it, and ETag/If-None-Match is honored
+so repeat scans exercise the conditional-GET path.
+"""
+import concurrent.futures
+import gzip
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawl_planner import CrawlPlanner  # noqa: E402
+from html_parsing import get_parser  # noqa: E402
+from keyword_matcher import KeywordMatcher  # noqa: E402
+from page_analysis import analyze_landing_page  # noqa: E402
+
+ARCHIVE_VERSION = 1
+
+
+def load_archive(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        archive = json.load(f)
+    if archive.get('version') != ARCHIVE_VERSION:
+        raise ValueError(f"{path} is a version {archive.get('version')} archive; expected {ARCHIVE_VERSION}")
+    return archive
+
+
+def save_archive(archive, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(archive, f)
+    os.replace(tmp_path, path)
+
+
+def archive_digest(archive):
+    """Short digest of an archive's responses, so reports from different fixtures aren't compared by mistake."""
+    return hashlib.sha1(json.dumps(archive['responses'], sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _fetch(url, headers):
+    try:
+        response = requests.get(url, headers=headers, timeout=20, allow_redirects=True)
+    except requests.exceptions.RequestException as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+    return {
+        'status': response.status_code,
+        'content_type': response.headers.get('Content-Type', 'text/html'),
+        'body': response.text,
+    }
+
+
+def record_archive(sites, headers, keywords, link_keywords, max_subpages=10, workers=8):
+    """
+    Fetch every site's landing page and, when it mentions a keyword, the
+    candidate links a scan would follow (in crawl-planner order, up to
+    max_subpages). Returns the archive.
+    """
+    parse_html = get_parser('auto')
+    matchers = (KeywordMatcher(keywords), KeywordMatcher(link_keywords))
+    planner = CrawlPlanner(max_fetches=max_subpages)
+    responses = {}
+
+    def record_site(site):
+        recorded = {site['url']: _fetch(site['url'], headers)}
+        landing = recorded[site['url']]
+        if landing.get('status') == 200:
+            _, candidates, _ = analyze_landing_page(parse_html, site['url'], landing['body'], matchers)
+            for url in planner.plan(site, candidates)[:max_subpages]:
+                recorded[url] = _fetch(url, headers)
+        print(f"recorded {site['name']}: {len(recorded)} responses", file=sys.stderr)
+        return recorded
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for recorded in executor.map(record_site, sites):
+            responses.update(recorded)
+
+    return {
+        'version': ARCHIVE_VERSION,
+        'recorded_at': datetime.now().isoformat(),
+        'sites': sites,
+        'responses': responses,
+    }
+
+
+def synthetic_archive(sites=51, links=8, seed=7):
+    """
+    Generated stand-in for a recorded archive: large landing pages with a list
+    of procurement links, where only the last link on each site mentions a
+    keyword (the worst case for the crawl).
+    """
+    from bench_keyword_matcher import generate_portal_html
+
+    site_list = []
+    responses = {}
+    for i in range(sites):
+        origin = f'https://portal{i}.example.gov'
+        site = {'state': f'Site {i}', 'url': f'{origin}/procurement', 'name': f'Synthetic Portal {i}'}
+        site_list.append(site)
+        notices = ''.join(f'<li><a href="/procurement/rfp/{j}">Procurement notice {j}</a></li>' for j in range(links))
+        landing = generate_portal_html(anchors=0, paragraphs=300, seed=seed + i)
+        landing = landing.replace('</body>', f'<p>HCBS and LTSS services</p><ul>{notices}</ul></body>')
+        responses[site['url']] = {'status': 200, 'content_type': 'text/html; charset=utf-8', 'body': landing}
+        for j in range(links):
+            text = 'Behavioral health RFP 2024-001' if j == links - 1 else 'Office supplies bid'
+            body = f'<html><head><title>Notice {j}</title></head><body><h1>{text}</h1></body></html>'
+            responses[f'{origin}/procurement/rfp/{j}'] = {
+                'status': 200, 'content_type': 'text/html; charset=utf-8', 'body': body,
+            }
+
+    return {
+        'version': ARCHIVE_VERSION,
+        'recorded_at': None,
+        'sites': site_list,
+        'responses': responses,
+    }
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f'{parts.scheme}://{parts.netloc}'
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Serves an archive on 127.0.0.N addresses, one per recorded origin."""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, archive, latency=0.0, jitter=0.0, seed=0):
+        super().__init__(('', 0), _ReplayHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        port = self.server_address[1]
+
+        origins = sorted({_origin(url) for url in archive['responses']} | {_origin(site['url']) for site in archive['sites']})
+        if len(origins) > 254:
+            raise ValueError(f"Archive has {len(origins)} origins; at most 254 loopback addresses are available")
+        self.local_origins = {origin: f'http://127.0.0.{i + 1}:{port}' for i, origin in enumerate(origins)}
+        self.hosts = {local[len('http://'):]: origin for origin, local in self.local_origins.items()}
+
+        self.responses = {}
+        for url, entry in archive['responses'].items():
+            if 'body' in entry:
+                body = entry['body']
+                # Longest origins first, so one that prefixes another isn't rewritten halfway
+                for origin in sorted(self.local_origins, key=len, reverse=True):
+                    body = body.replace(origin, self.local_origins[origin])
+                data = body.encode('utf-8')
+                entry = dict(entry, body=data, etag=f'"{hashlib.sha1(data).hexdigest()[:16]}"')
+            self.responses[url.split('#')[0]] = entry
+
+        self.sites = [dict(site, url=self.local_url(site['url'])) for site in archive['sites']]
+
+    def local_url(self, url):
+        origin = _origin(url)
+        return self.local_origins[origin] + url[len(origin):]
+
+    def delay(self):
+        with self.rng_lock:
+            offset = self.rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        return max(0.0, self.latency + offset)
+
+    def handle_error(self, request, client_address):
+        pass  # connections reset by fetches a scan cancelled
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.server.delay())
+        origin = self.server.hosts.get(self.headers.get('Host', ''))
+        entry = self.server.responses.get(f'{origin}{self.path}') if origin else None
+        if entry is None:
+            self._send(404, 'text/plain', b'not in archive')
+        elif 'error' in entry:
+            # Recorded as a network failure: drop the connection without answering
+            self.close_connection = True
+        elif self.headers.get('If-None-Match') == entry['etag']:
+            self.send_response(304)
+            self.send_header('ETag', entry['etag'])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        else:
+            self._send(entry['status'], entry['content_type'], entry['body'], entry['etag'])
+
+    def _send(self, status, content_type, data, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(data)
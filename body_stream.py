@@ -0,0 +1,65 @@
+import codecs
+
+# Content types worth parsing; a response without a Content-Type header is let through
+TEXT_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain', 'text/xml', 'application/xml')
+CHUNK_BYTES = 16 * 1024
+
+
+class UnsupportedContentError(Exception):
+    """A response that isn't an HTML/text page, e.g. a PDF linked as an RFP."""
+
+    error_class = 'unsupported_content'
+    counts_against_host = False
+
+
+def check_content_type(url, content_type):
+    media_type = (content_type or '').split(';')[0].strip().lower()
+    if media_type and media_type not in TEXT_CONTENT_TYPES:
+        raise UnsupportedContentError(f"Skipping {url}: {media_type} is not a web page")
+
+
+def _decoder(charset):
+    try:
+        codec = codecs.lookup(charset or 'utf-8')
+    except LookupError:
+        codec = codecs.lookup('utf-8')
+    return codec.incrementaldecoder(errors='replace')
+
+
+class BodyStream:
+    """
+    Decodes a response body chunk by chunk, up to max_bytes, optionally handing
+    each decoded piece to ``consume(text)``. feed() returns True once reading
+    should stop: the byte cap was reached ('size_cap') or consume returned True
+    ('early_stop'), which is recorded in stop_reason.
+    """
+
+    def __init__(self, url, content_type, charset=None, max_bytes=2 * 1024 * 1024, consume=None):
+        check_content_type(url, content_type)
+        self.decoder = _decoder(charset)
+        self.max_bytes = max_bytes
+        self.consume = consume
+        self.parts = []
+        self.bytes = 0
+        self.stop_reason = None
+
+    def feed(self, data):
+        room = self.max_bytes - self.bytes
+        if len(data) >= room:
+            data = data[:room]
+            self.stop_reason = 'size_cap'
+        self.bytes += len(data)
+        text = self.decoder.decode(data)
+        if text:
+            self.parts.append(text)
+            if self.consume is not None and self.consume(text):
+                self.stop_reason = 'early_stop'
+        return self.stop_reason is not None
+
+    def text(self):
+        tail = self.decoder.decode(b'', final=True)
+        if tail:
+            self.parts.append(tail)
+            if self.consume is not None:
+                self.consume(tail)
+        return ''.join(self.parts)
@@ -0,0 +1,147 @@
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+# Anchor and URL terms that mark a link as a likely solicitation page, and ones that rarely are
+STRONG_TERMS = ('rfp', 'rfq', 'rfi', 'solicitation', 'bid', 'proposal')
+WEAK_TERMS = ('procurement', 'opportunit', 'contract', 'award', 'notice')
+NOISE_TERMS = ('login', 'register', 'search', 'faq', 'help', 'contact', 'calendar', 'archive', 'vendor-registration')
+NUMBER_PATTERN = re.compile(r'\d{2,}-\d{3,}|\d{4,}')
+UNFETCHABLE_SUFFIXES = ('.pdf', '.doc', '.docx', '.xls', '.xlsx', '.zip')
+
+
+class CrawlBudget:
+    """Per-site allowance of sub-page fetches, downloaded bytes and seconds for one scan."""
+
+    def __init__(self, max_fetches, max_bytes, max_seconds):
+        self.max_fetches = max_fetches
+        self.max_bytes = max_bytes
+        self.deadline = time.time() + max_seconds
+        self.fetches = 0
+        self.bytes = 0
+
+    def exhausted(self):
+        return (self.fetches >= self.max_fetches
+                or self.bytes >= self.max_bytes
+                or time.time() >= self.deadline)
+
+    def spend(self, fetches=1, size=0):
+        self.fetches += fetches
+        self.bytes += size
+
+
+class CrawlPlanner:
+    """
+    Decides which candidate links a site scan fetches, and in what order.
+
+    Links are scored by anchor text, URL shape and the site's hit history, and
+    fetched best-first within a CrawlBudget. URLs that were fetched without
+    matching are remembered and skipped until miss_ttl has passed. Per-site
+    counters record how many fetches the skips and the budget saved.
+    """
+
+    def __init__(self, state=None, max_fetches=10, max_bytes=5 * 1024 * 1024, max_seconds=30,
+                 miss_ttl=7 * 24 * 3600, max_misses=500):
+        self.max_fetches = max_fetches
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.miss_ttl = miss_ttl
+        self.max_misses = max_misses
+        self.lock = threading.Lock()
+        self.sites = (state or {}).get('sites', {})
+
+    def _site(self, site):
+        return self.sites.setdefault(site['url'], {
+            'name': site['name'],
+            'hits': {},    # url -> times it yielded an RFP match
+            'misses': {},  # url -> when it was last fetched without a match
+            'counters': {'candidates': 0, 'fetched': 0, 'hits': 0, 'skipped_misses': 0, 'skipped_budget': 0},
+        })
+
+    def budget(self):
+        return CrawlBudget(self.max_fetches, self.max_bytes, self.max_seconds)
+
+    def score(self, history, url, anchor_text):
+        """Higher is more likely to be a solicitation page."""
+        text = anchor_text.lower()
+        parsed = urlparse(url)
+        path = (parsed.path + '?' + parsed.query).lower()
+
+        score = 3.0 * min(history['hits'].get(url, 0), 3)
+        score += sum(2.0 for term in STRONG_TERMS if term in text)
+        score += sum(1.0 for term in WEAK_TERMS if term in text)
+        score += sum(1.0 for term in STRONG_TERMS if term in path)
+        score += sum(0.5 for term in WEAK_TERMS if term in path)
+        if NUMBER_PATTERN.search(text) or NUMBER_PATTERN.search(path):
+            score += 1.5
+        score -= sum(2.0 for term in NOISE_TERMS if term in text or term in path)
+        if parsed.path.lower().endswith(UNFETCHABLE_SUFFIXES):
+            score -= 3.0
+        # Directories that held matches before usually hold the next one too
+        directory = parsed.path.rsplit('/', 1)[0]
+        if any(urlparse(hit).path.rsplit('/', 1)[0] == directory for hit in history['hits']):
+            score += 1.0
+        return score
+
+    def plan(self, site, candidates):
+        """Order (url, anchor_text) candidates best-first, dropping recent misses."""
+        now = time.time()
+        with self.lock:
+            history = self._site(site)
+            counters = history['counters']
+            counters['candidates'] += len(candidates)
+            ranked = []
+            for position, (url, anchor_text) in enumerate(candidates):
+                missed_at = history['misses'].get(url)
+                if missed_at is not None and now - missed_at < self.miss_ttl:
+                    counters['skipped_misses'] += 1
+                    continue
+                # Ties keep page order, matching the old first-link-wins behavior
+                ranked.append((-self.score(history, url, anchor_text), position, url))
+        ranked.sort()
+        return [url for _, _, url in ranked]
+
+    def record_fetch(self, site, url, matched):
+        with self.lock:
+            history = self._site(site)
+            history['counters']['fetched'] += 1
+            if matched:
+                history['counters']['hits'] += 1
+                history['hits'][url] = history['hits'].get(url, 0) + 1
+                history['misses'].pop(url, None)
+            else:
+                history['misses'][url] = time.time()
+                if len(history['misses']) > self.max_misses:
+                    oldest = sorted(history['misses'], key=history['misses'].get)
+                    for stale_url in oldest[:len(history['misses']) - self.max_misses]:
+                        del history['misses'][stale_url]
+
+    def record_budget_skips(self, site, count):
+        if count:
+            with self.lock:
+                self._site(site)['counters']['skipped_budget'] += count
+
+    def to_state(self):
+        """JSON-serializable hit/miss history, persisted with the scan stats."""
+        with self.lock:
+            return {'sites': {
+                url: {
+                    'name': history['name'],
+                    'hits': dict(history['hits']),
+                    'misses': dict(history['misses']),
+                    'counters': dict(history['counters']),
+                }
+                for url, history in self.sites.items()
+            }}
+
+    def get_stats(self):
+        """Per-site crawl counters for /api/stats, with totals."""
+        with self.lock:
+            sites = {history['name']: dict(history['counters']) for history in self.sites.values()}
+        totals = {}
+        for counters in sites.values():
+            for name, value in counters.items():
+                totals[name] = totals.get(name, 0) + value
+        totals['fetches_saved'] = totals.get('skipped_misses', 0) + totals.get('skipped_budget', 0)
+        return {'totals': totals, 'sites': sites}
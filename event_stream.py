@@ -0,0 +1,114 @@
+import json
+import threading
+import time
+import uuid
+from collections import deque
+
+
+class Event:
+    __slots__ = ('seq', 'event_type', 'payload')
+
+    def __init__(self, seq, event_type, data):
+        self.seq = seq
+        self.event_type = event_type
+        self.payload = json.dumps(data, separators=(',', ':'))
+
+
+class EventBroker:
+    """
+    In-process publish/subscribe channel for scan results, formatted as
+    server-sent events.
+
+    A bounded replay log lets reconnecting clients resume from their
+    Last-Event-ID. Event ids carry a per-process boot token, so an id from
+    before a restart (or one that has fallen out of the log) is answered with
+    a full snapshot instead.
+
+    Each open stream holds a server thread, so at most ``max_streams`` are
+    handed out at a time (None for no limit).
+    """
+
+    def __init__(self, history=200, max_streams=None):
+        # Unique per process: gunicorn workers start in the same second but count events separately
+        self.boot_token = uuid.uuid4().hex
+        self.cond = threading.Condition()
+        self.events = deque(maxlen=history)
+        self.last_seq = 0
+        self.max_streams = max_streams
+        self.open_streams = 0
+
+    def open_stream(self):
+        """Take a stream slot; False when max_streams streams are already open."""
+        with self.cond:
+            if self.max_streams is not None and self.open_streams >= self.max_streams:
+                return False
+            self.open_streams += 1
+            return True
+
+    def close_stream(self):
+        with self.cond:
+            self.open_streams -= 1
+
+    def publish(self, event_type, data):
+        """Append an event to the log and wake every waiting stream."""
+        with self.cond:
+            self.last_seq += 1
+            self.events.append(Event(self.last_seq, event_type, data))
+            self.cond.notify_all()
+            return self.last_seq
+
+    def event_id(self, seq):
+        return f"{self.boot_token}-{seq}"
+
+    def parse_event_id(self, event_id):
+        """Return the sequence number for a Last-Event-ID from this process, else None."""
+        token, _, seq = (event_id or '').partition('-')
+        if token != self.boot_token or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def _events_after(self, seq):
+        """Events newer than seq, or None if some of them are no longer in the log."""
+        if seq > self.last_seq:
+            return None
+        if self.events and self.events[0].seq > seq + 1:
+            return None
+        return [event for event in self.events if event.seq > seq]
+
+    def wait(self, seq, timeout):
+        with self.cond:
+            events = self._events_after(seq)
+            if events == []:
+                self.cond.wait(timeout)
+                events = self._events_after(seq)
+            return events
+
+    def format(self, seq, event_type, payload):
+        lines = [f"id: {self.event_id(seq)}", f"event: {event_type}"]
+        lines.extend(f"data: {line}" for line in payload.splitlines() or [''])
+        return '\n'.join(lines) + '\n\n'
+
+    def stream(self, last_event_id, snapshot, max_duration=300, heartbeat=15):
+        """
+        Generator of SSE text for one client. Sends a ``snapshot`` event built
+        by snapshot() unless the client can resume from last_event_id, then
+        every published event. Ends after max_duration so a long-lived stream
+        doesn't pin a worker forever; EventSource reconnects and resumes.
+        """
+        yield 'retry: 5000\n\n'
+
+        seq = self.parse_event_id(last_event_id)
+        deadline = time.time() + max_duration
+        while time.time() < deadline:
+            events = None if seq is None else self.wait(seq, heartbeat)
+            if events is None:
+                # New client, restarted server or gap in the log: resend the full state
+                with self.cond:
+                    seq = self.last_seq
+                yield self.format(seq, 'snapshot', json.dumps(snapshot(), separators=(',', ':')))
+            elif not events:
+                yield ': keep-alive\n\n'
+            else:
+                for event in events:
+                    seq = event.seq
+                    yield self.format(event.seq, event.event_type, event.payload)
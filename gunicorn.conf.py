@@ -0,0 +1,14 @@
+import os
+import sys
+
+# Threaded workers: each /api/stream connection holds a thread for up to 5 minutes rather than a
+# whole sync worker, and isn't killed by the worker timeout. The app caps open streams per worker
+# at STREAM_MAX_CONNECTIONS (16), half the threads, so streams can't starve other requests
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+
+def post_worker_init(worker):
+    """Start the background loop in every worker; the scanner lock lets only one of them scan."""
+    sys.modules[worker.wsgi.import_name].start_background_scanner()
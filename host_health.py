@@ -0,0 +1,203 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+TRANSIENT_STATUSES = {408, 429, 500, 502, 503, 504}
+LATENCY_SAMPLES = 50
+MIN_LATENCY_SAMPLES = 5
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of fetching from a host whose circuit breaker is open."""
+
+    error_class = 'circuit_open'
+
+
+def host_of(url):
+    return (urlsplit(url).netloc or url).lower()
+
+
+def error_status(error):
+    status = getattr(error, 'status', None)
+    if status is None and isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        status = error.response.status_code
+    return status
+
+
+def is_transient(error):
+    """Timeouts, dropped connections and 408/429/5xx answers are worth retrying; other errors are not."""
+    status = error_status(error)
+    if status:
+        return status in TRANSIENT_STATUSES
+    return isinstance(error, (asyncio.TimeoutError, requests.exceptions.Timeout, requests.exceptions.ConnectionError,
+                              aiohttp.ClientConnectionError, aiohttp.ServerTimeoutError))
+
+
+class HostHealth:
+    """
+    Per-host circuit breakers and latency-derived fetch timeouts.
+
+    A host's breaker opens after ``failure_threshold`` consecutive failed
+    fetches; while open, fetches fail fast with CircuitOpenError. Once
+    ``open_seconds`` have passed it goes half-open and lets one probe through:
+    success closes it, failure reopens it for twice as long (up to
+    ``max_open_seconds``). Client errors count against a host only where the
+    caller says so (landing pages), since a dead sub-page link says little
+    about the portal.
+
+    Fetch timeouts are a multiple of the p95 of the host's recent successful
+    fetch times, clamped to [min_timeout, max_timeout]; hosts without enough
+    samples get max_timeout.
+    """
+
+    def __init__(self, state=None, failure_threshold=3, open_seconds=1800, max_open_seconds=86400,
+                 min_timeout=2.0, max_timeout=10.0, timeout_multiplier=4.0, retries=2, retry_backoff=0.5):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_multiplier = timeout_multiplier
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.lock = threading.Lock()
+        self.hosts = {}
+        for host, saved in (state or {}).get('hosts', {}).items():
+            entry = self._new_entry()
+            entry.update(saved)
+            entry['latencies'] = deque(saved.get('latencies', []), maxlen=LATENCY_SAMPLES)
+            entry['probing'] = False
+            self.hosts[host] = entry
+
+    def _new_entry(self):
+        return {
+            'state': CLOSED,
+            'failures': 0,           # consecutive
+            'open_until': 0,
+            'open_seconds': self.open_seconds,
+            'last_error': None,
+            'latencies': deque(maxlen=LATENCY_SAMPLES),
+            'probing': False,
+            'counters': {'successes': 0, 'errors': 0, 'rejected': 0, 'retries': 0, 'opened': 0},
+        }
+
+    def _entry(self, url):
+        host = host_of(url)
+        entry = self.hosts.get(host)
+        if entry is None:
+            entry = self.hosts[host] = self._new_entry()
+        return entry
+
+    def _timeout(self, entry):
+        latencies = sorted(entry['latencies'])
+        if len(latencies) < MIN_LATENCY_SAMPLES:
+            return self.max_timeout
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+        return round(min(self.max_timeout, max(self.min_timeout, p95 * self.timeout_multiplier)), 2)
+
+    def before_fetch(self, url):
+        """
+        Check the host's breaker before a fetch. Returns the timeout to use, or
+        raises CircuitOpenError if the host is failing and not due a probe.
+        """
+        with self.lock:
+            entry = self._entry(url)
+            if entry['state'] == OPEN and time.time() >= entry['open_until']:
+                entry['state'] = HALF_OPEN
+            if entry['state'] == OPEN or (entry['state'] == HALF_OPEN and entry['probing']):
+                entry['counters']['rejected'] += 1
+                raise CircuitOpenError(f"Circuit open for {host_of(url)} after {entry['failures']} failures")
+            if entry['state'] == HALF_OPEN:
+                entry['probing'] = True
+            return self._timeout(entry)
+
+    def record_success(self, url, seconds=None):
+        with self.lock:
+            entry = self._entry(url)
+            entry.update(state=CLOSED, failures=0, probing=False, open_seconds=self.open_seconds)
+            entry['counters']['successes'] += 1
+            if seconds is not None:
+                entry['latencies'].append(round(seconds, 3))
+
+    def cancel_fetch(self, url):
+        """A fetch allowed by before_fetch was abandoned; let a half-open host be probed again."""
+        with self.lock:
+            self._entry(url)['probing'] = False
+
+    def record_failure(self, url, error, count_client_errors=True):
+        """Record a failed fetch; client (4xx) errors only count against the host if count_client_errors."""
+        status = error_status(error)
+        if not getattr(error, 'counts_against_host', True):
+            # The host answered; the content was the problem
+            self.record_success(url)
+            return
+        if status and not is_transient(error) and not count_client_errors:
+            self.record_success(url)
+            return
+
+        with self.lock:
+            entry = self._entry(url)
+            entry['failures'] += 1
+            entry['counters']['errors'] += 1
+            entry['last_error'] = {'error': str(error)[:200], 'at': time.time()}
+            if entry['state'] == HALF_OPEN:
+                # The probe failed: back off for longer before the next one
+                entry['open_seconds'] = min(self.max_open_seconds, entry['open_seconds'] * 2)
+                self._open(entry)
+            elif entry['state'] == CLOSED and entry['failures'] >= self.failure_threshold:
+                self._open(entry)
+
+    def _open(self, entry):
+        entry.update(state=OPEN, probing=False, open_until=time.time() + entry['open_seconds'])
+        entry['counters']['opened'] += 1
+
+    def retry_delay(self, url, error, attempt):
+        """
+        Seconds to wait before retrying a failed fetch (full jitter on an
+        exponential backoff), or None if the error isn't transient, the retries
+        are used up or the breaker has opened.
+        """
+        if attempt >= self.retries or not is_transient(error):
+            return None
+        with self.lock:
+            entry = self._entry(url)
+            if entry['state'] != CLOSED:
+                return None
+            entry['counters']['retries'] += 1
+        return random.uniform(0, self.retry_backoff * 2 ** attempt)
+
+    def to_state(self):
+        with self.lock:
+            return {'hosts': {
+                host: dict({key: value for key, value in entry.items() if key != 'probing'},
+                           latencies=list(entry['latencies']), counters=dict(entry['counters']))
+                for host, entry in self.hosts.items()
+            }}
+
+    def get_stats(self):
+        """Breaker state, timeout and counters per host for /api/stats, unhealthy hosts listed first."""
+        now = time.time()
+        with self.lock:
+            hosts = {}
+            for host, entry in self.hosts.items():
+                hosts[host] = {
+                    'state': entry['state'],
+                    'failures': entry['failures'],
+                    'timeout': self._timeout(entry),
+                    'retry_in': max(0, round(entry['open_until'] - now)) if entry['state'] == OPEN else 0,
+                    'last_error': entry['last_error'],
+                    **entry['counters'],
+                }
+        return {
+            'open': sorted(host for host, stats in hosts.items() if stats['state'] == OPEN),
+            'half_open': sorted(host for host, stats in hosts.items() if stats['state'] == HALF_OPEN),
+            'rejected': sum(stats['rejected'] for stats in hosts.values()),
+            'hosts': hosts,
+        }
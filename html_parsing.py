@@ -0,0 +1,218 @@
+import html.parser
+import logging
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # Optional C-backed parser
+    LexborHTMLParser = None
+
+try:
+    from lxml import etree
+except ImportError:  # Optional; the streaming extractor falls back to the stdlib tokenizer
+    etree = None
+
+logger = logging.getLogger(__name__)
+
+# Tags whose contents BeautifulSoup's get_text() leaves out
+SKIP_TEXT_TAGS = ('script', 'style', 'template')
+HEADING_TAGS = ('h1', 'h2', 'title')
+
+
+class ParsedPage:
+    """The parts of a page the scrapers use: visible text, anchors and the first heading."""
+
+    __slots__ = ('text', 'links', 'heading')
+
+    def __init__(self, text, links, heading):
+        self.text = text
+        self.links = links  # [(anchor text, href)] for every <a href>
+        self.heading = heading  # stripped text of the first h1/h2/title, or None
+
+
+class _ExtractionHandler:
+    """
+    Parser event target that collects text, anchors and the first heading
+    without building a tree. Works as an lxml parser target and behind the
+    stdlib HTMLParser adapter below.
+    """
+
+    def __init__(self, want_links=True):
+        self.want_links = want_links
+        self.text_parts = []
+        self.links = []
+        self.heading = None
+        self._skip_depth = 0
+        self._anchor = None
+        self._heading_tag = None
+        self._heading_parts = []
+        self._in_data = False  # The next data event continues the same text node
+
+    def start(self, tag, attrib):
+        self._in_data = False
+        if tag in SKIP_TEXT_TAGS:
+            self._skip_depth += 1
+        elif tag == 'a' and self.want_links:
+            self._close_anchor()
+            href = attrib.get('href')
+            if href is not None:
+                self._anchor = (href, [])
+        elif tag in HEADING_TAGS and self.heading is None and self._heading_tag is None:
+            self._heading_tag = tag
+
+    def end(self, tag):
+        self._in_data = False
+        if tag in SKIP_TEXT_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == 'a':
+            self._close_anchor()
+        elif tag == self._heading_tag:
+            self.heading = self._heading_text()
+            self._heading_tag = None
+            self._heading_parts = []
+
+    def data(self, data):
+        if self._skip_depth:
+            return
+        self.text_parts.append(data)
+        if self._anchor is not None:
+            self._anchor[1].append(data)
+        if self._heading_tag is not None:
+            # A text node split across fed chunks arrives as several events; strip it as a whole
+            if self._in_data and self._heading_parts:
+                self._heading_parts[-1] += data
+            else:
+                self._heading_parts.append(data)
+        self._in_data = True
+
+    def _heading_text(self):
+        return ''.join(part.strip() for part in self._heading_parts)
+
+    def _close_anchor(self):
+        if self._anchor is not None:
+            href, parts = self._anchor
+            self.links.append((''.join(parts), href))
+            self._anchor = None
+
+    def close(self):
+        self._close_anchor()
+        if self._heading_tag is not None:
+            self.heading = self._heading_text()
+        return ParsedPage(''.join(self.text_parts), self.links, self.heading)
+
+
+class _StdlibAdapter(html.parser.HTMLParser):
+    """Drives an _ExtractionHandler from the pure-Python stdlib tokenizer."""
+
+    def __init__(self, target):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+    def close(self):
+        super().close()
+        return self.target.close()
+
+
+class StreamingExtractor:
+    """
+    Incremental extraction mode: feed() HTML chunks as they arrive and close()
+    to get the ParsedPage. Uses lxml's event-target parser when available.
+    """
+
+    def __init__(self, want_links=True):
+        self.handler = _ExtractionHandler(want_links)
+        if etree is not None:
+            self._parser = etree.HTMLParser(target=self.handler)
+        else:
+            self._parser = _StdlibAdapter(self.handler)
+        self._text_read = 0
+
+    def feed(self, chunk):
+        self._parser.feed(chunk)
+
+    @property
+    def heading(self):
+        """The first h1/h2/title once its closing tag has been seen, else None."""
+        return self.handler.heading
+
+    def new_text(self):
+        """Visible text extracted since the previous call."""
+        parts = self.handler.text_parts
+        text = ''.join(parts[self._text_read:])
+        self._text_read = len(parts)
+        return text
+
+    def close(self):
+        try:
+            return self._parser.close()
+        except Exception as e:
+            # lxml refuses to close an empty or hopelessly broken document; keep what was collected
+            logger.debug(f"Streaming parser could not close cleanly: {e}")
+            return self.handler.close()
+
+
+def _parse_selectolax(html, want_links=True):
+    tree = LexborHTMLParser(html)
+    heading_node = tree.css_first(', '.join(HEADING_TAGS))
+    heading = heading_node.text(deep=True, separator='', strip=True) if heading_node is not None else None
+    links = []
+    if want_links:
+        links = [(node.text(), node.attributes.get('href') or '') for node in tree.css('a[href]')]
+    tree.strip_tags(list(SKIP_TEXT_TAGS))
+    text = tree.root.text(separator='') if tree.root is not None else ''
+    return ParsedPage(text, links, heading)
+
+
+def _parse_stream(html, want_links=True):
+    extractor = StreamingExtractor(want_links)
+    extractor.feed(html)
+    return extractor.close()
+
+
+def _parse_bs4(html, want_links=True):
+    soup = BeautifulSoup(html, 'html.parser')
+    heading_tag = soup.find(list(HEADING_TAGS))
+    heading = heading_tag.get_text(strip=True) if heading_tag else None
+    links = []
+    if want_links:
+        links = [(a_tag.get_text(), a_tag['href']) for a_tag in soup.find_all('a', href=True)]
+    return ParsedPage(soup.get_text(), links, heading)
+
+
+BACKENDS = {
+    'selectolax': _parse_selectolax,
+    'stream': _parse_stream,
+    'bs4': _parse_bs4,
+}
+
+
+def available_backends():
+    """Backend names usable in this environment, fastest first."""
+    names = ['stream', 'bs4']
+    if LexborHTMLParser is not None:
+        names.insert(0, 'selectolax')
+    return names
+
+
+def get_parser(name='auto'):
+    """
+    Return a parse(html, want_links=True) -> ParsedPage function for the named
+    backend. 'auto' picks the fastest one installed; an unavailable backend
+    falls back to BeautifulSoup.
+    """
+    if name == 'auto':
+        name = available_backends()[0]
+    if name not in available_backends():
+        logger.warning(f"HTML parser backend '{name}' is not available, falling back to BeautifulSoup")
+        name = 'bs4'
+    return BACKENDS[name]
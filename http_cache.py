@@ -0,0 +1,209 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse:
+    """A fetched page: either a fresh body or one confirmed unchanged by the cache."""
+
+    def __init__(self, cache, url, text=None, unchanged=False, size=0):
+        self.cache = cache
+        self.url = url
+        self.unchanged = unchanged
+        self.size = size  # bytes downloaded for this response; 0 for a 304
+        self.timing = None  # FetchTiming set by the fetching engine
+        self._text = text
+
+    @property
+    def text(self):
+        # Bodies of 304 responses are only read back from disk if someone needs them
+        if self._text is None:
+            self._text = self.cache.read_body(self.url) or ''
+        return self._text
+
+
+class HTTPCache:
+    """
+    Persistent conditional-GET cache keyed by URL.
+
+    Stores each body on disk together with its ETag/Last-Modified validators and
+    a content hash, plus any analysis results computed from that body, so a 304
+    or an unchanged body can reuse the previous analysis without re-parsing.
+    Total body size is bounded with least-recently-used eviction.
+    """
+
+    def __init__(self, cache_dir='http_cache', max_bytes=100 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.index_file = os.path.join(cache_dir, 'index.json')
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.stats = {
+            'hits': 0,
+            'unchanged': 0,
+            'misses': 0,
+            'bytes_saved': 0,
+            'parses_skipped': 0,
+            'evictions': 0,
+        }
+        self.load()
+
+    def load(self):
+        """Load the cache index from disk."""
+        try:
+            if os.path.exists(self.index_file):
+                with open(self.index_file, 'r') as f:
+                    data = json.load(f)
+                self.entries = data.get('entries', {})
+                self.stats.update(data.get('stats', {}))
+        except Exception as e:
+            logger.error(f"Error loading HTTP cache index: {e}")
+            self.entries = {}
+
+    def save(self):
+        """Persist the cache index, writing to a temp file first so a crash can't corrupt it."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with self.lock:
+                data = json.dumps({'entries': self.entries, 'stats': self.stats})
+            tmp_file = self.index_file + '.tmp'
+            with open(tmp_file, 'w') as f:
+                f.write(data)
+            os.replace(tmp_file, self.index_file)
+        except Exception as e:
+            logger.error(f"Error saving HTTP cache index: {e}")
+
+    def _body_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode()).hexdigest() + '.body')
+
+    def conditional_headers(self, url):
+        """Return If-None-Match / If-Modified-Since headers for a cached URL."""
+        with self.lock:
+            entry = self.entries.get(url)
+            if not entry:
+                return {}
+            headers = {}
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+            return headers
+
+    def read_body(self, url):
+        try:
+            with open(self._body_path(url), 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def not_modified(self, url):
+        """Record a 304 response and return the cached page."""
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                self.stats['misses'] += 1
+                return CachedResponse(self, url, text='')
+            entry['last_used'] = time.time()
+            self.stats['hits'] += 1
+            self.stats['bytes_saved'] += entry['size']
+        return CachedResponse(self, url, unchanged=True)
+
+    def store(self, url, headers, text, truncated=False):
+        """
+        Record a 200 response, detecting bodies identical to the cached copy. A
+        truncated body (download stopped early or cut off at the size cap) is
+        kept without its validators, so the next fetch is unconditional rather
+        than a 304 that would hand back the partial text.
+        """
+        body = text.encode('utf-8', errors='replace')
+        body_hash = hashlib.sha256(body).hexdigest()
+        with self.lock:
+            entry = self.entries.get(url)
+            unchanged = entry is not None and entry['body_hash'] == body_hash
+            if unchanged:
+                self.stats['unchanged'] += 1
+            else:
+                self.stats['misses'] += 1
+                entry = {'analysis': {}}
+                self.entries[url] = entry
+            entry.update({
+                'etag': None if truncated else headers.get('ETag'),
+                'last_modified': None if truncated else headers.get('Last-Modified'),
+                'body_hash': body_hash,
+                'size': len(body),
+                'last_used': time.time(),
+            })
+
+        if not unchanged:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(self._body_path(url), 'w', encoding='utf-8') as f:
+                    f.write(text)
+            except OSError as e:
+                logger.warning(f"Could not write cached body for {url}: {e}")
+            self._evict()
+
+        return CachedResponse(self, url, text=text, unchanged=unchanged, size=len(body))
+
+    def cached_analysis(self, page, key):
+        """Return (True, result) if an unchanged page has an analysis stored under ``key``, else (False, None)."""
+        with self.lock:
+            entry = self.entries.get(page.url)
+            if page.unchanged and entry is not None and key in entry['analysis']:
+                self.stats['parses_skipped'] += 1
+                return True, entry['analysis'][key]
+        return False, None
+
+    def store_analysis(self, page, key, result):
+        """Store a (JSON-serializable) analysis result for the page's current body."""
+        with self.lock:
+            entry = self.entries.get(page.url)
+            if entry is not None:
+                entry['analysis'][key] = result
+
+    def memoize(self, page, key, compute):
+        """
+        Return the analysis stored under ``key`` for an unchanged page, or run
+        ``compute()`` and store its (JSON-serializable) result.
+        """
+        found, result = self.cached_analysis(page, key)
+        if found:
+            return result
+        result = compute()
+        self.store_analysis(page, key, result)
+        return result
+
+    def _evict(self):
+        """Drop least recently used bodies until the cache fits in max_bytes."""
+        with self.lock:
+            total = sum(entry['size'] for entry in self.entries.values())
+            if total <= self.max_bytes:
+                return
+            evicted = []
+            for url, entry in sorted(self.entries.items(), key=lambda item: item[1]['last_used']):
+                if total <= self.max_bytes:
+                    break
+                total -= entry['size']
+                evicted.append(url)
+            for url in evicted:
+                del self.entries[url]
+                self.stats['evictions'] += 1
+
+        for url in evicted:
+            try:
+                os.remove(self._body_path(url))
+            except OSError:
+                pass
+
+    def get_stats(self):
+        """Counters surfaced in /api/stats."""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self.entries)
+            stats['bytes_stored'] = sum(entry['size'] for entry in self.entries.values())
+        return stats
@@ -0,0 +1,143 @@
+import hashlib
+import logging
+import re
+import time
+from urllib.parse import urljoin, urlparse
+
+from html_parsing import StreamingExtractor
+
+logger = logging.getLogger(__name__)
+
+RFP_NUMBER_PATTERN = re.compile(r'(RFP|BID|SOLICITATION)[\s-]?(\d{2,}-\d{3,}|\d{3,})', re.I)
+# What may follow an RFP number match at the end of the text read so far and still turn it into
+# a longer one once more text arrives: nothing yet, or a hyphen and the start of a second group
+RFP_NUMBER_CONTINUES = re.compile(r'-?\d{0,2}\Z')
+# Text kept from the previous chunk so keywords and RFP numbers split across chunks are still found
+SCAN_OVERLAP = 128
+
+
+def analyze_landing_page(parse_html, base_url, html, matchers):
+    """
+    Return the keywords found on a landing page, its candidate RFP links as
+    [url, anchor text] pairs and a hash of its whitespace-normalized text.
+    """
+    keyword_matcher, link_matcher = matchers
+    page = parse_html(html)
+    main_page_content = page.text.lower()
+    found_keywords = keyword_matcher.matched(main_page_content)
+    text_hash = hashlib.sha1(' '.join(main_page_content.split()).encode()).hexdigest()
+
+    candidates = []
+    if not found_keywords:
+        return found_keywords, candidates, text_hash
+
+    seen_urls = set()
+
+    # Search for links that are likely RFPs
+    for anchor_text, href in page.links:
+        if link_matcher.search(anchor_text.lower(), href.lower()):
+            full_url = urljoin(base_url, href)
+
+            # Basic URL validation
+            if not urlparse(full_url).scheme in ['http', 'https']:
+                logger.debug(f"Skipping invalid URL: {full_url}")
+                continue
+
+            if full_url not in seen_urls:
+                seen_urls.add(full_url)
+                candidates.append([full_url, anchor_text.strip()])
+
+    return found_keywords, candidates, text_hash
+
+
+def listed_solicitations(candidates, keyword_matcher):
+    """
+    Split landing-page candidates into solicitations the listing already
+    identifies, as (url, title, rfp_number) from anchor text that mentions a
+    keyword and carries an RFP number, and the candidates left to fetch.
+    """
+    listed = []
+    remaining = []
+    for url, anchor_text in candidates:
+        rfp_number_match = RFP_NUMBER_PATTERN.search(anchor_text)
+        if rfp_number_match and keyword_matcher.search(anchor_text.lower()):
+            listed.append((url, anchor_text, rfp_number_match.group(0).upper().strip()))
+        else:
+            remaining.append((url, anchor_text))
+    return listed, remaining
+
+
+def analyze_rfp_page(parse_html, html, keyword_matcher):
+    """Return (title, rfp_number) if a candidate page mentions a keyword, otherwise None."""
+    rfp_page = parse_html(html, want_links=False)
+    rfp_content = rfp_page.text.lower()
+
+    # Check for keywords on the deeper page
+    if not keyword_matcher.search(rfp_content):
+        return None
+
+    # Extract title from the first h1/h2/title
+    found_title = rfp_page.heading
+
+    # Extract RFP number using regex
+    found_rfp_number = None
+    rfp_number_match = RFP_NUMBER_PATTERN.search(rfp_content)
+    if rfp_number_match:
+        found_rfp_number = rfp_number_match.group(0).upper().strip()
+
+    return found_title, found_rfp_number
+
+
+class RFPPageScanner:
+    """
+    Incremental analyze_rfp_page for a body that arrives in chunks. feed()
+    returns True once the page is known to mention a keyword and both its title
+    and RFP number have been seen, so the rest of the download can be skipped;
+    finish() gives the same result analyze_rfp_page would for the text read.
+    """
+
+    def __init__(self, keyword_matcher):
+        self.keyword_matcher = keyword_matcher
+        self.reset()
+
+    def reset(self):
+        """Start over, e.g. when a fetch is retried."""
+        self.extractor = StreamingExtractor(want_links=False)
+        self.started = False
+        self.matched = False
+        self.rfp_number = None
+        self.tail = ''
+        self.seconds = 0.0
+
+    def _scan(self, text, final=False):
+        window = self.tail + text.lower()
+        if not self.matched and self.keyword_matcher.search(window):
+            self.matched = True
+        keep_from = len(window) - SCAN_OVERLAP
+        if self.rfp_number is None:
+            match = RFP_NUMBER_PATTERN.search(window)
+            if match is not None:
+                if final or not RFP_NUMBER_CONTINUES.match(window, match.end()):
+                    self.rfp_number = match.group(0).upper().strip()
+                else:
+                    # It may still grow (e.g. 'rfp 2024-' + '001'); keep all of it for the next chunk
+                    keep_from = min(keep_from, match.start())
+        self.tail = window[max(keep_from, 0):]
+
+    def feed(self, chunk):
+        started = time.perf_counter()
+        self.started = True
+        self.extractor.feed(chunk)
+        self._scan(self.extractor.new_text())
+        self.seconds += time.perf_counter() - started
+        return self.matched and self.rfp_number is not None and self.extractor.heading is not None
+
+    def finish(self):
+        """Return (title, rfp_number) if the page mentions a keyword, otherwise None."""
+        started = time.perf_counter()
+        page = self.extractor.close()
+        self._scan(self.extractor.new_text(), final=True)
+        self.seconds += time.perf_counter() - started
+        if not self.matched:
+            return None
+        return page.heading, self.rfp_number
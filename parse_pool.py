@@ -0,0 +1,123 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+from html_parsing import get_parser
+from keyword_matcher import KeywordMatcher
+from page_analysis import analyze_landing_page, analyze_rfp_page
+
+# Per-process state of pool workers, set up by _init_worker
+_parse_html = None
+_matchers = {}
+
+
+def _init_worker(parser_name):
+    global _parse_html
+    _parse_html = get_parser(parser_name)
+
+
+def _matcher(keywords):
+    matcher = _matchers.get(keywords)
+    if matcher is None:
+        matcher = _matchers[keywords] = KeywordMatcher(list(keywords))
+    return matcher
+
+
+def _analyze(kind, base_url, html, keyword_lists):
+    """Run one page analysis in a worker process; returns (result, cpu seconds)."""
+    start = time.process_time()
+    keyword_matcher, link_matcher = (_matcher(tuple(keywords)) for keywords in keyword_lists)
+    if kind == 'landing':
+        result = analyze_landing_page(_parse_html, base_url, html, (keyword_matcher, link_matcher))
+    else:
+        result = analyze_rfp_page(_parse_html, html, keyword_matcher)
+    return result, time.process_time() - start
+
+
+class ParsePool:
+    """
+    Parse-and-match stage of the scan pipeline, run in a ProcessPoolExecutor so
+    HTML parsing doesn't hold the GIL the fetch side needs.
+
+    Fetchers hand over raw pages through a bounded number of slots: once
+    max_pending pages are queued or being parsed, the next fetcher waits (a
+    thread blocks, a coroutine awaits) until one finishes. The worker processes
+    are started on first use and reused across scans.
+    """
+
+    def __init__(self, workers, parser_name='auto', max_pending=None):
+        self.workers = workers
+        self.parser_name = parser_name
+        self.max_pending = max_pending or workers * 4
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.lock = threading.Lock()
+        self.executor = None
+        self.stats = {'pages': 0, 'worker_cpu_seconds': 0.0, 'waits': 0, 'wait_seconds': 0.0}
+
+    def _get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = concurrent.futures.ProcessPoolExecutor(
+                    self.workers, initializer=_init_worker, initargs=(self.parser_name,))
+            return self.executor
+
+    def _record_wait(self, started):
+        with self.lock:
+            self.stats['waits'] += 1
+            self.stats['wait_seconds'] += time.perf_counter() - started
+
+    def _submit(self, kind, base_url, html, keyword_lists):
+        """Submit an analysis for a page whose slot is already held; the slot is freed when it finishes."""
+        try:
+            future = self._get_executor().submit(_analyze, kind, base_url, html, keyword_lists)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future):
+        self.slots.release()
+        if not future.cancelled() and future.exception() is None:
+            with self.lock:
+                self.stats['pages'] += 1
+                self.stats['worker_cpu_seconds'] += future.result()[1]
+
+    def analyze(self, kind, base_url, html, keyword_lists):
+        """Analyze a page in the pool from a fetch thread, blocking while the pool is saturated."""
+        if not self.slots.acquire(blocking=False):
+            started = time.perf_counter()
+            self.slots.acquire()
+            self._record_wait(started)
+        return self._submit(kind, base_url, html, keyword_lists).result()[0]
+
+    async def analyze_async(self, kind, base_url, html, keyword_lists):
+        """Coroutine version of analyze(); waits for a free slot without blocking the event loop."""
+        if not self.slots.acquire(blocking=False):
+            started = time.perf_counter()
+            waiter = asyncio.get_running_loop().run_in_executor(None, self.slots.acquire)
+            try:
+                await asyncio.shield(waiter)
+            except asyncio.CancelledError:
+                # The slot is still acquired eventually; hand it straight back
+                waiter.add_done_callback(lambda _: self.slots.release())
+                raise
+            self._record_wait(started)
+        future = self._submit(kind, base_url, html, keyword_lists)
+        return (await asyncio.wrap_future(future))[0]
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+        stats['workers'] = self.workers
+        stats['max_pending'] = self.max_pending
+        stats['worker_cpu_seconds'] = round(stats['worker_cpu_seconds'], 3)
+        stats['wait_seconds'] = round(stats['wait_seconds'], 3)
+        return stats
+
+    def shutdown(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,65 @@
+import gzip
+import hashlib
+import threading
+
+from flask import current_app, request
+
+# Bodies smaller than this aren't worth gzipping
+GZIP_MIN_BYTES = 1024
+
+
+class CachedBody:
+    """A serialized JSON response body with its strong ETag and optional gzip variant."""
+
+    def __init__(self, body, compress=True):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.gzip_body = gzip.compress(body, compresslevel=6) if compress and len(body) >= GZIP_MIN_BYTES else None
+
+
+class ResponseCache:
+    """
+    Precomputed API responses keyed by name and built at most once per data
+    version. Serving a cached entry costs a dict lookup plus an ETag
+    comparison; clients that send a matching If-None-Match get a 304.
+    """
+
+    def __init__(self, max_entries=256, compress=True):
+        self.max_entries = max_entries
+        self.compress = compress
+        self.lock = threading.Lock()
+        self.entries = {}  # name -> (version, CachedBody)
+
+    def get(self, name, version, build):
+        """Return the CachedBody for name at version, calling build() for the payload if stale."""
+        with self.lock:
+            cached = self.entries.get(name)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+        entry = CachedBody(current_app.json.dumps(build()).encode('utf-8'), self.compress)
+        with self.lock:
+            if len(self.entries) >= self.max_entries and name not in self.entries:
+                # Filtered variants are cheap to rebuild; start over rather than track recency
+                self.entries.clear()
+            self.entries[name] = (version, entry)
+        return entry
+
+    def respond(self, name, version, build):
+        """Build a Flask response for the cached entry, honoring If-None-Match and Accept-Encoding."""
+        entry = self.get(name, version, build)
+        use_gzip = entry.gzip_body is not None and 'gzip' in request.headers.get('Accept-Encoding', '')
+        etag = entry.etag + '-gz' if use_gzip else entry.etag
+
+        if request.if_none_match.contains(entry.etag) or request.if_none_match.contains(entry.etag + '-gz'):
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.response_class(
+                entry.gzip_body if use_gzip else entry.body, mimetype='application/json')
+            if use_gzip:
+                response.headers['Content-Encoding'] = 'gzip'
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add('Accept-Encoding')
+        return response
@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+import zlib
+
+try:
+    import orjson
+except ImportError:  # Optional; the standard json module writes the same lines, more slowly
+    orjson = None
+
+from rfp_store import RFP_COLUMNS, parse_found_date
+
+# Export formats and their content types
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+EXPORT_COLUMNS = RFP_COLUMNS + ('change_seq',)
+# Serialized rows are sent in chunks of about this size
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def parse_cursor(value):
+    """An export cursor is the change sequence number a previous export ended at."""
+    if value is None or value == '':
+        return 0
+    try:
+        cursor = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid cursor {value!r}")
+    if cursor < 0:
+        raise ValueError(f"Invalid cursor {value!r}")
+    return cursor
+
+
+def parse_since(value):
+    """?since= as an ISO date or datetime, or None if not given."""
+    if not value:
+        return None
+    since = parse_found_date(value)
+    if since is None:
+        raise ValueError(f"Invalid since {value!r}; expected an ISO date such as 2024-05-01")
+    return since
+
+
+def _ndjson_line(record):
+    if orjson is not None:
+        return orjson.dumps(record) + b'\n'
+    return json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def ndjson_chunks(changes):
+    """One JSON object per RFP and line, each with its change_seq, from (change_seq, rfp) pairs."""
+    lines = []
+    size = 0
+    for seq, rfp in changes:
+        rfp['change_seq'] = seq
+        line = _ndjson_line(rfp)
+        lines.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield b''.join(lines)
+            lines = []
+            size = 0
+    if lines:
+        yield b''.join(lines)
+
+
+def csv_chunks(changes):
+    """A header row, then one row per RFP with keywords joined by '; ', from (change_seq, rfp) pairs."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for seq, rfp in changes:
+        rfp['change_seq'] = seq
+        rfp['keywords_found'] = '; '.join(rfp.get('keywords_found') or [])
+        writer.writerow([rfp.get(column) for column in EXPORT_COLUMNS])
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def gzip_chunks(chunks, level=6):
+    """Gzip a stream of byte chunks as it is produced."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(changes, fmt):
+    """Serialize (change_seq, rfp) pairs in an EXPORT_FORMATS format, chunk by chunk."""
+    return csv_chunks(changes) if fmt == 'csv' else ndjson_chunks(changes)
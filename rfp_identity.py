@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import re
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever rfp_id() changes, so stored RFPs are re-keyed once on startup
+ID_SCHEME_VERSION = 2
+
+# Title given to RFPs found on a landing page without a matching deep link
+PLACEHOLDER_TITLE = 'Healthcare Opportunity - {state}'
+
+TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'sessionid', 'session_id', 'sid', 'jsessionid', 'phpsessid'}
+NUMBER_PREFIX = re.compile(r'^(rfp|rfq|rfi|bid|solicitation|no|number|#|\s|-|\.|:)+', re.I)
+# Titles shorter than this are too generic ("Bids", "Procurement") to identify a solicitation
+MIN_TITLE_KEY_LENGTH = 20
+
+
+def canonical_url(url):
+    """
+    Normalize a URL so trivially different spellings of the same page compare
+    equal: lowercase scheme and host, no 'www.', default port, fragment,
+    session path parameter or tracking query parameters, sorted query, and no
+    trailing slash.
+    """
+    parts = urlsplit((url or '').strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    port = parts.port if parts.port not in (None, 80, 443) else None
+    netloc = f"{host}:{port}" if port else host
+
+    path = re.sub(r';jsessionid=[^/?]*', '', parts.path, flags=re.I).rstrip('/') or '/'
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')
+    )
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
+def normalize_rfp_number(rfp_number):
+    """'RFP 2024-001', 'rfp-2024001' and 'BID #2024-001' all become '2024001'; placeholders become None."""
+    if not rfp_number or rfp_number.strip().upper() in ('N/A', 'NA', 'NONE'):
+        return None
+    number = re.sub(r'[^0-9a-z]', '', NUMBER_PREFIX.sub('', rfp_number.lower()))
+    return number or None
+
+
+def normalize_title(title):
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', (title or '').lower()).split())
+
+
+def state_slug(state):
+    return (state or '').lower().replace(' ', '_')
+
+
+def rfp_id(rfp):
+    """
+    Deterministic id for an RFP record: the state plus a digest of its canonical
+    URL and its content key (normalized RFP number, else normalized title).
+    Unlike hash(), this is the same in every process and after restarts.
+    """
+    content_key = normalize_rfp_number(rfp.get('rfp_number')) or normalize_title(rfp.get('title'))
+    digest = hashlib.sha1(f"{canonical_url(rfp.get('url'))}\n{content_key}".encode()).hexdigest()[:16]
+    return f"{state_slug(rfp.get('state'))}_{digest}"
+
+
+def dedup_keys(rfp, use_title=True):
+    """
+    Keys under which the same solicitation can show up again with a different URL
+    or number spelling. use_title=False leaves out the title key, for RFPs whose
+    title may be a site-wide heading rather than the solicitation's own.
+    """
+    keys = [('id', rfp['id'])]
+    state = state_slug(rfp.get('state'))
+    number = normalize_rfp_number(rfp.get('rfp_number'))
+    if number:
+        keys.append(('number', state, number))
+    title = normalize_title(rfp.get('title'))
+    placeholder = normalize_title(PLACEHOLDER_TITLE.format(state=rfp.get('state')))
+    if use_title and len(title) >= MIN_TITLE_KEY_LENGTH and title != placeholder:
+        keys.append(('title', state, title))
+    return keys
+
+
+class RFPDedupIndex:
+    """
+    Maps every dedup key of the known RFPs to the id of the first RFP seen with
+    it. A candidate RFP is a duplicate if its id or its normalized RFP number
+    is already known; a candidate without a number is also matched on its
+    normalized title, as long as that title is specific enough.
+    """
+
+    def __init__(self, rfps=()):
+        self.lock = threading.Lock()
+        self.keys = {}
+        for rfp in rfps:
+            self._add(rfp)
+
+    def _find(self, rfp, use_title=True):
+        for key in dedup_keys(rfp, use_title):
+            if key[0] == 'title' and normalize_rfp_number(rfp.get('rfp_number')):
+                # Distinct numbers under a shared heading are distinct solicitations
+                continue
+            existing = self.keys.get(key)
+            if existing is not None:
+                return existing
+        return None
+
+    def _add(self, rfp, use_title=True):
+        for key in dedup_keys(rfp, use_title):
+            self.keys.setdefault(key, rfp['id'])
+
+    def find(self, rfp):
+        """Id of the known RFP this one duplicates, or None."""
+        with self.lock:
+            return self._find(rfp)
+
+    def claim(self, rfp, use_title=True):
+        """
+        Register rfp unless it duplicates a known one. Returns True if it is new.
+        With use_title=False its title is neither matched nor registered.
+        """
+        with self.lock:
+            if self._find(rfp, use_title) is not None:
+                return False
+            self._add(rfp, use_title)
+            return True
+
+
+def collapse_duplicates(rfps):
+    """
+    Re-key RFPs (oldest first) with rfp_id() and drop later duplicates of the
+    same solicitation. Returns (kept RFPs with their new ids, ids to delete).
+    """
+    index = RFPDedupIndex()
+    kept = []
+    delete_ids = set()
+    for rfp in rfps:
+        old_id = rfp['id']
+        rfp = dict(rfp, id=rfp_id(rfp))
+        if old_id != rfp['id']:
+            delete_ids.add(old_id)
+        if index.claim(rfp):
+            kept.append(rfp)
+    delete_ids -= {rfp['id'] for rfp in kept}
+    return kept, delete_ids
+
+
+def migrate_rfp_ids(store):
+    """
+    One-shot move of a store to the current id scheme, collapsing duplicates
+    left behind by the old per-process hash() ids. Returns the number removed.
+    """
+    if store.get_meta('id_scheme') == ID_SCHEME_VERSION:
+        return 0
+
+    rfps = store.get_all_rfps()
+    kept, delete_ids = collapse_duplicates(rfps)
+    store.rewrite_rfps(kept, delete_ids, {'id_scheme': ID_SCHEME_VERSION})
+    removed = len(rfps) - len(kept)
+    logger.info(f"Re-keyed {len(kept)} RFPs to stable ids and removed {removed} duplicates")
+    return removed
@@ -0,0 +1,170 @@
+import bisect
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from rfp_store import parse_found_date
+
+
+class ReadWriteLock:
+    """Lock allowing many concurrent readers or one writer; waiting writers block new readers."""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read_lock(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write_lock(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class _SortedRFPs:
+    """RFPs kept in ascending found-date order alongside their epoch timestamps."""
+
+    def __init__(self):
+        self.timestamps = []
+        self.rfps = []
+
+    def insert(self, timestamp, rfp):
+        # Scans append newer RFPs, so this is almost always an O(1) append
+        position = bisect.bisect_right(self.timestamps, timestamp)
+        self.timestamps.insert(position, timestamp)
+        self.rfps.insert(position, rfp)
+
+    def replace(self, timestamp, rfp):
+        position = bisect.bisect_left(self.timestamps, timestamp)
+        while position < len(self.rfps) and self.timestamps[position] == timestamp:
+            if self.rfps[position]['id'] == rfp['id']:
+                self.rfps[position] = rfp
+                return
+            position += 1
+
+    def newer_than(self, timestamp):
+        """RFPs strictly newer than timestamp, newest first."""
+        position = bisect.bisect_right(self.timestamps, timestamp)
+        return self.rfps[:position - 1:-1] if position else self.rfps[::-1]
+
+
+class RFPIndex:
+    """
+    In-memory RFP index ordered by parsed found_date, with secondary indexes
+    by state and keyword. Scans add results incrementally under a write lock;
+    API reads take the read lock, so a time-window query is a bisect plus a
+    slice rather than a full parse-and-sort.
+    """
+
+    def __init__(self, rfps=(), timestamps=None):
+        self.lock = ReadWriteLock()
+        self._all = _SortedRFPs()
+        self._by_state = {}
+        self._by_keyword = {}
+        self._timestamps = {}  # id -> timestamp
+        self.add(rfps, timestamps)
+
+    def __len__(self):
+        with self.lock.read_lock():
+            return len(self._timestamps)
+
+    def _timestamp(self, rfp):
+        found = parse_found_date(rfp.get('found_date')) or datetime.now()
+        return found.timestamp()
+
+    def add(self, rfps, timestamps=None):
+        """
+        Add new RFPs, or replace the stored copy of ones already indexed.
+        timestamps, when given, are the RFPs' pre-parsed found_date epochs.
+        """
+        with self.lock.write_lock():
+            for position, rfp in enumerate(rfps):
+                timestamp = self._timestamps.get(rfp['id'])
+                if timestamp is not None:
+                    self._replace(timestamp, rfp)
+                    continue
+
+                timestamp = timestamps[position] if timestamps is not None else self._timestamp(rfp)
+                self._timestamps[rfp['id']] = timestamp
+                self._all.insert(timestamp, rfp)
+                self._by_state.setdefault(rfp.get('state'), _SortedRFPs()).insert(timestamp, rfp)
+                for keyword in rfp.get('keywords_found', []):
+                    self._by_keyword.setdefault(keyword, _SortedRFPs()).insert(timestamp, rfp)
+
+    def _replace(self, timestamp, rfp):
+        old = self._find(timestamp, rfp['id'])
+        self._all.replace(timestamp, rfp)
+        if old is not None and (old.get('state') != rfp.get('state')
+                                or old.get('keywords_found') != rfp.get('keywords_found')):
+            # Secondary keys changed: rebuild those indexes from the main ordering
+            self._rebuild_secondary()
+        else:
+            self._by_state[rfp.get('state')].replace(timestamp, rfp)
+            for keyword in rfp.get('keywords_found', []):
+                self._by_keyword[keyword].replace(timestamp, rfp)
+
+    def _find(self, timestamp, rfp_id):
+        position = bisect.bisect_left(self._all.timestamps, timestamp)
+        while position < len(self._all.rfps) and self._all.timestamps[position] == timestamp:
+            if self._all.rfps[position]['id'] == rfp_id:
+                return self._all.rfps[position]
+            position += 1
+        return None
+
+    def _rebuild_secondary(self):
+        self._by_state = {}
+        self._by_keyword = {}
+        for timestamp, rfp in zip(self._all.timestamps, self._all.rfps):
+            self._by_state.setdefault(rfp.get('state'), _SortedRFPs()).insert(timestamp, rfp)
+            for keyword in rfp.get('keywords_found', []):
+                self._by_keyword.setdefault(keyword, _SortedRFPs()).insert(timestamp, rfp)
+
+    def recent(self, cutoff, state=None, keyword=None):
+        """RFPs found after a naive datetime cutoff, newest first, optionally filtered by state and keyword."""
+        timestamp = cutoff.timestamp()
+        with self.lock.read_lock():
+            if state is not None and keyword is not None:
+                candidates = self._by_state.get(state)
+                if candidates is None:
+                    return []
+                return [rfp for rfp in candidates.newer_than(timestamp) if keyword in rfp.get('keywords_found', [])]
+            if state is not None:
+                candidates = self._by_state.get(state)
+            elif keyword is not None:
+                candidates = self._by_keyword.get(keyword)
+            else:
+                candidates = self._all
+            return candidates.newer_than(timestamp) if candidates is not None else []
+
+    def ids(self):
+        with self.lock.read_lock():
+            return set(self._timestamps)
+
+    def all(self):
+        """Every RFP oldest first, with the found_date epochs, e.g. to build another index from."""
+        with self.lock.read_lock():
+            return list(self._all.rfps), list(self._all.timestamps)
@@ -0,0 +1,335 @@
+import base64
+import bisect
+import json
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from itertools import chain
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from rfp_index import ReadWriteLock
+from rfp_store import parse_found_date
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Term weight per field; a term's weight in an RFP is the sum over the fields it appears in
+FIELD_WEIGHTS = {
+    'rfp_number': 4.0,
+    'title': 3.0,
+    'keywords_found': 2.0,
+    'state': 2.0,
+    'description': 1.0,
+}
+SATURATION = 1.2  # BM25 k1: repeats of a term count for less and less
+PREFIX_MIN_CHARS = 2
+PREFIX_TERMS = 50
+CACHED_QUERIES = 64
+SPARSE_MATCHES = 16  # below 1/16th of the RFPs, sort the matches by date instead of walking the date order
+SORTS = ('relevance', 'date')
+
+
+class InvalidCursorError(ValueError):
+    """A pagination cursor that doesn't decode, or belongs to another sort order."""
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text or '').lower())
+
+
+@lru_cache(maxsize=4096)
+def _term_counts(text):
+    # States, keyword lists and generated descriptions repeat across many RFPs
+    return tuple(Counter(tokenize(text)).items())
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise InvalidCursorError(f"Malformed cursor {cursor!r}")
+    # Relevance cursors are (-score, -timestamp, id), date cursors (timestamp, id)
+    numbers = 2 if sort == 'relevance' else 1
+    if (not isinstance(key, list) or len(key) != numbers + 1 or not isinstance(key[-1], str)
+            or not all(isinstance(value, (int, float)) for value in key[:-1])):
+        raise InvalidCursorError(f"Cursor {cursor!r} is not a {sort} cursor")
+    return tuple(key)
+
+
+class _Matches:
+    """One query's matching docnos (None for all), facet counts and, once needed, relevance order and scores."""
+
+    def __init__(self, docs, total, facets, expansions):
+        self.docs = docs
+        self.total = total
+        self.facets = facets
+        self.expansions = expansions
+        self.ranked = None
+
+
+class SearchIndex:
+    """
+    Inverted index over RFP title, description, keywords, state and RFP
+    number, updated incrementally as scans add RFPs.
+
+    Every query term must match (the last one also as a prefix, for
+    search-as-you-type); matches are ranked by a BM25-style score over
+    field-weighted term counts, newest first on ties. Facet counts by state and
+    keyword are computed over the other filters, so picking a state still shows
+    what the other states hold. Pages are addressed by a cursor holding the
+    last result's sort key rather than an offset, so results added between two
+    page requests don't shift the next page; ranked matches are cached per
+    query until the index changes.
+    """
+
+    def __init__(self, rfps=(), timestamps=None):
+        self.lock = ReadWriteLock()
+        self.version = 0
+        self._rfps = []         # docno -> RFP
+        self._timestamps = []   # docno -> found_date epoch
+        self._doc_terms = []    # docno -> {term: weight}
+        self._ids = []          # docno -> id
+        self._states = []       # docno -> state
+        self._keywords = []     # docno -> keywords_found
+        self._docnos = {}       # id -> docno
+        self._postings = {}     # term -> {docno: weight}
+        self._terms = []        # sorted vocabulary, for prefix expansion
+        self._by_state = {}     # state -> {docno}
+        self._by_keyword = {}   # keyword -> {docno}
+        self._dates = []        # ascending (timestamp, id, docno)
+        self._cache = OrderedDict()  # (terms, filters) -> _Matches, for the current version
+        self._cache_lock = threading.Lock()
+        self.add(rfps, timestamps)
+
+    def __len__(self):
+        with self.lock.read_lock():
+            return len(self._rfps)
+
+    def _term_weights(self, rfp):
+        counts = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            value = rfp.get(field)
+            text = ' '.join(value) if isinstance(value, list) else value
+            if field == 'rfp_number' and text == 'N/A':
+                continue
+            for term, count in _term_counts(text):
+                counts[term] = counts.get(term, 0.0) + weight * count
+        return {term: count * (SATURATION + 1) / (count + SATURATION) for term, count in counts.items()}
+
+    def add(self, rfps, timestamps=None):
+        """
+        Index new RFPs, or reindex the stored copy of ones already indexed.
+        timestamps, when given, are the RFPs' pre-parsed found_date epochs.
+        """
+        with self.lock.write_lock():
+            new_terms = []
+            new_dates = []
+            for position, rfp in enumerate(rfps):
+                docno = self._docnos.get(rfp['id'])
+                if docno is None:
+                    docno = self._docnos[rfp['id']] = len(self._rfps)
+                    if timestamps is not None:
+                        timestamp = timestamps[position]
+                    else:
+                        timestamp = (parse_found_date(rfp.get('found_date')) or datetime.now()).timestamp()
+                    self._rfps.append(rfp)
+                    self._ids.append(rfp['id'])
+                    self._states.append(None)
+                    self._keywords.append(())
+                    self._timestamps.append(timestamp)
+                    self._doc_terms.append({})
+                    new_dates.append((timestamp, rfp['id'], docno))
+                else:
+                    self._unindex(docno)
+                    self._rfps[docno] = rfp
+                self._index(docno, rfp, new_terms)
+            # One sort merges the additions (a sorted run when loading) into the sorted lists
+            if new_terms:
+                self._terms.extend(new_terms)
+                self._terms.sort()
+            if new_dates:
+                self._dates.extend(new_dates)
+                self._dates.sort()
+            self.version += 1
+            with self._cache_lock:
+                self._cache.clear()
+
+    def _index(self, docno, rfp, new_terms):
+        terms = self._doc_terms[docno] = self._term_weights(rfp)
+        for term, weight in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                new_terms.append(term)
+            postings[docno] = weight
+        self._states[docno] = rfp.get('state')
+        self._keywords[docno] = tuple(dict.fromkeys(rfp.get('keywords_found', [])))
+        self._by_state.setdefault(self._states[docno], set()).add(docno)
+        for keyword in self._keywords[docno]:
+            self._by_keyword.setdefault(keyword, set()).add(docno)
+
+    def _unindex(self, docno):
+        for term in self._doc_terms[docno]:
+            # Terms left without postings stay in the vocabulary; they just match nothing
+            del self._postings[term][docno]
+        self._by_state[self._states[docno]].discard(docno)
+        for keyword in self._keywords[docno]:
+            self._by_keyword[keyword].discard(docno)
+
+    def _expand(self, term, prefix):
+        """Postings for a query term: the exact term, plus completions of it if prefix."""
+        matches = [self._postings[term]] if term in self._postings else []
+        if prefix and len(term) >= PREFIX_MIN_CHARS:
+            position = bisect.bisect_right(self._terms, term)
+            for candidate in self._terms[position:position + PREFIX_TERMS]:
+                if not candidate.startswith(term):
+                    break
+                matches.append(self._postings[candidate])
+        return [postings for postings in matches if postings]
+
+    def _idf(self, postings):
+        return math.log(1 + (len(self._rfps) - len(postings) + 0.5) / (len(postings) + 0.5))
+
+    def search(self, query='', state=None, keyword=None, days=None, sort='relevance', limit=20, cursor=None):
+        """
+        One page of RFPs matching query, optionally filtered by state, keyword
+        and found within the last days. Returns the page, the total match
+        count, facet counts and the cursor of the next page (None on the last).
+        Without a query, results are newest first whatever the sort.
+        """
+        if sort not in SORTS:
+            raise ValueError(f"Unknown sort {sort!r}; expected one of {', '.join(SORTS)}")
+        terms = tuple(dict.fromkeys(tokenize(query)))
+        if not terms:
+            sort = 'date'
+        after = decode_cursor(cursor, sort) if cursor else None
+        # Minute resolution keeps a days filter cacheable without drifting far
+        cutoff = (datetime.now() - timedelta(days=days)).replace(second=0, microsecond=0) if days else None
+
+        with self.lock.read_lock():
+            cache_key = (terms, state, keyword, cutoff)
+            with self._cache_lock:
+                matches = self._cache.get(cache_key)
+            if matches is None:
+                matches = self._match(terms, state, keyword, cutoff)
+                with self._cache_lock:
+                    self._cache[cache_key] = matches
+                    if len(self._cache) > CACHED_QUERIES:
+                        self._cache.popitem(last=False)
+
+            if sort == 'date':
+                page, more = self._date_page(matches.docs, after, limit)
+                keys = [(self._timestamps[docno], self._ids[docno]) for docno in page[-1:]]
+            else:
+                if matches.ranked is None:
+                    matches.ranked = self._rank(matches.docs, matches.expansions)
+                ranked, scores = matches.ranked
+                position = 0
+                if after:
+                    position = bisect.bisect_right(ranked, after, key=lambda docno: self._relevance_key(docno, scores))
+                page = ranked[position:position + limit]
+                keys = [self._relevance_key(docno, scores) for docno in page[-1:]]
+                more = position + limit < len(ranked)
+            rfps = [self._rfps[docno] for docno in page]
+
+        return {
+            'rfps': rfps,
+            'total': matches.total,
+            'facets': matches.facets,
+            'next_cursor': encode_cursor(keys[0]) if more else None,
+        }
+
+    def _match(self, terms, state, keyword, cutoff):
+        # Per query term, the postings of every term it matches
+        expansions = [self._expand(term, prefix=index == len(terms) - 1) for index, term in enumerate(terms)]
+
+        # Restricting sets; None means no restriction
+        text = None
+        for postings_list in sorted(expansions, key=lambda p: sum(map(len, p))):
+            docs = set().union(*postings_list)
+            text = docs if text is None else text & docs
+        recent = None
+        if cutoff is not None:
+            position = bisect.bisect_right(self._dates, (cutoff.timestamp(), '\uffff'))
+            recent = {docno for _, _, docno in self._dates[position:]}
+        state_docs = self._by_state.get(state, set()) if state is not None else None
+        keyword_docs = self._by_keyword.get(keyword, set()) if keyword is not None else None
+
+        facets = {
+            'state': self._facet(self._by_state, [text, recent, keyword_docs], lambda docs: map(self._states.__getitem__, docs)),
+            'keyword': self._facet(self._by_keyword, [text, recent, state_docs],
+                                   lambda docs: chain.from_iterable(map(self._keywords.__getitem__, docs))),
+        }
+        docs = _intersect([text, recent, state_docs, keyword_docs])
+        total = len(self._rfps) if docs is None else len(docs)
+        return _Matches(docs, total, facets, expansions)
+
+    def _date_page(self, docs, after, limit):
+        """Matching docnos newest first, starting after the (timestamp, id) cursor; and whether more follow."""
+        end = bisect.bisect_left(self._dates, after) if after else len(self._dates)
+        if docs is None:
+            start = max(0, end - limit)
+            return [docno for _, _, docno in reversed(self._dates[start:end])], start > 0
+        if len(docs) * SPARSE_MATCHES < end:
+            # Few matches: sorting them beats walking the whole date order
+            dated = sorted((self._timestamps[docno], self._ids[docno], docno) for docno in docs)
+            end = bisect.bisect_left(dated, after) if after else len(dated)
+            start = max(0, end - limit)
+            return [docno for _, _, docno in reversed(dated[start:end])], start > 0
+
+        page = []
+        for position in range(end - 1, -1, -1):
+            docno = self._dates[position][2]
+            if docno in docs:
+                if len(page) == limit:
+                    return page, True
+                page.append(docno)
+        return page, False
+
+    def _rank(self, docs, expansions):
+        """Docnos of the matches, best score first, then newest, then by id."""
+        scores = dict.fromkeys(range(len(self._rfps)) if docs is None else docs, 0.0)
+        if len(expansions) == 1 and len(expansions[0]) == 1:
+            # One exact term: its weight alone gives the same order
+            postings = expansions[0][0]
+            scores = postings if len(scores) == len(postings) else {docno: postings[docno] for docno in scores}
+            expansions = []
+        for postings_list in expansions:
+            weighted = [(self._idf(postings), postings) for postings in postings_list]
+            if len(weighted) == 1:
+                idf, postings = weighted[0]
+                for docno in scores:
+                    scores[docno] += idf * postings[docno]
+            else:
+                # A prefix term scores as its best completion in the RFP
+                for docno in scores:
+                    scores[docno] += max(idf * postings.get(docno, 0.0) for idf, postings in weighted)
+        # Stable sorts from the last tie-breaker to the first, all with C-level keys
+        ranked = sorted(scores, key=self._ids.__getitem__)
+        ranked.sort(key=self._timestamps.__getitem__, reverse=True)
+        ranked.sort(key=scores.__getitem__, reverse=True)
+        return ranked, scores
+
+    def _relevance_key(self, docno, scores):
+        return -scores[docno], -self._timestamps[docno], self._ids[docno]
+
+    def _facet(self, index, restrictions, values_of):
+        """Counts per value of a facet over the docs left by restrictions, largest first."""
+        docs = _intersect(restrictions)
+        if docs is None:
+            counts = {value: len(value_docs) for value, value_docs in index.items() if value_docs}
+        else:
+            counts = Counter(values_of(docs))
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], str(item[0]))))
+
+
+def _intersect(sets):
+    result = None
+    for docs in sorted((docs for docs in sets if docs is not None), key=len):
+        result = docs if result is None else result & docs
+    return result
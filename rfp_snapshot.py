@@ -0,0 +1,70 @@
+import json
+import logging
+import os
+
+try:
+    import orjson
+except ImportError:  # Optional; the standard json module reads and writes the same files, more slowly
+    orjson = None
+
+from rfp_store import RFP_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+def _dumps(document):
+    if orjson is not None:
+        return orjson.dumps(document)
+    return json.dumps(document, separators=(',', ':')).encode('utf-8')
+
+
+def _loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def save_snapshot(path, rfps, timestamps, header):
+    """
+    Write RFPs (oldest first) and their found_date epochs to path, with a
+    header identifying the store state they match. Rows are stored as value
+    lists under one column list rather than as repeated key/value objects. The
+    file is written beside path and renamed over it, so readers never see a
+    partial snapshot.
+    """
+    document = dict(header, version=SNAPSHOT_VERSION, columns=RFP_COLUMNS, found_ts=timestamps,
+                    rows=[[rfp.get(column) for column in RFP_COLUMNS] for rfp in rfps])
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_dumps(document))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_snapshot(path):
+    """
+    Read a snapshot written by save_snapshot. Returns (rfps, timestamps, header),
+    or None if there is no usable snapshot at path.
+    """
+    try:
+        with open(path, 'rb') as f:
+            document = _loads(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable RFP snapshot {path}: {e}")
+        return None
+    if not isinstance(document, dict) or document.get('version') != SNAPSHOT_VERSION:
+        return None
+
+    columns = document.pop('columns')
+    rfps = [dict(zip(columns, row)) for row in document.pop('rows')]
+    timestamps = document.pop('found_ts')
+    return rfps, timestamps, document
@@ -0,0 +1,306 @@
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+RFP_COLUMNS = ('id', 'rfp_number', 'title', 'state', 'source', 'url', 'found_date',
+               'keywords_found', 'status', 'description')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rfps (
+    id TEXT PRIMARY KEY,
+    rfp_number TEXT,
+    title TEXT,
+    state TEXT,
+    source TEXT,
+    url TEXT,
+    found_date TEXT,
+    found_ts REAL NOT NULL,
+    keywords_found TEXT,
+    status TEXT,
+    description TEXT,
+    change_seq INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_rfps_state ON rfps (state);
+CREATE INDEX IF NOT EXISTS idx_rfps_found_ts ON rfps (found_ts);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def parse_found_date(value):
+    """Parse a stored found_date into a naive datetime, as get_recent_rfps compares them."""
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    except (AttributeError, ValueError):
+        return None
+
+
+class SQLiteRFPStore:
+    """
+    Indexed RFP repository on SQLite in WAL mode.
+
+    RFPs are upserted by id and kept indefinitely; found_date is mirrored into
+    an indexed epoch column so time-window queries are range scans. Every
+    insert or actual change of an RFP stamps it with the next change sequence
+    number, from a counter in ``meta`` that never goes back even when RFPs are
+    deleted, so exports can pick up only what changed since a cursor. Scan stats
+    and other small documents live in a JSON key/value ``meta`` table. Each
+    thread gets its own connection so the web workers can read while the
+    scanner writes, and several worker processes can share one database file.
+    """
+
+    def __init__(self, db_file='rfps.db'):
+        self.db_file = db_file
+        self.local = threading.local()
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+            if 'change_seq' not in self._columns(conn):
+                conn.execute('BEGIN IMMEDIATE')
+                if 'change_seq' not in self._columns(conn): # Another worker may have migrated it meanwhile
+                    # Databases from before change tracking: number existing RFPs in insertion order
+                    conn.execute('ALTER TABLE rfps ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0')
+                    conn.execute('UPDATE rfps SET change_seq = rowid')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_rfps_change_seq ON rfps (change_seq)')
+            if self.get_meta('change_seq') is None:
+                # Start the counter after the numbers already handed out
+                last_seq = conn.execute('SELECT COALESCE(MAX(change_seq), 0) FROM rfps').fetchone()[0]
+                conn.execute('INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)', ('change_seq', json.dumps(last_seq)))
+
+    def _columns(self, conn):
+        return {row[1] for row in conn.execute('PRAGMA table_info(rfps)')}
+
+    def connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+        return conn
+
+    def _row_to_rfp(self, row):
+        rfp = {column: row[column] for column in RFP_COLUMNS}
+        rfp['keywords_found'] = json.loads(rfp['keywords_found'] or '[]')
+        return rfp
+
+    def _upsert(self, conn, rfps):
+        # Callers hold the write lock (BEGIN IMMEDIATE), so no other writer can take the same numbers
+        seq = self.last_change_seq()
+        rows = []
+        for rfp in rfps:
+            seq += 1
+            found = parse_found_date(rfp.get('found_date'))
+            if found is None:
+                found = datetime.now()
+                rfp['found_date'] = found.isoformat()
+            rows.append((
+                rfp['id'], rfp.get('rfp_number'), rfp.get('title'), rfp.get('state'),
+                rfp.get('source'), rfp.get('url'), rfp['found_date'], found.timestamp(),
+                json.dumps(rfp.get('keywords_found', [])), rfp.get('status'), rfp.get('description'), seq,
+            ))
+
+        # Re-upserting an unchanged RFP leaves it (and its change_seq) alone
+        conn.executemany("""
+            INSERT INTO rfps (id, rfp_number, title, state, source, url, found_date, found_ts,
+                              keywords_found, status, description, change_seq)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                rfp_number = excluded.rfp_number,
+                title = excluded.title,
+                state = excluded.state,
+                source = excluded.source,
+                url = excluded.url,
+                keywords_found = excluded.keywords_found,
+                status = excluded.status,
+                description = excluded.description,
+                change_seq = excluded.change_seq
+            WHERE rfps.rfp_number IS NOT excluded.rfp_number
+                OR rfps.title IS NOT excluded.title
+                OR rfps.state IS NOT excluded.state
+                OR rfps.source IS NOT excluded.source
+                OR rfps.url IS NOT excluded.url
+                OR rfps.keywords_found IS NOT excluded.keywords_found
+                OR rfps.status IS NOT excluded.status
+                OR rfps.description IS NOT excluded.description
+        """, rows)
+        self._set_meta(conn, 'change_seq', seq)
+        return len(rows)
+
+    def upsert_rfps(self, rfps, meta=None):
+        """
+        Insert new RFPs and update existing ones, together with any ``meta``
+        key/values, in a single transaction.
+        """
+        with self.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            count = self._upsert(conn, rfps)
+            for key, value in (meta or {}).items():
+                self._set_meta(conn, key, value)
+        return count
+
+    def rewrite_rfps(self, rfps, delete_ids, meta=None):
+        """Delete RFPs by id and upsert others (e.g. re-keyed ones) in a single transaction."""
+        with self.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany('DELETE FROM rfps WHERE id = ?', [(rfp_id,) for rfp_id in delete_ids])
+            count = self._upsert(conn, rfps)
+            for key, value in (meta or {}).items():
+                self._set_meta(conn, key, value)
+        return count
+
+    def count(self):
+        return self.connection().execute('SELECT COUNT(*) FROM rfps').fetchone()[0]
+
+    def get_all_rfps(self):
+        rows = self.connection().execute('SELECT * FROM rfps ORDER BY found_ts')
+        return [self._row_to_rfp(row) for row in rows]
+
+    def load_rfps(self):
+        """
+        Every RFP oldest first, with their found_ts epochs and the highest
+        change_seq among them, from one consistent read; for building the
+        in-memory indexes at startup.
+        """
+        cursor = self.connection().cursor()
+        cursor.row_factory = None  # plain tuples; much cheaper than sqlite3.Row for every record
+        cursor.execute(f"SELECT change_seq, found_ts, {', '.join(RFP_COLUMNS)} FROM rfps ORDER BY found_ts")
+        rfps = []
+        timestamps = []
+        change_seq = 0
+        for row in cursor:
+            rfp = dict(zip(RFP_COLUMNS, row[2:]))
+            rfp['keywords_found'] = json.loads(rfp['keywords_found'] or '[]')
+            rfps.append(rfp)
+            timestamps.append(row[1])
+            change_seq = max(change_seq, row[0])
+        return rfps, timestamps, change_seq
+
+    def last_change_seq(self):
+        """The last change sequence number handed out."""
+        return self.get_meta('change_seq', 0)
+
+    def iter_changes(self, after_seq=0, until_seq=None, since=None, state=None, batch_size=500):
+        """
+        (change_seq, rfp) for RFPs inserted or changed after after_seq (and up to
+        until_seq), oldest change first, optionally only those found after a naive
+        datetime since or in one state. Rows are read in batches keyed on
+        change_seq, so memory use is flat and no read transaction stays open
+        while the caller consumes them.
+        """
+        conditions = ['change_seq > ?']
+        params = []
+        if until_seq is not None:
+            conditions.append('change_seq <= ?')
+            params.append(until_seq)
+        if since is not None:
+            conditions.append('found_ts > ?')
+            params.append(since.timestamp())
+        if state:
+            conditions.append('state = ?')
+            params.append(state)
+        query = f"SELECT * FROM rfps WHERE {' AND '.join(conditions)} ORDER BY change_seq LIMIT ?"
+
+        while True:
+            rows = self.connection().execute(query, [after_seq, *params, batch_size]).fetchall()
+            for row in rows:
+                yield row['change_seq'], self._row_to_rfp(row)
+            if len(rows) < batch_size:
+                return
+            after_seq = rows[-1]['change_seq']
+
+    def get_meta(self, key, default=None):
+        row = self.connection().execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, conn, key, value):
+        conn.execute(
+            'INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+            (key, json.dumps(value)),
+        )
+
+    def set_meta(self, key, value):
+        with self.connection() as conn:
+            self._set_meta(conn, key, value)
+
+    def update_meta(self, key, update, default=None, also=None):
+        """
+        Atomically replace a meta value with update(old value), across processes.
+        also(old value) may return further meta key/values to write in the same
+        transaction. Returns the old value.
+        """
+        conn = self.connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+            old = json.loads(row[0]) if row else default
+            self._set_meta(conn, key, update(old))
+            for other_key, value in (also(old) if also is not None else {}).items():
+                self._set_meta(conn, other_key, value)
+        return old
+
+    def delete_meta(self, key):
+        with self.connection() as conn:
+            conn.execute('DELETE FROM meta WHERE key = ?', (key,))
+
+    def get_legacy_visitors(self):
+        """Visitor ids from the per-visitor table used before visitor_counter.py, if it is still there."""
+        conn = self.connection()
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'visitors'").fetchone():
+            return []
+        return [row[0] for row in conn.execute('SELECT id FROM visitors')]
+
+    def drop_legacy_visitors(self):
+        with self.connection() as conn:
+            conn.execute('DROP TABLE IF EXISTS visitors')
+
+
+def migrate_json_store(json_file, store):
+    """
+    One-shot import of a legacy rfps_data.json into the SQLite store. The JSON
+    file is renamed to ``<name>.migrated`` afterwards so it is only imported once.
+    Several worker processes may start at once: the import runs under the write
+    lock and records a ``json_migrated`` meta flag, so only the first one imports,
+    and a file another worker has already renamed counts as migrated.
+    Returns the number of RFPs imported.
+    """
+    try:
+        with open(json_file, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return 0
+
+    imported = 0
+    conn = store.connection()
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        if store.get_meta('json_migrated') is None:
+            imported = store._upsert(conn, data.get('rfps', []))
+            if store.get_meta('stats') is None and 'stats' in data:
+                store._set_meta(conn, 'stats', data['stats'])
+                store._set_meta(conn, 'last_updated', data.get('last_updated'))
+            store._set_meta(conn, 'json_migrated', os.path.basename(json_file))
+
+    try:
+        os.replace(json_file, json_file + '.migrated')
+    except FileNotFoundError:
+        pass # Renamed by another worker that got there first
+    if imported:
+        logger.info(f"Migrated {imported} RFPs from {json_file} into {store.db_file}")
+    return imported
+
+
+if __name__ == '__main__':
+    # Usage: python rfp_store.py [rfps_data.json] [rfps.db]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    json_path = sys.argv[1] if len(sys.argv) > 1 else 'rfps_data.json'
+    db_path = sys.argv[2] if len(sys.argv) > 2 else 'rfps.db'
+    print(f"Imported {migrate_json_store(json_path, SQLiteRFPStore(db_path))} RFPs into {db_path}")
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import time
+
+import aiohttp
+
+from body_stream import CHUNK_BYTES, BodyStream
+from http_cache import CachedResponse
+from scan_telemetry import FetchTiming
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncScanEngine:
+    """
+    Asyncio scan engine that fetches many sites over one pooled aiohttp session.
+
+    The connector enforces both the global concurrency limit and the per-host
+    limit, and keeps connections alive so sub-page fetches reuse the TLS
+    session opened for the landing page. Request tracing records the DNS,
+    connect and time-to-first-byte phases of every fetch in page.timing.
+    Bodies are streamed in chunks and read up to max_body_bytes.
+    """
+
+    def __init__(self, max_concurrency=20, per_host_limit=4, timeout=10, headers=None, cache=None,
+                 max_body_bytes=2 * 1024 * 1024):
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.cache = cache
+        self.max_body_bytes = max_body_bytes
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            limit_per_host=self.per_host_limit,
+            ttl_dns_cache=300,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            trace_configs=[self._trace_config()],
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        self.session = None
+
+    def _trace_config(self):
+        """
+        Trace hooks filling in the _FetchTrace passed as trace_request_ctx. Phases
+        add up across redirects; connect excludes the DNS lookup it triggers.
+        """
+        async def request_start(session, context, params):
+            context.trace_request_ctx.marks.setdefault('start', time.perf_counter())
+
+        async def dns_start(session, context, params):
+            context.trace_request_ctx.marks['dns'] = time.perf_counter()
+
+        async def dns_end(session, context, params):
+            trace = context.trace_request_ctx
+            trace.timing.dns_seconds = trace.dns + time.perf_counter() - trace.marks['dns']
+
+        async def dns_cache_hit(session, context, params):
+            trace = context.trace_request_ctx
+            trace.timing.dns_seconds = trace.dns
+
+        async def connect_start(session, context, params):
+            trace = context.trace_request_ctx
+            trace.marks['connect'] = time.perf_counter()
+            trace.marks['connect_dns'] = trace.dns
+
+        async def connect_end(session, context, params):
+            trace = context.trace_request_ctx
+            elapsed = time.perf_counter() - trace.marks['connect'] - (trace.dns - trace.marks['connect_dns'])
+            trace.timing.connect_seconds = trace.connect + elapsed
+
+        async def request_end(session, context, params):
+            trace = context.trace_request_ctx
+            trace.timing.ttfb_seconds = time.perf_counter() - trace.marks['start'] - trace.dns - trace.connect
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(request_start)
+        trace_config.on_dns_resolvehost_start.append(dns_start)
+        trace_config.on_dns_resolvehost_end.append(dns_end)
+        trace_config.on_dns_cache_hit.append(dns_cache_hit)
+        trace_config.on_connection_create_start.append(connect_start)
+        trace_config.on_connection_create_end.append(connect_end)
+        trace_config.on_request_end.append(request_end)
+        return trace_config
+
+    async def _read(self, url, response, timing, consume=None):
+        """Stream a body through a BodyStream; stops early at the size cap or when consume says so."""
+        started = time.perf_counter()
+        body = BodyStream(url, response.headers.get('Content-Type'), response.charset, self.max_body_bytes, consume)
+        async for chunk in response.content.iter_chunked(CHUNK_BYTES):
+            if body.feed(chunk):
+                break
+        text = body.text()
+        timing.download_seconds = time.perf_counter() - started
+        timing.stop_reason = body.stop_reason
+        return text
+
+    async def fetch_page(self, url, timeout=None, consume=None):
+        """
+        Conditional GET through the HTTP cache. Returns a CachedResponse whose
+        ``unchanged`` flag is set on a 304 or when the body hash is the same.
+        ``timeout`` (seconds) overrides the session's for this request; decoded
+        body chunks are passed to ``consume``, which can end the download by
+        returning True. Non-HTML responses raise UnsupportedContentError.
+        """
+        trace = _FetchTrace()
+        timing = trace.timing
+        headers = self.cache.conditional_headers(url) if self.cache is not None else {}
+        options = {'timeout': aiohttp.ClientTimeout(total=timeout)} if timeout else {}
+        async with self.session.get(url, headers=headers, allow_redirects=True, trace_request_ctx=trace, **options) as response:
+            if response.status == 304 and self.cache is not None:
+                page = self.cache.not_modified(url)
+            else:
+                response.raise_for_status()
+                text = await self._read(url, response, timing, consume)
+                if self.cache is None:
+                    page = CachedResponse(None, url, text=text, size=len(text))
+                else:
+                    page = self.cache.store(url, response.headers, text, truncated=timing.stop_reason is not None)
+
+        timing.fetch_bytes = page.size
+        page.timing = timing
+        return page
+
+    async def _scan(self, sites, scrape):
+        async with self:
+            results = await asyncio.gather(
+                *(scrape(site, self) for site in sites),
+                return_exceptions=True,
+            )
+
+        new_rfps = []
+        for site, result in zip(sites, results):
+            if isinstance(result, Exception):
+                logger.error(f"Scan task for {site['name']} raised an exception: {result}")
+            elif result:
+                new_rfps.extend(result)
+        return new_rfps
+
+    def run(self, sites, scrape):
+        """
+        Run ``scrape(site, engine)`` for every site on a fresh event loop and
+        return the combined list of new RFPs.
+        """
+        return asyncio.run(self._scan(sites, scrape))
+
+
+class _FetchTrace:
+    """Per-request scratch space for the trace hooks."""
+
+    def __init__(self):
+        self.timing = FetchTiming()
+        self.marks = {}
+
+    @property
+    def dns(self):
+        return self.timing.dns_seconds or 0.0
+
+    @property
+    def connect(self):
+        return self.timing.connect_seconds or 0.0
@@ -0,0 +1,189 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def new_job_id():
+    return uuid.uuid4().hex[:12]
+
+
+class NullProgress:
+    """Progress sink used when a scan isn't running as a job."""
+
+    def site_started(self, site):
+        pass
+
+    def site_finished(self, site, new_rfps=None, error=None):
+        pass
+
+
+class ScanJob:
+    """One scan run, with per-site progress that the scan engines report into."""
+
+    def __init__(self, trigger, sites, job_id=None):
+        self.id = job_id or new_job_id()
+        self.trigger = trigger
+        self.status = 'queued'
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.duration = None
+        self.error = None
+        self.new_rfps = []
+        self.scan_sites = list(sites)
+        self.lock = threading.Lock()
+        self.sites = OrderedDict(
+            (site['name'], {'state': site['state'], 'status': 'pending', 'duration': None, 'new_rfps': 0})
+            for site in sites
+        )
+        self._site_started = {}
+
+    def covers(self, sites):
+        """Whether this job scans every one of sites."""
+        return all(site['name'] in self.sites for site in sites)
+
+    def add_sites(self, sites):
+        """Add sites to a job that hasn't started yet."""
+        with self.lock:
+            for site in sites:
+                if site['name'] not in self.sites:
+                    self.scan_sites.append(site)
+                    self.sites[site['name']] = {'state': site['state'], 'status': 'pending', 'duration': None, 'new_rfps': 0}
+
+    def site_started(self, site):
+        with self.lock:
+            self._site_started[site['name']] = time.time()
+            self.sites.setdefault(site['name'], {'state': site['state']})['status'] = 'running'
+
+    def site_finished(self, site, new_rfps=None, error=None):
+        with self.lock:
+            started = self._site_started.pop(site['name'], None)
+            entry = self.sites.setdefault(site['name'], {'state': site['state']})
+            entry['status'] = 'error' if error else 'done'
+            entry['duration'] = round(time.time() - started, 2) if started else None
+            entry['new_rfps'] = len(new_rfps or [])
+            if error:
+                entry['error'] = str(error)
+
+    def to_dict(self, include_sites=True):
+        with self.lock:
+            sites_done = sum(1 for entry in self.sites.values() if entry['status'] in ('done', 'error'))
+            data = {
+                'id': self.id,
+                'trigger': self.trigger,
+                'status': self.status,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'duration': self.duration,
+                'error': self.error,
+                'sites_total': len(self.sites),
+                'sites_done': sites_done,
+                'new_rfps': list(self.new_rfps),
+            }
+            if include_sites:
+                data['sites'] = {name: dict(entry) for name, entry in self.sites.items()}
+            return data
+
+
+class ScanJobManager:
+    """
+    Runs scans as background jobs, one at a time. Submitting while a scan is
+    in flight returns the running job instead of starting an overlapping one
+    when it covers the requested sites; otherwise the sites are queued in a
+    job that starts once the running one finishes. A bounded history of
+    finished jobs is kept for status lookups.
+
+    Jobs requested by other worker processes arrive with their own ids; when
+    such a request attaches to the running job, its id is kept as an alias.
+    """
+
+    def __init__(self, run_scan, get_sites, history=20):
+        self.run_scan = run_scan  # run_scan(progress=job, sites=...) -> list of new RFPs
+        self.get_sites = get_sites
+        self.history = history
+        self.lock = threading.Lock()
+        self.jobs = OrderedDict()
+        self.aliases = OrderedDict()  # requested job id -> id of the job it attached to
+        self.current = None
+        self.queued = None  # Starts when the current job finishes
+
+    def _attach(self, job, job_id):
+        if job_id is not None:
+            self.aliases[job_id] = job.id
+            while len(self.aliases) > self.history:
+                self.aliases.popitem(last=False)
+        return job, False
+
+    def _add(self, job):
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.history:
+            self.jobs.popitem(last=False)
+        return job
+
+    def submit(self, trigger='manual', sites=None, job_id=None, queue=True):
+        """
+        Start a scan job over sites (default: all of them), or attach to the
+        running one if it covers them. Otherwise, with ``queue``, the sites go
+        into the queued job that runs next; without it the running job is
+        returned. Returns (job, created).
+        """
+        sites = sites or self.get_sites()
+        with self.lock:
+            if self.current is not None:
+                if not queue or self.current.covers(sites):
+                    return self._attach(self.current, job_id)
+                if self.queued is not None:
+                    self.queued.add_sites(sites)
+                    return self._attach(self.queued, job_id)
+                self.queued = self._add(ScanJob(trigger, sites, job_id))
+                return self.queued, True
+
+            job = self.current = self._add(ScanJob(trigger, sites, job_id))
+
+        self._start(job)
+        return job, True
+
+    def _start(self, job):
+        threading.Thread(target=self._run, args=(job,), name=f"scan-{job.id}", daemon=True).start()
+
+    def _run(self, job):
+        start_time = time.time()
+        with job.lock:
+            job.status = 'running'
+            job.started_at = datetime.now().isoformat()
+        try:
+            new_rfps = self.run_scan(progress=job, sites=job.scan_sites)
+            with job.lock:
+                job.new_rfps = new_rfps
+                job.status = 'completed'
+        except Exception as e:
+            logger.error(f"Scan job {job.id} failed: {e}")
+            with job.lock:
+                job.status = 'failed'
+                job.error = str(e)
+        finally:
+            with job.lock:
+                job.finished_at = datetime.now().isoformat()
+                job.duration = round(time.time() - start_time, 2)
+            with self.lock:
+                self.current, self.queued = self.queued, None
+                next_job = self.current
+            if next_job is not None:
+                self._start(next_job)
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(self.aliases.get(job_id, job_id))
+
+    def snapshot(self):
+        """Status of every job in the history, for other worker processes to serve."""
+        with self.lock:
+            jobs = list(self.jobs.values())
+            aliases = dict(self.aliases)
+        return {'jobs': {job.id: job.to_dict() for job in jobs}, 'aliases': aliases}
@@ -0,0 +1,255 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+import aiohttp
+import requests
+
+SECONDS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTES_BUCKETS = (1024, 10 * 1024, 100 * 1024, 512 * 1024, 1024 * 1024, 5 * 1024 * 1024, 10 * 1024 * 1024)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50)
+
+# Metric name -> (histogram buckets, help text)
+METRICS = {
+    'dns_seconds': (SECONDS_BUCKETS, 'DNS resolution time per fetch (async engine only)'),
+    'connect_seconds': (SECONDS_BUCKETS, 'TCP/TLS connect time per new connection (async engine only)'),
+    'ttfb_seconds': (SECONDS_BUCKETS, 'Time from sending a request to its response headers'),
+    'download_seconds': (SECONDS_BUCKETS, 'Time reading a response body'),
+    'fetch_bytes': (BYTES_BUCKETS, 'Response body size per fetch'),
+    'parse_seconds': (SECONDS_BUCKETS, 'Time parsing and keyword-matching a page'),
+    'site_seconds': (SECONDS_BUCKETS, 'Wall-clock time scanning a site, sub-pages included'),
+    'subpages': (COUNT_BUCKETS, 'Candidate sub-pages fetched per site scan'),
+}
+FETCH_PHASES = ('dns_seconds', 'connect_seconds', 'ttfb_seconds', 'download_seconds')
+
+
+class FetchTiming:
+    """Phase timings (seconds) and size of one fetch; phases an engine can't observe stay None."""
+
+    def __init__(self):
+        self.dns_seconds = None
+        self.connect_seconds = None
+        self.ttfb_seconds = None
+        self.download_seconds = None
+        self.fetch_bytes = 0
+        self.stop_reason = None  # 'early_stop' or 'size_cap' when the body wasn't read to the end
+
+
+def error_class(error):
+    """Coarse error class used as a metrics label: http_4xx, http_5xx, timeout, connection or the exception type."""
+    if getattr(error, 'error_class', None):
+        return error.error_class
+    status = getattr(error, 'status', None)
+    if status is None and isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        status = error.response.status_code
+    if status:
+        return f"http_{status // 100}xx"
+    if isinstance(error, (asyncio.TimeoutError, requests.exceptions.Timeout)):
+        return 'timeout'
+    if isinstance(error, (aiohttp.ClientConnectionError, requests.exceptions.ConnectionError)):
+        return 'connection'
+    return type(error).__name__
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class SiteMetrics:
+    """Rolling windows of recent observations for one site, plus cumulative counts and sums."""
+
+    def __init__(self, name, window, state=None):
+        state = state or {}
+        self.name = state.get('name', name)
+        self.windows = {metric: deque(state.get('windows', {}).get(metric, []), maxlen=window) for metric in METRICS}
+        self.counts = dict.fromkeys(METRICS, 0)
+        self.counts.update(state.get('counts', {}))
+        self.sums = dict.fromkeys(METRICS, 0.0)
+        self.sums.update(state.get('sums', {}))
+        self.fetches = dict({'landing': 0, 'subpage': 0}, **state.get('fetches', {}))
+        self.errors = dict(state.get('errors', {}))
+        self.stops = dict(state.get('stops', {}))
+        self.last_error = state.get('last_error')
+        self.pending_subpages = 0
+
+    def observe(self, metric, value):
+        self.windows[metric].append(round(value, 4))
+        self.counts[metric] += 1
+        self.sums[metric] += value
+
+    def to_state(self):
+        return {
+            'name': self.name,
+            'windows': {metric: list(values) for metric, values in self.windows.items()},
+            'counts': self.counts,
+            'sums': {metric: round(value, 4) for metric, value in self.sums.items()},
+            'fetches': self.fetches,
+            'errors': self.errors,
+            'stops': self.stops,
+            'last_error': self.last_error,
+        }
+
+
+class ScanTelemetry:
+    """
+    Per-site fetch and parse instrumentation for the scanner.
+
+    Each site keeps its last ``window`` observations of every metric (DNS,
+    connect, TTFB and download time, bytes, parse time, site scan time and
+    sub-pages fetched), which the JSON report and the Prometheus summaries
+    compute quantiles over, next to cumulative counts, sums and error classes.
+    Histograms across all sites are cumulative, as Prometheus expects.
+    """
+
+    def __init__(self, state=None, window=50):
+        state = state or {}
+        self.window = window
+        self.lock = threading.Lock()
+        self.sites = {url: SiteMetrics(url, window, site_state) for url, site_state in state.get('sites', {}).items()}
+        self.buckets = {metric: list(state.get('buckets', {}).get(metric, [0] * len(buckets)))
+                        for metric, (buckets, _) in METRICS.items()}
+
+    def _site(self, site):
+        metrics = self.sites.get(site['url'])
+        if metrics is None:
+            metrics = self.sites[site['url']] = SiteMetrics(site['name'], self.window)
+        return metrics
+
+    def _observe(self, metrics, metric, value):
+        metrics.observe(metric, value)
+        for index, bound in enumerate(METRICS[metric][0]):
+            if value <= bound:
+                self.buckets[metric][index] += 1
+
+    def record_fetch(self, site, timing, subpage=False):
+        with self.lock:
+            metrics = self._site(site)
+            metrics.fetches['subpage' if subpage else 'landing'] += 1
+            if subpage:
+                metrics.pending_subpages += 1
+            for metric in FETCH_PHASES + ('fetch_bytes',):
+                value = getattr(timing, metric)
+                if value is not None:
+                    self._observe(metrics, metric, value)
+            if timing.stop_reason:
+                metrics.stops[timing.stop_reason] = metrics.stops.get(timing.stop_reason, 0) + 1
+
+    def record_parse(self, site, seconds):
+        with self.lock:
+            self._observe(self._site(site), 'parse_seconds', seconds)
+
+    def record_error(self, site, error, subpage=False):
+        label = error_class(error)
+        with self.lock:
+            metrics = self._site(site)
+            if subpage:
+                metrics.pending_subpages += 1
+            metrics.errors[label] = metrics.errors.get(label, 0) + 1
+            metrics.last_error = {'class': label, 'message': str(error)[:200], 'at': time.time(), 'subpage': subpage}
+
+    def record_site(self, site, seconds):
+        """Close one site's scan: its wall-clock time and the sub-pages fetched since the last one."""
+        with self.lock:
+            metrics = self._site(site)
+            self._observe(metrics, 'site_seconds', seconds)
+            self._observe(metrics, 'subpages', metrics.pending_subpages)
+            metrics.pending_subpages = 0
+
+    def to_state(self):
+        with self.lock:
+            return {
+                'sites': {url: metrics.to_state() for url, metrics in self.sites.items()},
+                'buckets': {metric: list(counts) for metric, counts in self.buckets.items()},
+            }
+
+    def report(self):
+        """
+        JSON view for /api/scan/report: sites slowest first, each with p50/p95/max
+        of every metric over its window and its share of recent scan time.
+        """
+        with self.lock:
+            total_time = sum(sum(metrics.windows['site_seconds']) for metrics in self.sites.values())
+            sites = []
+            for url, metrics in self.sites.items():
+                summary = {}
+                for metric, values in metrics.windows.items():
+                    if values:
+                        summary[metric] = {
+                            'p50': percentile(values, 0.5),
+                            'p95': percentile(values, 0.95),
+                            'max': max(values),
+                            'samples': len(values),
+                        }
+                site_time = sum(metrics.windows['site_seconds'])
+                sites.append({
+                    'url': url,
+                    'name': metrics.name,
+                    'scan_time_share': round(site_time / total_time, 4) if total_time else 0,
+                    'fetches': dict(metrics.fetches),
+                    'errors': dict(metrics.errors),
+                    'stopped_downloads': dict(metrics.stops),
+                    'last_error': metrics.last_error,
+                    'metrics': summary,
+                })
+        sites.sort(key=lambda entry: entry['scan_time_share'], reverse=True)
+        return {'window': self.window, 'sites': sites}
+
+    def prometheus(self, prefix='rfp_scan'):
+        """Prometheus text exposition: cumulative histograms across sites and per-site summaries and counters."""
+        lines = []
+        with self.lock:
+            for metric, (buckets, help_text) in METRICS.items():
+                name = f"{prefix}_{metric}"
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for bound, count in zip(buckets, self.buckets[metric]):
+                    lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+                total_count = sum(metrics.counts[metric] for metrics in self.sites.values())
+                total_sum = sum(metrics.sums[metric] for metrics in self.sites.values())
+                lines.append(f'{name}_bucket{{le="+Inf"}} {total_count}')
+                lines.append(f"{name}_sum {round(total_sum, 4)}")
+                lines.append(f"{name}_count {total_count}")
+
+            for metric, (_, help_text) in METRICS.items():
+                name = f"{prefix}_site_{metric}"
+                lines.append(f"# HELP {name} {help_text}, per site over its last {self.window} observations")
+                lines.append(f"# TYPE {name} summary")
+                for metrics in self.sites.values():
+                    labels = f'site="{_label(metrics.name)}"'
+                    values = metrics.windows[metric]
+                    for quantile in (0.5, 0.95):
+                        value = percentile(values, quantile)
+                        if value is not None:
+                            lines.append(f'{name}{{{labels},quantile="{quantile}"}} {value}')
+                    lines.append(f"{name}_sum{{{labels}}} {round(metrics.sums[metric], 4)}")
+                    lines.append(f"{name}_count{{{labels}}} {metrics.counts[metric]}")
+
+            name = f"{prefix}_site_fetches_total"
+            lines.append(f"# HELP {name} Fetches per site by page kind")
+            lines.append(f"# TYPE {name} counter")
+            for metrics in self.sites.values():
+                for kind, count in metrics.fetches.items():
+                    lines.append(f'{name}{{site="{_label(metrics.name)}",kind="{kind}"}} {count}')
+
+            name = f"{prefix}_site_stopped_downloads_total"
+            lines.append(f"# HELP {name} Downloads cut short per site: early_stop once the page was analyzed, size_cap at the byte limit")
+            lines.append(f"# TYPE {name} counter")
+            for metrics in self.sites.values():
+                for reason, count in metrics.stops.items():
+                    lines.append(f'{name}{{site="{_label(metrics.name)}",reason="{reason}"}} {count}')
+
+            name = f"{prefix}_site_errors_total"
+            lines.append(f"# HELP {name} Failed fetches per site by error class")
+            lines.append(f"# TYPE {name} counter")
+            for metrics in self.sites.values():
+                for label, count in metrics.errors.items():
+                    lines.append(f'{name}{{site="{_label(metrics.name)}",class="{_label(label)}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
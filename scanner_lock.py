@@ -0,0 +1,49 @@
+import logging
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so every process considers itself the scanner
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class ScannerLock:
+    """
+    Leader election between worker processes sharing one RFP store.
+
+    Every worker tries to take an exclusive, non-blocking flock on the same
+    file; the one that gets it runs the scanner and keeps the lock for as long
+    as it lives. The kernel drops the lock when that process exits, so another
+    worker takes over on its next attempt.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    @property
+    def held(self):
+        return self.fd is not None
+
+    def acquire(self):
+        """Try to become the scanning process. Returns True if this process holds the lock."""
+        if self.fd is not None:
+            return True
+        if fcntl is None:
+            logger.warning("fcntl is unavailable; assuming a single process and running the scanner here")
+            self.fd = -1
+            return True
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self.fd = fd
+        return True
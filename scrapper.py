@@ -1,17 +1,42 @@
-from flask import Flask, render_template, jsonify, request, make_response
+from flask import Flask, render_template, jsonify, request, make_response, Response
 import requests
+import aiohttp
+import asyncio
 import json
 import os
 import threading
 import time
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
-import schedule
 import logging
 import concurrent.futures
-from urllib.parse import urljoin, urlparse
-import re
+import gc
 import uuid
+import hashlib
+from contextlib import contextmanager
+
+from scan_engine import AsyncScanEngine
+from http_cache import HTTPCache
+from keyword_matcher import KeywordMatcher
+from html_parsing import get_parser
+from page_analysis import RFPPageScanner, analyze_landing_page, analyze_rfp_page, listed_solicitations
+from body_stream import CHUNK_BYTES, BodyStream
+from parse_pool import ParsePool
+from rfp_store import SQLiteRFPStore, migrate_json_store
+from rfp_index import RFPIndex
+from rfp_search import SearchIndex
+from rfp_snapshot import load_snapshot, save_snapshot
+from rfp_export import EXPORT_FORMATS, export_chunks, gzip_chunks, parse_cursor, parse_since
+from rfp_identity import PLACEHOLDER_TITLE, RFPDedupIndex, migrate_rfp_ids, rfp_id
+from response_cache import ResponseCache
+from event_stream import EventBroker
+from scan_jobs import NullProgress, ScanJobManager, new_job_id
+from scanner_lock import ScannerLock
+from site_scheduler import AdaptiveScheduler
+from crawl_planner import CrawlPlanner
+from site_fingerprints import SiteFingerprints
+from scan_telemetry import FetchTiming, ScanTelemetry
+from host_health import CircuitOpenError, HostHealth
+from visitor_counter import VisitorCounter
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -19,6 +44,91 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+}
+MEDICAID_KEYWORDS = ['hcbs', 'ltss', 'behavioral health', 'home and community-based services', 'long-term services and supports']
+LINK_KEYWORDS = ['rfp', 'solicitation', 'bid', 'opportunity', 'proposal', 'procurement']
+
+# Scan engine settings: 'async' (default) or the legacy 'threaded' fan-out
+SCAN_ENGINE = os.environ.get('SCAN_ENGINE', 'async')
+SCAN_MAX_CONCURRENCY = int(os.environ.get('SCAN_MAX_CONCURRENCY', 20))
+SCAN_PER_HOST_LIMIT = int(os.environ.get('SCAN_PER_HOST_LIMIT', 4))
+SCAN_FETCH_WORKERS = int(os.environ.get('SCAN_FETCH_WORKERS', 10)) # threaded engine only
+
+# Conditional-GET cache for scraped pages
+HTTP_CACHE_DIR = os.environ.get('HTTP_CACHE_DIR', 'http_cache')
+HTTP_CACHE_MAX_MB = int(os.environ.get('HTTP_CACHE_MAX_MB', 100))
+
+# HTML parser backend: 'auto', 'selectolax', 'stream' or 'bs4'
+HTML_PARSER = os.environ.get('HTML_PARSER', 'auto')
+
+# Worker processes that parse and keyword-match fetched pages; 'auto' is one per spare
+# core, 0 parses in the fetching threads. PARSE_QUEUE_SIZE bounds pages waiting to parse.
+PARSE_WORKERS = os.environ.get('PARSE_WORKERS', 'auto')
+PARSE_QUEUE_SIZE = int(os.environ.get('PARSE_QUEUE_SIZE', 0))
+
+# SQLite RFP store; a legacy rfps_data.json is imported into it on first start
+RFPS_DB_FILE = os.environ.get('RFPS_DB_FILE', 'rfps.db')
+# Compact snapshot of every RFP, with parsed timestamps, that workers start from instead of reading
+# every row; the scanner rewrites it atomically after each scan. An empty value disables it.
+RFP_SNAPSHOT_FILE = os.environ.get('RFP_SNAPSHOT_FILE', RFPS_DB_FILE + '.snapshot')
+
+# Pre-gzip cached /api responses for clients that accept it
+API_GZIP = os.environ.get('API_GZIP', '1') == '1'
+
+# Results per /api/search page: the default, and the most a ?limit= may ask for
+SEARCH_PAGE_SIZE = int(os.environ.get('SEARCH_PAGE_SIZE', 20))
+SEARCH_MAX_PAGE_SIZE = int(os.environ.get('SEARCH_MAX_PAGE_SIZE', 100))
+# Longest ?days= window /api/search accepts (100 years; larger ones overflow the date arithmetic)
+SEARCH_MAX_DAYS = 36500
+
+# Rows /api/export reads from the store per query while streaming
+EXPORT_BATCH_ROWS = int(os.environ.get('EXPORT_BATCH_ROWS', 500))
+
+# Open /api/stream connections per worker process; each holds a thread, so keep this below
+# GUNICORN_THREADS. Clients over the limit get a 503 and are told to retry after STREAM_RETRY_SECONDS
+STREAM_MAX_CONNECTIONS = int(os.environ.get('STREAM_MAX_CONNECTIONS', 16))
+STREAM_RETRY_SECONDS = int(os.environ.get('STREAM_RETRY_SECONDS', 60))
+
+# Worker processes share the store; the one holding this lock runs the scanner and the
+# others pick up its results every STATE_SYNC_SECONDS
+SCANNER_LOCK_FILE = os.environ.get('SCANNER_LOCK_FILE', RFPS_DB_FILE + '.scanner.lock')
+STATE_SYNC_SECONDS = float(os.environ.get('STATE_SYNC_SECONDS', 2))
+
+# Per-site revisit intervals adapt between these bounds to how often each site changes
+SCAN_MIN_INTERVAL_HOURS = float(os.environ.get('SCAN_MIN_INTERVAL_HOURS', 1))
+SCAN_DEFAULT_INTERVAL_HOURS = float(os.environ.get('SCAN_DEFAULT_INTERVAL_HOURS', 6))
+SCAN_MAX_INTERVAL_HOURS = float(os.environ.get('SCAN_MAX_INTERVAL_HOURS', 48))
+
+# Per-site, per-scan budget for following candidate RFP links off a landing page
+CRAWL_MAX_FETCHES = int(os.environ.get('CRAWL_MAX_FETCHES', 10))
+CRAWL_MAX_KB = int(os.environ.get('CRAWL_MAX_KB', 5120))
+CRAWL_MAX_SECONDS = float(os.environ.get('CRAWL_MAX_SECONDS', 30))
+
+# 'all' turns every matching solicitation a scan reaches (listed on the landing page or found on a
+# candidate page) into an RFP; 'first' stops at the first match, one RFP per site per scan.
+# Sites may override it with an 'extraction' entry.
+RFP_EXTRACTION = os.environ.get('RFP_EXTRACTION', 'all')
+
+# Per-host circuit breakers: HOST_FAILURE_THRESHOLD consecutive failures stop fetches from a host
+# for HOST_OPEN_MINUTES (doubling after each failed probe, up to a day). Fetch timeouts follow each
+# host's observed latency within FETCH_MIN/MAX_TIMEOUT; transient errors get FETCH_RETRIES retries.
+HOST_FAILURE_THRESHOLD = int(os.environ.get('HOST_FAILURE_THRESHOLD', 3))
+HOST_OPEN_MINUTES = float(os.environ.get('HOST_OPEN_MINUTES', 30))
+FETCH_MIN_TIMEOUT = float(os.environ.get('FETCH_MIN_TIMEOUT', 2))
+FETCH_MAX_TIMEOUT = float(os.environ.get('FETCH_MAX_TIMEOUT', 10))
+FETCH_RETRIES = int(os.environ.get('FETCH_RETRIES', 2))
+
+# Response bodies are streamed and cut off at this size; non-HTML responses aren't downloaded
+FETCH_MAX_KB = int(os.environ.get('FETCH_MAX_KB', 2048))
+
+# Fetch and parse timings kept per site for /metrics and /api/scan/report
+TELEMETRY_WINDOW = int(os.environ.get('TELEMETRY_WINDOW', 50))
+
+# Bump when the shape of cached page analysis results changes
+ANALYSIS_VERSION = 3
+
 class MedicaidRFPTracker:
     def __init__(self):
         self.rfps_file = 'rfps_data.json'
@@ -284,34 +394,94 @@ class MedicaidRFPTracker:
             }
         ]
         
+        self.store = SQLiteRFPStore(RFPS_DB_FILE)
         self.rfps_data = self.load_rfps_data()
-        self.unique_users = set() # In-memory set to track unique visitors.
+        # Bumped (in the store) after every scan; keys the precomputed API responses in every worker
+        self.data_version = self.store.get_meta('data_version', 0)
+        self.snapshot_state = None # Store state the RFP snapshot on disk matches, when known
+        all_rfps, timestamps = self.load_all_rfps() # Also sets store_change_seq, the last change loaded
+        self.rfp_index = RFPIndex(all_rfps, timestamps)
+        # The search and dedup indexes are built from the RFP index on first use
+        self.index_lock = threading.Lock()
+        self._search_index = None
+        self._rfp_dedup = None
+        self.events = EventBroker(max_streams=STREAM_MAX_CONNECTIONS) # Pushes scan results to /api/stream subscribers
+        # HyperLogLog sketches of dashboard visitors, merged with the other workers' through the store
+        self.visitors = VisitorCounter(self.store)
+        self.import_legacy_visitors()
+        self.visitors.sync()
+        self.http_cache = HTTPCache(HTTP_CACHE_DIR, HTTP_CACHE_MAX_MB * 1024 * 1024)
+
+        # Keyword matchers are compiled once; sites may override them with 'keywords' / 'link_keywords'
+        self.default_matchers = (KeywordMatcher(MEDICAID_KEYWORDS), KeywordMatcher(LINK_KEYWORDS))
+        self.site_matchers = {}
+        self.parse_html = get_parser(HTML_PARSER)
+        parse_workers = (os.cpu_count() or 1) - 1 if PARSE_WORKERS == 'auto' else int(PARSE_WORKERS)
+        self.parse_pool = ParsePool(parse_workers, HTML_PARSER, PARSE_QUEUE_SIZE) if parse_workers > 0 else None
+        self.load_scanner_state()
+
+    def load_scanner_state(self):
+        """(Re)load the scanner's persisted state; also run when this process takes over scanning."""
+        self.http_cache.load()
+
+        # Each site is revisited on its own schedule, persisted in the store across restarts
+        self.scheduler = AdaptiveScheduler(
+            self.state_sites,
+            self.load_meta('site_schedule'),
+            min_interval=SCAN_MIN_INTERVAL_HOURS * 3600,
+            max_interval=SCAN_MAX_INTERVAL_HOURS * 3600,
+            default_interval=SCAN_DEFAULT_INTERVAL_HOURS * 3600,
+        )
+
+        # Candidate links are fetched best-first within a budget; dead ends are remembered
+        self.crawl_planner = CrawlPlanner(
+            self.load_meta('crawl_history'),
+            max_fetches=CRAWL_MAX_FETCHES,
+            max_bytes=CRAWL_MAX_KB * 1024,
+            max_seconds=CRAWL_MAX_SECONDS,
+        )
+
+        # Landing-page fingerprints let unchanged sites skip the deep crawl
+        self.fingerprints = SiteFingerprints(self.load_meta('fingerprints'))
+
+        # Per-site fetch and parse timings
+        self.telemetry = ScanTelemetry(self.load_meta('scan_telemetry'), TELEMETRY_WINDOW)
+
+        # Failing hosts are skipped for a while instead of costing a timeout on every scan
+        self.host_health = HostHealth(
+            self.load_meta('host_health'),
+            failure_threshold=HOST_FAILURE_THRESHOLD,
+            open_seconds=HOST_OPEN_MINUTES * 60,
+            min_timeout=FETCH_MIN_TIMEOUT,
+            max_timeout=FETCH_MAX_TIMEOUT,
+            retries=FETCH_RETRIES,
+        )
     
     def load_rfps_data(self):
-        """Load RFPs data from file, initializing if not present."""
+        """
+        Load scan stats from the RFP store, importing a legacy JSON file on first
+        run and re-keying stored RFPs to stable ids (collapsing duplicates).
+        """
+        try:
+            migrate_json_store(self.rfps_file, self.store)
+        except Exception as e:
+            logger.error(f"Error migrating RFPs data from {self.rfps_file}: {e}")
+
+        try:
+            migrate_rfp_ids(self.store)
+        except Exception as e:
+            logger.error(f"Error migrating RFP ids: {e}")
+
         try:
-            if os.path.exists(self.rfps_file):
-                with open(self.rfps_file, 'r') as f:
-                    data = json.load(f)
-                    # Convert found_date strings to datetime objects for comparison
-                    for rfp in data['rfps']:
-                        if 'found_date' in rfp:
-                            try:
-                                # Ensure timezone awareness
-                                if not rfp['found_date'].endswith('Z') and '+' not in rfp['found_date']:
-                                    rfp['found_date'] += '+00:00'
-                                datetime.fromisoformat(rfp['found_date'])
-                            except ValueError:
-                                # Fallback if format is unexpected
-                                rfp['found_date'] = datetime.now().isoformat()
-                    return data
+            stats = self.store.get_meta('stats')
+            if stats is not None:
+                return {'last_updated': self.store.get_meta('last_updated'), 'stats': stats}
         except Exception as e:
             logger.error(f"Error loading RFPs data: {e}")
         
-        # Initialize default structure if file is not found or corrupted
+        # Initialize default structure if the store is empty or unreadable
         return {
             'last_updated': datetime.now().isoformat(),
-            'rfps': [],
             'stats': {
                 'total_found': 0,
                 'states_monitored': len(self.state_sites),
@@ -322,15 +492,164 @@ class MedicaidRFPTracker:
             }
         }
 
-    def save_rfps_data(self):
-        """Save RFPs data to file."""
+    def import_legacy_visitors(self):
+        """Move visitor ids from the old per-visitor table into the sketches; safe to repeat in several workers."""
+        visitor_ids = self.store.get_legacy_visitors()
+        if visitor_ids:
+            self.visitors.import_ids(visitor_ids)
+            self.visitors.sync()
+            self.store.drop_legacy_visitors()
+            logger.info(f"Imported {len(visitor_ids)} visitors into the visitor counter")
+
+    def add_visitor(self, user_id):
+        """Count a dashboard visitor; the shared counts catch up on the next sync."""
+        self.visitors.add(user_id)
+
+    def visitor_stats(self):
+        """Stamp the current visitor counts into the stats dictionary and return them."""
+        visitors = self.visitors.counts()
+        self.rfps_data['stats']['unique_users'] = visitors['all_time']
+        self.rfps_data['stats']['visitors'] = visitors
+        return visitors
+
+    def load_all_rfps(self):
+        """
+        All RFPs oldest first with their found_date epochs: from the snapshot
+        when it matches the store's current state, otherwise from the store.
+        """
+        if RFP_SNAPSHOT_FILE:
+            snapshot = load_snapshot(RFP_SNAPSHOT_FILE)
+            if snapshot is not None:
+                rfps, timestamps, header = snapshot
+                state = self.store_state()
+                if header.get('store') == state:
+                    self.store_change_seq = state['change_seq']
+                    self.snapshot_state = state
+                    return rfps, timestamps
+                logger.info(f"RFP snapshot {RFP_SNAPSHOT_FILE} is out of date; loading from the store")
+
+        rfps, timestamps, self.store_change_seq = self.store.load_rfps()
+        return rfps, timestamps
+
+    def store_state(self):
+        """
+        What a snapshot must match to stand in for the store: its RFP count and
+        last change sequence number. Every insert or in-place update of an RFP
+        takes a new change_seq and deletions change the count, so RFPs can't
+        change without one of them moving (scans that find nothing leave the
+        snapshot as it is).
+        """
+        return {'count': self.store.count(), 'change_seq': self.store.last_change_seq()}
+
+    def save_snapshot(self):
+        """Rewrite the RFP snapshot if the store has moved on from it; run by the scanning process."""
+        if not RFP_SNAPSHOT_FILE:
+            return
         try:
-            # Ensure the stats dictionary has the unique_users key before saving
-            self.rfps_data['stats']['unique_users'] = len(self.unique_users)
-            with open(self.rfps_file, 'w') as f:
-                json.dump(self.rfps_data, f, indent=2)
+            state = self.store_state()
+            if state == self.snapshot_state:
+                return
+            rfps, timestamps = self.rfp_index.all()
+            if len(rfps) != state['count']:
+                logger.warning(f"Not writing the RFP snapshot: {len(rfps)} RFPs in memory, {state['count']} stored")
+                return
+            started = time.perf_counter()
+            save_snapshot(RFP_SNAPSHOT_FILE, rfps, timestamps, {'store': state})
+            self.snapshot_state = state
+            logger.info(f"Wrote RFP snapshot of {len(rfps)} RFPs in {time.perf_counter() - started:.2f}s")
         except Exception as e:
-            logger.error(f"Error saving RFPs data: {e}")
+            logger.error(f"Error writing RFP snapshot: {e}")
+
+    @property
+    def search_index(self):
+        """Full-text search with facets for /api/search."""
+        if self._search_index is None:
+            with self.index_lock, gc_paused():
+                if self._search_index is None:
+                    self._search_index = SearchIndex(*self.rfp_index.all())
+        return self._search_index
+
+    @search_index.setter
+    def search_index(self, index):
+        self._search_index = index
+
+    @property
+    def rfp_dedup(self):
+        """Catches known RFPs reached via another URL or number spelling."""
+        if self._rfp_dedup is None:
+            with self.index_lock, gc_paused():
+                if self._rfp_dedup is None:
+                    self._rfp_dedup = RFPDedupIndex(self.rfp_index.all()[0])
+        return self._rfp_dedup
+
+    @rfp_dedup.setter
+    def rfp_dedup(self, index):
+        self._rfp_dedup = index
+
+    def index_rfps(self, rfps, claim=False):
+        """Add RFPs to the in-memory indexes (those built so far); claim registers them for dedup too."""
+        with self.index_lock:
+            self.rfp_index.add(rfps)
+            if self._search_index is not None:
+                self._search_index.add(rfps)
+            if claim and self._rfp_dedup is not None:
+                for rfp in rfps:
+                    self._rfp_dedup.claim(rfp)
+
+    def refresh_from_store(self):
+        """
+        Pick up scans committed by the scanning process: new and updated RFPs,
+        stats and the data version. Returns True if anything changed.
+        """
+        data_version = self.store.get_meta('data_version', 0)
+        if data_version == self.data_version:
+            return False
+
+        changes = list(self.store.iter_changes(after_seq=self.store_change_seq))
+        if changes:
+            self.store_change_seq = changes[-1][0]
+        changed_rfps = [rfp for _, rfp in changes]
+        known_ids = self.rfp_index.ids()
+        new_rfps = [rfp for rfp in changed_rfps if rfp['id'] not in known_ids]
+        self.index_rfps(changed_rfps, claim=True)
+        self.rfps_data = {
+            'last_updated': self.store.get_meta('last_updated'),
+            'stats': self.store.get_meta('stats') or self.rfps_data['stats'],
+        }
+        self.telemetry = ScanTelemetry(self.load_meta('scan_telemetry'), TELEMETRY_WINDOW)
+        self.data_version = data_version
+        self.events.publish('scan', {
+            'new_rfps': new_rfps,
+            'stats': self.rfps_data['stats'],
+            'last_updated': self.rfps_data['last_updated'],
+        })
+        return True
+
+    def load_meta(self, key):
+        """Load persisted scanner state (site schedule, crawl history, fingerprints) from the store, if any."""
+        try:
+            return self.store.get_meta(key)
+        except Exception as e:
+            logger.error(f"Error loading {key}: {e}")
+            return None
+
+    def save_rfps_data(self, new_rfps=()):
+        """
+        Upsert new RFPs, the current stats and the next data version into the RFP
+        store in one transaction. Errors are raised: nothing was saved.
+        """
+        # Ensure the stats dictionary has the visitor counts before saving
+        self.visitor_stats()
+        self.store.upsert_rfps(new_rfps, {
+            'data_version': self.data_version + 1,
+            'stats': self.rfps_data['stats'],
+            'last_updated': self.rfps_data['last_updated'],
+            'site_schedule': self.scheduler.to_state(),
+            'crawl_history': self.crawl_planner.to_state(),
+            'fingerprints': self.fingerprints.to_state(),
+            'scan_telemetry': self.telemetry.to_state(),
+            'host_health': self.host_health.to_state(),
+        })
 
     def _scrape_california(self, site, existing_ids, medicaid_keywords):
         """A specific scraper for California's site due to its unique structure."""
@@ -343,22 +662,21 @@ class MedicaidRFPTracker:
             potential_rfp_url = site['url']
             found_keywords = ['hcbs', 'ltss'] # Assume these are found for the demo
             
-            # Using a consistent ID generation for the demo RFP
-            rfp_id = 'ca_demo_rfp'
+            rfp = {
+                'rfp_number': 'CA-2024-HCBS',
+                'title': 'California HCBS Managed Care Services',
+                'state': site['state'],
+                'source': site['name'],
+                'url': potential_rfp_url,
+                'found_date': datetime.now().isoformat(),
+                'keywords_found': found_keywords,
+                'status': 'Active',
+                'description': "HCBS managed care procurement opportunity detected on Cal eProcure."
+            }
+            # Same stable id scheme as every other RFP
+            rfp['id'] = rfp_id(rfp)
             
-            if rfp_id not in existing_ids:
-                rfp = {
-                    'id': rfp_id,
-                    'rfp_number': 'CA-2024-HCBS',
-                    'title': 'California HCBS Managed Care Services',
-                    'state': site['state'],
-                    'source': site['name'],
-                    'url': potential_rfp_url,
-                    'found_date': datetime.now().isoformat(),
-                    'keywords_found': found_keywords,
-                    'status': 'Active',
-                    'description': f"HCBS managed care procurement opportunity detected on Cal eProcure."
-                }
+            if rfp['id'] not in existing_ids and self.rfp_dedup.claim(rfp):
                 new_rfps.append(rfp)
                 logger.info(f"Found RFP opportunity on {site['name']}")
         except Exception as e:
@@ -366,123 +684,508 @@ class MedicaidRFPTracker:
         return new_rfps
 
 
-    def _generic_scrape(self, site, existing_ids, medicaid_keywords):
-        """Generic scraping function for sites without specific handlers."""
-        new_rfps = []
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    def get_matchers(self, site):
+        """Return the (keyword, link) matchers for a site, honoring per-site keyword overrides."""
+        if 'keywords' not in site and 'link_keywords' not in site:
+            return self.default_matchers
+
+        matchers = self.site_matchers.get(site['url'])
+        if matchers is None:
+            matchers = (
+                KeywordMatcher(site.get('keywords', MEDICAID_KEYWORDS)),
+                KeywordMatcher(site.get('link_keywords', LINK_KEYWORDS)),
+            )
+            self.site_matchers[site['url']] = matchers
+        return matchers
+
+    def _analyze_landing_page(self, site, html, matchers):
+        """Return the keywords, candidate RFP links and text hash of a landing page."""
+        return analyze_landing_page(self.parse_html, site['url'], html, matchers)
+
+    def _analyze_rfp_page(self, html, keyword_matcher):
+        """Return (title, rfp_number) if a candidate page mentions a keyword, otherwise None."""
+        return analyze_rfp_page(self.parse_html, html, keyword_matcher)
+
+    def _analysis_key(self, kind, matchers):
+        """Cache key for page analysis results; changes whenever the keyword lists change."""
+        keyword_lists = [matcher.keywords for matcher in matchers]
+        digest = hashlib.sha1(json.dumps([ANALYSIS_VERSION, keyword_lists]).encode()).hexdigest()[:12]
+        return f"{kind}:{digest}"
+
+    def _analyze_page(self, page, kind, site, matchers):
+        """Run the 'landing' or 'rfp' analysis on page.text, in the parse pool when enabled."""
+        started = time.perf_counter()
+        if self.parse_pool is not None:
+            keyword_lists = [matcher.keywords for matcher in matchers]
+            result = self.parse_pool.analyze(kind, site['url'], page.text, keyword_lists)
+        elif kind == 'landing':
+            result = self._analyze_landing_page(site, page.text, matchers)
+        else:
+            result = self._analyze_rfp_page(page.text, matchers[0])
+        self.telemetry.record_parse(site, time.perf_counter() - started)
+        return result
+
+    def _analyze_cached(self, page, kind, site, matchers):
+        """Analyze a fetched page, reusing the cached result when the page is unchanged."""
+        if page.cache is None:
+            return self._analyze_page(page, kind, site, matchers)
+        return page.cache.memoize(
+            page, self._analysis_key(kind, matchers), lambda: self._analyze_page(page, kind, site, matchers))
+
+    async def _analyze_cached_async(self, page, kind, site, matchers):
+        """
+        Coroutine version of _analyze_cached for the async engine: the event loop
+        keeps fetching while the parse pool works, and waits when the pool is full.
+        """
+        if self.parse_pool is None:
+            return self._analyze_cached(page, kind, site, matchers)
+
+        key = self._analysis_key(kind, matchers)
+        if page.cache is not None:
+            found, result = page.cache.cached_analysis(page, key)
+            if found:
+                return result
+        keyword_lists = [matcher.keywords for matcher in matchers]
+        started = time.perf_counter()
+        result = await self.parse_pool.analyze_async(kind, site['url'], page.text, keyword_lists)
+        self.telemetry.record_parse(site, time.perf_counter() - started)
+        if page.cache is not None:
+            page.cache.store_analysis(page, key, result)
+        return result
+
+    def _fetch_page(self, url, timeout=10, consume=None):
+        """
+        Conditional GET through the HTTP cache for the threaded engine. The body
+        is streamed up to FETCH_MAX_KB, passing decoded chunks to ``consume``,
+        which can end the download by returning True. requests doesn't expose
+        DNS and connect times, so they are part of ttfb here.
+        """
+        headers = dict(DEFAULT_HEADERS, **self.http_cache.conditional_headers(url))
+        timing = FetchTiming()
+        started = time.perf_counter()
+        with requests.get(url, headers=headers, timeout=timeout, allow_redirects=True, stream=True) as response:
+            timing.ttfb_seconds = time.perf_counter() - started
+            if response.status_code == 304:
+                page = self.http_cache.not_modified(url)
+            else:
+                response.raise_for_status() # Raise an exception for bad status codes (4xx or 5xx)
+                started = time.perf_counter()
+                body = BodyStream(url, response.headers.get('Content-Type'), response.encoding,
+                                  FETCH_MAX_KB * 1024, consume)
+                for chunk in response.iter_content(CHUNK_BYTES):
+                    if body.feed(chunk):
+                        break
+                text = body.text()
+                timing.download_seconds = time.perf_counter() - started
+                timing.stop_reason = body.stop_reason
+                page = self.http_cache.store(url, response.headers, text, truncated=body.stop_reason is not None)
+        timing.fetch_bytes = page.size
+        page.timing = timing
+        return page
+
+    def _fetch(self, url, landing=True, scanner=None):
+        """
+        _fetch_page behind the host's circuit breaker, with its latency-derived
+        timeout and jittered retries for transient errors. Client errors on
+        sub-pages don't count against the host. A scanner (RFPPageScanner) is
+        fed the body as it streams in.
+        """
+        attempt = 0
+        while True:
+            timeout = self.host_health.before_fetch(url)
+            started = time.perf_counter()
+            if scanner is not None:
+                scanner.reset()
+            try:
+                page = self._fetch_page(url, timeout, scanner.feed if scanner is not None else None)
+            except Exception as e:
+                self.host_health.record_failure(url, e, count_client_errors=landing)
+                delay = self.host_health.retry_delay(url, e, attempt)
+                if delay is None:
+                    raise
+                logger.debug(f"Retrying {url} in {delay:.2f}s after {e}")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.host_health.record_success(url, time.perf_counter() - started)
+            return page
+
+    async def _fetch_async(self, engine, url, landing=True, scanner=None):
+        """Coroutine version of _fetch for the async engine."""
+        attempt = 0
+        while True:
+            timeout = self.host_health.before_fetch(url)
+            started = time.perf_counter()
+            if scanner is not None:
+                scanner.reset()
+            try:
+                page = await engine.fetch_page(url, timeout, scanner.feed if scanner is not None else None)
+            except asyncio.CancelledError:
+                self.host_health.cancel_fetch(url)
+                raise
+            except Exception as e:
+                self.host_health.record_failure(url, e, count_client_errors=landing)
+                delay = self.host_health.retry_delay(url, e, attempt)
+                if delay is None:
+                    raise
+                logger.debug(f"Retrying {url} in {delay:.2f}s after {e}")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self.host_health.record_success(url, time.perf_counter() - started)
+            return page
+
+    def _page_scanner(self, matchers):
+        """
+        An RFPPageScanner to analyze a candidate page as it downloads, so the rest
+        can be skipped once the details are known; None when pages are parsed in
+        the parse pool, which keeps parsing off the fetch path.
+        """
+        return RFPPageScanner(matchers[0]) if self.parse_pool is None else None
+
+    def _rfp_page_details(self, page, scanner, site, matchers):
+        """
+        (title, rfp_number) of a fetched candidate page, or None: from the scanner
+        that read the body as it streamed in, else from the cache or the parse pool.
+        """
+        if scanner is None or not scanner.started:
+            return self._analyze_cached(page, 'rfp', site, matchers)
+        details = scanner.finish()
+        self.telemetry.record_parse(site, scanner.seconds)
+        if page.cache is not None:
+            page.cache.store_analysis(page, self._analysis_key('rfp', matchers), details)
+        return details
+
+    def _new_candidates(self, site, text_hash, candidates):
+        """
+        Compare a landing page with its fingerprint. Returns None when nothing
+        changed (the deep crawl can be skipped), else the candidates whose links
+        are new since the last successful scan.
+        """
+        unchanged, new_links = self.fingerprints.compare(site, text_hash, [url for url, _ in candidates])
+        if unchanged:
+            logger.info(f"{site['name']} is unchanged since the last scan; skipping deep crawl")
+            return None
+        return [candidate for candidate in candidates if candidate[0] in new_links]
+
+    def _update_fingerprint(self, site, text_hash, candidates, pending):
+        """
+        Fingerprint a processed landing page with the candidate links that have
+        been dealt with. Pending links (skipped by the crawl budget, failed, or
+        not crawled because the page had no keywords) are left out, so the next
+        scan still treats them as new.
+        """
+        self.fingerprints.update(site, text_hash, [url for url, _ in candidates if url not in pending])
+
+    def _record_check(self, site, found_keywords=(), candidates=(), error=None):
+        """
+        Report a landing-page check to the scheduler (and a failure to telemetry).
+        The content hash covers the keywords and candidate links found rather than
+        the raw body, so rotating tokens and timestamps in the markup don't count
+        as changes.
+        """
+        if error is not None:
+            self.scheduler.record(site, failed=True)
+            self.telemetry.record_error(site, error)
+            return
+        candidate_urls = [url for url, _ in candidates]
+        content_hash = hashlib.sha1(json.dumps([sorted(found_keywords), candidate_urls]).encode()).hexdigest()
+        self.scheduler.record(site, content_hash)
+
+    def _build_rfp(self, site, existing_ids, found_keywords, deep_link=None):
+        """
+        Build the RFP record for a site, using the matching deep link (url, title, rfp_number)
+        when one was found. Returns None if the RFP is already known.
+        """
+        potential_rfp_url = site['url']
+        found_title = PLACEHOLDER_TITLE.format(state=site['state'])
+        found_rfp_number = 'N/A'
+        if deep_link:
+            potential_rfp_url, title, rfp_number = deep_link
+            if title is not None:
+                found_title = title
+            if rfp_number:
+                found_rfp_number = rfp_number
+
+        rfp = {
+            'rfp_number': found_rfp_number,
+            'title': found_title,
+            'state': site['state'],
+            'source': site['name'],
+            'url': potential_rfp_url,
+            'found_date': datetime.now().isoformat(),
+            'keywords_found': found_keywords,
+            'status': 'Active',
+            'description': f"Healthcare procurement opportunity detected on {site['name']}. Keywords found: {', '.join(found_keywords)}"
         }
-        
+
+        # Stable across restarts and workers; the dedup index also catches the same
+        # solicitation found again under another URL or RFP number spelling. Pages
+        # found in 'all' mode often share the portal's <title>, so their titles
+        # say nothing about which solicitation they are.
+        rfp['id'] = rfp_id(rfp)
+        use_title = site.get('extraction', RFP_EXTRACTION) != 'all'
+        if rfp['id'] in existing_ids or not self.rfp_dedup.claim(rfp, use_title):
+            return None
+        return rfp
+
+    def _build_rfps(self, site, existing_ids, found_keywords, deep_links, placeholder=True):
+        """
+        RFP records for each matching deep link, or (with ``placeholder``) the
+        site-level one when none matched; known RFPs are left out.
+        """
+        if not deep_links:
+            deep_links = [None] if placeholder else []
+        rfps = [self._build_rfp(site, existing_ids, found_keywords, deep_link) for deep_link in deep_links]
+        return [rfp for rfp in rfps if rfp]
+
+    def _wants_placeholder(self, candidates, new_candidates):
+        """
+        Whether a keyword match without matching deep links still makes a site-level
+        RFP: only when new links were crawled (or the page lists none at all), not
+        when the fingerprint left no new links and just the landing text changed.
+        """
+        return bool(new_candidates) or not candidates
+
+    def _listed_links(self, site, candidates, matchers):
+        """
+        In 'all' extraction mode, take the solicitations the landing page lists
+        with a keyword and RFP number as deep links without fetching them.
+        Returns those links and the candidates still worth fetching.
+        """
+        if site.get('extraction', RFP_EXTRACTION) != 'all':
+            return [], candidates
+        listed, remaining = listed_solicitations(candidates, matchers[0])
+        if listed:
+            logger.info(f"Found {len(listed)} RFP links listed on {site['name']}")
+        return listed, remaining
+
+    def _find_rfp_links(self, site, candidates, matchers):
+        """
+        Fetch candidate links best-first until the site's crawl budget runs out
+        (threaded engine). Returns the matching links as (url, title, rfp_number),
+        all of them or in 'first' extraction mode just the first, and the set of
+        links that still need fetching: failed or cut off by the budget. Links
+        skipped after a 'first' mode match count as dealt with.
+        """
+        deep_links, candidates = self._listed_links(site, candidates, matchers)
+        extract_all = site.get('extraction', RFP_EXTRACTION) == 'all'
+        budget = self.crawl_planner.budget()
+        ranked_urls = self.crawl_planner.plan(site, candidates)
+        pending = set()
+        for position, full_url in enumerate(ranked_urls):
+            if budget.exhausted():
+                self.crawl_planner.record_budget_skips(site, len(ranked_urls) - position)
+                pending.update(ranked_urls[position:])
+                break
+            try:
+                scanner = self._page_scanner(matchers)
+                rfp_page = self._fetch(full_url, landing=False, scanner=scanner)
+                self.telemetry.record_fetch(site, rfp_page.timing, subpage=True)
+                budget.spend(size=rfp_page.size)
+                details = self._rfp_page_details(rfp_page, scanner, site, matchers)
+                self.crawl_planner.record_fetch(site, full_url, bool(details))
+                if details:
+                    deep_links.append((full_url, *details))
+                    logger.info(f"Found specific RFP link for {site['name']}: {full_url}")
+                    if not extract_all:
+                        break
+            except (requests.exceptions.RequestException, Exception) as e:
+                budget.spend()
+                pending.add(full_url)
+                self.telemetry.record_error(site, e, subpage=True)
+                logger.debug(f"Could not check link {full_url} from {site['name']}: {e}")
+        return deep_links, pending
+
+    def _generic_scrape(self, site, existing_ids, matchers):
+        """Generic scraping function for sites without specific handlers (threaded engine)."""
+        new_rfps = []
+
         try:
-            response = requests.get(site['url'], headers=headers, timeout=10, allow_redirects=True)
-            response.raise_for_status() # Raise an exception for bad status codes (4xx or 5xx)
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            main_page_content = soup.get_text().lower()
-            found_keywords = [keyword for keyword in medicaid_keywords if keyword in main_page_content]
-
-            if found_keywords:
-                potential_rfp_url = site['url']
-                found_title = f"Healthcare Opportunity - {site['state']}"
-                found_rfp_number = 'N/A'
-                
-                # Search for links that are likely RFPs
-                link_keywords = ['rfp', 'solicitation', 'bid', 'opportunity', 'proposal', 'procurement']
-                for a_tag in soup.find_all('a', href=True):
-                    link_text = a_tag.get_text().lower()
-                    link_href = a_tag['href'].lower()
-                    
-                    if any(kw in link_text or kw in link_href for kw in link_keywords):
-                        full_url = urljoin(site['url'], a_tag['href'])
-                        
-                        # Basic URL validation
-                        if not urlparse(full_url).scheme in ['http', 'https']:
-                            logger.debug(f"Skipping invalid URL: {full_url}")
-                            continue
-
-                        try:
-                            rfp_response = requests.get(full_url, headers=headers, timeout=10)
-                            rfp_response.raise_for_status()
-                            rfp_soup = BeautifulSoup(rfp_response.text, 'html.parser')
-                            rfp_content = rfp_soup.get_text().lower()
-                            
-                            # Check for keywords on the deeper page
-                            if any(kw in rfp_content for kw in medicaid_keywords):
-                                potential_rfp_url = full_url
-                                
-                                # Extract title
-                                title_tag = rfp_soup.find(['h1', 'h2', 'title'])
-                                if title_tag:
-                                    found_title = title_tag.get_text(strip=True)
-                                
-                                # Extract RFP number using regex
-                                rfp_number_match = re.search(r'(RFP|BID|SOLICITATION)[\s-]?(\d{2,}-\d{3,}|\d{3,})', rfp_content, re.I)
-                                if rfp_number_match:
-                                    found_rfp_number = rfp_number_match.group(0).upper().strip()
-                                    
-                                logger.info(f"Found specific RFP link for {site['name']}: {potential_rfp_url}")
-                                break
-                        except (requests.exceptions.RequestException, Exception) as e:
-                            logger.debug(f"Could not check link {full_url} from {site['name']}: {e}")
-
-                # Create a stable ID for the RFP
-                rfp_id = f"{site['state'].lower().replace(' ', '_')}_{hash(potential_rfp_url)}"
-                if rfp_id not in existing_ids:
-                    rfp = {
-                        'id': rfp_id,
-                        'rfp_number': found_rfp_number,
-                        'title': found_title,
-                        'state': site['state'],
-                        'source': site['name'],
-                        'url': potential_rfp_url,
-                        'found_date': datetime.now().isoformat(),
-                        'keywords_found': found_keywords,
-                        'status': 'Active',
-                        'description': f"Healthcare procurement opportunity detected on {site['name']}. Keywords found: {', '.join(found_keywords)}"
-                    }
+            page = self._fetch(site['url'])
+            self.telemetry.record_fetch(site, page.timing)
+            found_keywords, candidates, text_hash = self._analyze_cached(page, 'landing', site, matchers)
+            self._record_check(site, found_keywords, candidates)
+            new_candidates = self._new_candidates(site, text_hash, candidates)
+
+            pending = {url for url, _ in new_candidates or ()}
+            if found_keywords and new_candidates is not None:
+                deep_links, pending = self._find_rfp_links(site, new_candidates, matchers)
+                placeholder = self._wants_placeholder(candidates, new_candidates)
+                for rfp in self._build_rfps(site, existing_ids, found_keywords, deep_links, placeholder):
                     new_rfps.append(rfp)
-                    logger.info(f"Found RFP opportunity on {site['name']}")
-        
+                    logger.info(f"Found RFP opportunity on {site['name']}: {rfp['url']}")
+
+            self._update_fingerprint(site, text_hash, candidates, pending)
+
+        except CircuitOpenError as e:
+            logger.info(f"Skipping {site['name']}: {e}")
+            self._record_check(site, error=e)
         except requests.exceptions.HTTPError as e:
             logger.warning(f"HTTP error for {site['name']} ({site['url']}): {e}")
-        except requests.exceptions.Timeout:
+            self._record_check(site, error=e)
+        except requests.exceptions.Timeout as e:
             logger.warning(f"Timeout checking {site['name']} ({site['url']})")
+            self._record_check(site, error=e)
         except requests.exceptions.RequestException as e:
             logger.warning(f"Request error checking {site['name']} ({site['url']}): {str(e)}")
+            self._record_check(site, error=e)
         except Exception as e:
             logger.warning(f"Unexpected error checking {site['name']} ({site['url']}): {str(e)}")
-            
+            self._record_check(site, error=e)
+
         return new_rfps
-    
-    def scrape_site(self, site):
+
+    async def _find_rfp_links_async(self, site, candidates, matchers, engine):
+        """
+        Fetch candidate links best-first, in concurrent batches of SCAN_PER_HOST_LIMIT,
+        until the site's crawl budget runs out. Returns the links that mention a
+        keyword as (url, title, rfp_number), in rank order, and the set of links
+        that still need fetching (failed or cut off by the budget); in 'first'
+        extraction mode only the best-ranked match, and the links after it count
+        as dealt with and their fetches are cancelled.
+        """
+        deep_links, candidates = self._listed_links(site, candidates, matchers)
+        extract_all = site.get('extraction', RFP_EXTRACTION) == 'all'
+        budget = self.crawl_planner.budget()
+        ranked_urls = self.crawl_planner.plan(site, candidates)
+        pending = set()
+
+        async def check(full_url):
+            try:
+                scanner = self._page_scanner(matchers)
+                rfp_page = await self._fetch_async(engine, full_url, landing=False, scanner=scanner)
+                self.telemetry.record_fetch(site, rfp_page.timing, subpage=True)
+                budget.spend(size=rfp_page.size)
+                if scanner is not None and scanner.started:
+                    details = self._rfp_page_details(rfp_page, scanner, site, matchers)
+                else:
+                    details = await self._analyze_cached_async(rfp_page, 'rfp', site, matchers)
+                self.crawl_planner.record_fetch(site, full_url, bool(details))
+                return details
+            except Exception as e:
+                budget.spend()
+                pending.add(full_url)
+                self.telemetry.record_error(site, e, subpage=True)
+                logger.debug(f"Could not check link {full_url} from {site['name']}: {e}")
+                return None
+
+        position = 0
+        while position < len(ranked_urls):
+            if budget.exhausted():
+                self.crawl_planner.record_budget_skips(site, len(ranked_urls) - position)
+                pending.update(ranked_urls[position:])
+                break
+            batch_size = min(SCAN_PER_HOST_LIMIT, budget.max_fetches - budget.fetches)
+            batch = ranked_urls[position:position + batch_size]
+            position += len(batch)
+
+            tasks = [asyncio.ensure_future(check(full_url)) for full_url in batch]
+            try:
+                for index, (full_url, task) in enumerate(zip(batch, tasks)):
+                    details = await task
+                    if details:
+                        logger.info(f"Found specific RFP link for {site['name']}: {full_url}")
+                        deep_links.append((full_url, *details))
+                        if not extract_all:
+                            pending.difference_update(batch[index + 1:])
+                            return deep_links, pending
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        return deep_links, pending
+
+    async def _generic_scrape_async(self, site, existing_ids, matchers, engine):
+        """Generic scraping function for the async engine; same results as _generic_scrape."""
+        new_rfps = []
+
+        try:
+            page = await self._fetch_async(engine, site['url'])
+            self.telemetry.record_fetch(site, page.timing)
+            found_keywords, candidates, text_hash = await self._analyze_cached_async(page, 'landing', site, matchers)
+            self._record_check(site, found_keywords, candidates)
+            new_candidates = self._new_candidates(site, text_hash, candidates)
+
+            pending = {url for url, _ in new_candidates or ()}
+            if found_keywords and new_candidates is not None:
+                deep_links, pending = await self._find_rfp_links_async(site, new_candidates, matchers, engine)
+                placeholder = self._wants_placeholder(candidates, new_candidates)
+                for rfp in self._build_rfps(site, existing_ids, found_keywords, deep_links, placeholder):
+                    new_rfps.append(rfp)
+                    logger.info(f"Found RFP opportunity on {site['name']}: {rfp['url']}")
+
+            self._update_fingerprint(site, text_hash, candidates, pending)
+
+        except CircuitOpenError as e:
+            logger.info(f"Skipping {site['name']}: {e}")
+            self._record_check(site, error=e)
+        except aiohttp.ClientResponseError as e:
+            logger.warning(f"HTTP error for {site['name']} ({site['url']}): {e}")
+            self._record_check(site, error=e)
+        except asyncio.TimeoutError as e:
+            logger.warning(f"Timeout checking {site['name']} ({site['url']})")
+            self._record_check(site, error=e)
+        except aiohttp.ClientError as e:
+            logger.warning(f"Request error checking {site['name']} ({site['url']}): {str(e)}")
+            self._record_check(site, error=e)
+        except Exception as e:
+            logger.warning(f"Unexpected error checking {site['name']} ({site['url']}): {str(e)}")
+            self._record_check(site, error=e)
+
+        return new_rfps
+
+    def scrape_site(self, site, existing_ids=None):
         """
         Main scraping function that calls specific scrapers or the generic one.
         """
         logger.info(f"Checking {site['name']} ({site['state']})...")
-        new_rfps = []
-        medicaid_keywords = ['hcbs', 'ltss', 'behavioral health', 'home and community-based services', 'long-term services and supports']
-        existing_ids = {r['id'] for r in self.rfps_data['rfps']}
-        
+        if existing_ids is None:
+            existing_ids = self.rfp_index.ids()
+
+        matchers = self.get_matchers(site)
+
         # Use specific scrapers for known sites
         if site['state'] == 'California':
-            new_rfps = self._scrape_california(site, existing_ids, medicaid_keywords)
-        else:
-            # Fallback to a more robust generic scraper
-            new_rfps = self._generic_scrape(site, existing_ids, medicaid_keywords)
-            
-        return new_rfps
+            self._record_check(site)
+            return self._scrape_california(site, existing_ids, matchers[0].keywords)
 
-    def search_for_medicaid_rfps(self):
-        """Search all sources for Medicaid RFPs using parallel processing"""
-        logger.info("Starting Medicaid RFP search...")
-        start_time = time.time()
-        
+        # Fallback to a more robust generic scraper
+        return self._generic_scrape(site, existing_ids, matchers)
+
+    async def scrape_site_async(self, site, engine, existing_ids):
+        """Async counterpart of scrape_site used by the asyncio scan engine."""
+        logger.info(f"Checking {site['name']} ({site['state']})...")
+
+        matchers = self.get_matchers(site)
+
+        if site['state'] == 'California':
+            self._record_check(site)
+            return self._scrape_california(site, existing_ids, matchers[0].keywords)
+
+        return await self._generic_scrape_async(site, existing_ids, matchers, engine)
+
+    def _scan_threaded(self, sites, progress):
+        """Scan sites with the legacy ThreadPoolExecutor fan-out."""
         new_rfps = []
-        
-        # Use ThreadPoolExecutor for parallel scanning of all state sites.
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            futures = [executor.submit(self.scrape_site, site) for site in self.state_sites]
-            
+        existing_ids = self.rfp_index.ids()
+
+        def scrape(site):
+            progress.site_started(site)
+            started = time.perf_counter()
+            try:
+                result = self.scrape_site(site, existing_ids)
+            except Exception as e:
+                progress.site_finished(site, error=e)
+                raise
+            finally:
+                self.telemetry.record_site(site, time.perf_counter() - started)
+            progress.site_finished(site, result)
+            return result
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=SCAN_FETCH_WORKERS) as executor:
+            futures = [executor.submit(scrape, site) for site in sites]
+
             for future in concurrent.futures.as_completed(futures):
                 try:
                     result = future.result()
@@ -491,12 +1194,55 @@ class MedicaidRFPTracker:
                 except Exception as e:
                     logger.error(f"A thread generated an exception: {e}")
 
-        # Add new RFPs to our data
-        for rfp in new_rfps:
-            self.rfps_data['rfps'].append(rfp)
-        
+        return new_rfps
+
+    def _scan_async(self, sites, progress):
+        """Scan sites with the asyncio engine over pooled keep-alive connections."""
+        existing_ids = self.rfp_index.ids()
+
+        async def scrape(site, eng):
+            progress.site_started(site)
+            started = time.perf_counter()
+            try:
+                result = await self.scrape_site_async(site, eng, existing_ids)
+            except Exception as e:
+                progress.site_finished(site, error=e)
+                raise
+            finally:
+                self.telemetry.record_site(site, time.perf_counter() - started)
+            progress.site_finished(site, result)
+            return result
+
+        engine = AsyncScanEngine(
+            max_concurrency=SCAN_MAX_CONCURRENCY,
+            per_host_limit=SCAN_PER_HOST_LIMIT,
+            timeout=10,
+            headers=DEFAULT_HEADERS,
+            cache=self.http_cache,
+            max_body_bytes=FETCH_MAX_KB * 1024,
+        )
+        return engine.run(sites, scrape)
+
+    def search_for_medicaid_rfps(self, progress=None, sites=None):
+        """
+        Search sources for Medicaid RFPs using the configured scan engine: the
+        given sites (the ones due on the adaptive schedule) or all of them.
+        Per-site progress is reported to ``progress`` (a ScanJob) when given.
+        """
+        sites = sites or self.state_sites
+        logger.info(f"Starting Medicaid RFP search of {len(sites)} sites ({SCAN_ENGINE} engine)...")
+        start_time = time.time()
+        progress = progress or NullProgress()
+        self.fingerprints.begin_scan()
+        fingerprints = self.fingerprints.to_state()
+
+        if SCAN_ENGINE == 'threaded':
+            new_rfps = self._scan_threaded(sites, progress)
+        else:
+            new_rfps = self._scan_async(sites, progress)
+
         # Update stats
-        self.rfps_data['stats']['total_found'] = len(self.rfps_data['rfps'])
+        self.rfps_data['stats']['total_found'] = len(self.rfp_index) + len(new_rfps)
         self.rfps_data['stats']['states_monitored'] = len(self.state_sites)
         self.rfps_data['stats']['last_scan'] = datetime.now().isoformat()
         self.rfps_data['last_updated'] = datetime.now().isoformat()
@@ -504,34 +1250,93 @@ class MedicaidRFPTracker:
         
         end_time = time.time()
         self.rfps_data['stats']['last_scan_duration'] = round(end_time - start_time, 2)
+
+        self.http_cache.save()
+        self.rfps_data['stats']['http_cache'] = self.http_cache.get_stats()
+        self.rfps_data['stats']['sites_last_scanned'] = len(sites)
+        self.rfps_data['stats']['schedule'] = self.scheduler.get_stats()
+        self.rfps_data['stats']['crawl'] = self.crawl_planner.get_stats()
+        self.rfps_data['stats']['fingerprints'] = self.fingerprints.get_stats()
+        self.rfps_data['stats']['hosts'] = self.host_health.get_stats()
+        if self.parse_pool is not None:
+            self.rfps_data['stats']['parse_pool'] = self.parse_pool.get_stats()
+
+        # New RFPs and stats are written together; history is no longer truncated
+        try:
+            self.save_rfps_data(new_rfps)
+        except Exception as e:
+            # Forget this scan's dedup claims and fingerprints so the next scan finds its RFPs again
+            logger.error(f"Error saving RFPs data: {e}")
+            self.fingerprints = SiteFingerprints(fingerprints)
+            self.rfp_dedup = None
+            raise
+        self.index_rfps(new_rfps)
+        self.data_version += 1
+        self.save_snapshot()
+        self.events.publish('scan', {
+            'new_rfps': new_rfps,
+            'stats': self.rfps_data['stats'],
+            'last_updated': self.rfps_data['last_updated'],
+        })
         
-        # Keep only last 100 RFPs to prevent file from getting too large
-        if len(self.rfps_data['rfps']) > 100:
-            self.rfps_data['rfps'] = self.rfps_data['rfps'][-100:]
-        
-        self.save_rfps_data()
-        
-        logger.info(f"Scan completed. Found {len(new_rfps)} new RFPs. Total: {len(self.rfps_data['rfps'])}. Duration: {self.rfps_data['stats']['last_scan_duration']}s")
+        logger.info(f"Scan completed. Found {len(new_rfps)} new RFPs. Total: {self.rfps_data['stats']['total_found']}. Duration: {self.rfps_data['stats']['last_scan_duration']}s")
         
         return new_rfps
     
-    def get_recent_rfps(self, days=30):
-        """Get RFPs from the last N days"""
+    def get_recent_rfps(self, days=30, state=None, keyword=None):
+        """Get RFPs from the last N days, newest first, from the in-memory index"""
         cutoff_date = datetime.now() - timedelta(days=days)
-        recent_rfps = []
-        
-        for rfp in self.rfps_data['rfps']:
-            try:
-                rfp_date = datetime.fromisoformat(rfp['found_date'].replace('Z', '+00:00'))
-                if rfp_date.replace(tzinfo=None) > cutoff_date:
-                    recent_rfps.append(rfp)
-            except:
-                recent_rfps.append(rfp)
-        
-        return sorted(recent_rfps, key=lambda x: x['found_date'], reverse=True)
+        return self.rfp_index.recent(cutoff_date, state=state, keyword=keyword)
+
+@contextmanager
+def gc_paused():
+    """Hold off garbage collection while bulk-loading objects that all stay alive anyway."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+class LazyTracker:
+    """
+    Stands in for the global MedicaidRFPTracker and builds it on first use, so
+    importing the app (and booting a worker) doesn't wait for the store to
+    load. The background loop builds it straight away; requests that arrive
+    first wait for it. Attribute reads and writes go to the tracker.
+    """
+
+    def __init__(self, factory):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_lock', threading.Lock())
+        object.__setattr__(self, '_tracker', None)
+
+    @property
+    def ready(self):
+        return self._tracker is not None
+
+    def get(self):
+        if self._tracker is None:
+            with self._lock:
+                if self._tracker is None:
+                    started = time.perf_counter()
+                    with gc_paused():
+                        object.__setattr__(self, '_tracker', self._factory())
+                    logger.info(f"Loaded {len(self._tracker.rfp_index)} RFPs in {time.perf_counter() - started:.2f}s")
+        return self._tracker
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.get(), name, value)
 
 # Create global tracker instance
-tracker = MedicaidRFPTracker()
+tracker = LazyTracker(MedicaidRFPTracker)
+response_cache = ResponseCache(compress=API_GZIP)
+scan_jobs = ScanJobManager(lambda **kwargs: tracker.search_for_medicaid_rfps(**kwargs), lambda: tracker.state_sites)
+scanner_lock = ScannerLock(SCANNER_LOCK_FILE)
 
 # Web routes
 @app.route('/')
@@ -542,58 +1347,252 @@ def dashboard():
     if not user_id:
         user_id = str(uuid.uuid4())
     
-    # Add user to the set of unique users
-    tracker.unique_users.add(user_id)
+    # Add user to the shared count of unique users
+    tracker.add_visitor(user_id)
     
     # Render the dashboard with a cookie
     resp = make_response(render_template('dashboard.html'))
     resp.set_cookie('user_id', user_id, max_age=365 * 24 * 60 * 60) # Cookie lasts one year
     return resp
 
+@app.route('/healthz')
+def health():
+    """Readiness probe: 503 until this worker has loaded its RFPs, which happens in the background."""
+    ready = tracker.ready
+    return jsonify({'ready': ready, 'scanner': scanner_lock.held}), 200 if ready else 503
+
 @app.route('/api/rfps')
 def get_rfps():
-    """API endpoint to get RFPs data."""
-    recent_rfps = tracker.get_recent_rfps(30)
-    return jsonify({
-        'rfps': recent_rfps,
+    """API endpoint to get RFPs data, optionally filtered by ?state= and ?keyword=."""
+    state = request.args.get('state')
+    keyword = request.args.get('keyword')
+    # The 30-day window moves with the clock, so bodies are also rebuilt every hour
+    version = (tracker.data_version, datetime.now().strftime('%Y-%m-%d %H'))
+    return response_cache.respond(('rfps', state, keyword), version, lambda: {
+        'rfps': tracker.get_recent_rfps(30, state=state, keyword=keyword),
     })
     
+@app.route('/api/search')
+def search_rfps():
+    """
+    Ranked full-text search over all RFPs: ?q=, optional ?state=, ?keyword=,
+    ?days= and ?sort=relevance|date, with facet counts and ?cursor= paging.
+    """
+    try:
+        days = request.args.get('days', type=int)
+        if days is not None and not 1 <= days <= SEARCH_MAX_DAYS:
+            raise ValueError(f"Invalid days {days}; expected 1 to {SEARCH_MAX_DAYS}")
+        limit = min(max(request.args.get('limit', SEARCH_PAGE_SIZE, type=int), 1), SEARCH_MAX_PAGE_SIZE)
+        results = tracker.search_index.search(
+            request.args.get('q', ''),
+            state=request.args.get('state'),
+            keyword=request.args.get('keyword'),
+            days=days,
+            sort=request.args.get('sort', 'relevance'),
+            limit=limit,
+            cursor=request.args.get('cursor'),
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    return jsonify(results)
+
+@app.route('/api/export')
+def export_rfps():
+    """
+    Stream every RFP as NDJSON (default) or ?format=csv, straight from the store.
+    Incremental pulls pass the previous response's X-Export-Cursor as ?cursor=
+    and get only RFPs added or changed since; ?since= and ?state= narrow the
+    export by found date and state. Gzipped for clients that accept it.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    try:
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+        after = parse_cursor(request.args.get('cursor'))
+        since = parse_since(request.args.get('since'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
+    # Changes made while streaming get later sequence numbers, so the next pull picks them up
+    until = max(tracker.store.last_change_seq(), after)
+    changes = tracker.store.iter_changes(after, until, since=since, state=request.args.get('state'),
+                                         batch_size=EXPORT_BATCH_ROWS)
+    chunks = export_chunks(changes, fmt)
+    use_gzip = API_GZIP and 'gzip' in request.headers.get('Accept-Encoding', '')
+    response = Response(gzip_chunks(chunks) if use_gzip else chunks, mimetype=EXPORT_FORMATS[fmt])
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    response.headers['X-Export-Cursor'] = str(until)
+    response.headers['Content-Disposition'] = f"attachment; filename=rfps.{fmt}"
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @app.route('/api/stats')
 def get_stats():
     """New API endpoint to get dashboard stats, including user count."""
-    tracker.rfps_data['stats']['unique_users'] = len(tracker.unique_users)
-    return jsonify({
-        'stats': tracker.rfps_data['stats'],
-        'last_updated': tracker.rfps_data['last_updated']
-    })
+    visitors = tracker.visitors.counts()
 
-@app.route('/api/scan')
+    def build():
+        tracker.visitor_stats()
+        return {
+            'stats': tracker.rfps_data['stats'],
+            'last_updated': tracker.rfps_data['last_updated']
+        }
+
+    return response_cache.respond('stats', (tracker.data_version, tuple(visitors.values())), build)
+
+@app.route('/api/stream')
+def stream_events():
+    """Server-sent events: a snapshot on connect, then new RFPs and stats after every scan."""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+
+    def snapshot():
+        tracker.visitor_stats()
+        return {
+            'rfps': tracker.get_recent_rfps(30),
+            'stats': tracker.rfps_data['stats'],
+            'last_updated': tracker.rfps_data['last_updated'],
+        }
+
+    if not tracker.events.open_stream():
+        # Every stream holds a worker thread; leave the rest for ordinary requests
+        response = Response(f'retry: {STREAM_RETRY_SECONDS * 1000}\n\n', status=503, mimetype='text/event-stream')
+        response.headers['Retry-After'] = str(STREAM_RETRY_SECONDS)
+        return response
+
+    response = Response(tracker.events.stream(last_event_id, snapshot), mimetype='text/event-stream')
+    response.call_on_close(tracker.events.close_stream)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no' # Stop proxies from buffering the stream
+    return response
+
+@app.route('/api/scan', methods=['GET', 'POST'])
 def manual_scan():
-    """Trigger a manual scan."""
-    try:
-        new_rfps = tracker.search_for_medicaid_rfps()
+    """Start a scan job, or attach to the one already running, and return its id immediately."""
+    if not scanner_lock.held:
+        # Another worker process runs the scanner; queue the request for it in the store
+        job_id = new_job_id()
+        tracker.store.update_meta('scan_requests', lambda pending: pending + [job_id], [])
         return jsonify({
             'success': True,
-            'message': f"Scan completed. Found {len(new_rfps)} new RFPs.",
-            'new_rfps': len(new_rfps)
-        })
-    except Exception as e:
-        logger.error(f"Error during manual scan: {str(e)}")
+            'message': "Scan requested.",
+            'job_id': job_id,
+            'status_url': f"/api/scan/{job_id}",
+            'attached': False,
+        }), 202
+
+    job, created = scan_jobs.submit('manual')
+    if not created:
+        message = "A scan covering every site is already running or queued; attached to it."
+    elif job is not scan_jobs.current:
+        message = "A scan of some sites is running; this scan will start when it finishes."
+    else:
+        message = "Scan started."
+    return jsonify({
+        'success': True,
+        'message': message,
+        'job_id': job.id,
+        'status_url': f"/api/scan/{job.id}",
+        'attached': not created,
+    }), 202
+
+@app.route('/api/scan/report')
+def scan_report():
+    """Per-site fetch, parse and error telemetry, the sites taking most of the scan time first."""
+    return jsonify(tracker.telemetry.report())
+
+@app.route('/metrics')
+def metrics():
+    """Scan telemetry in the Prometheus text exposition format."""
+    return Response(tracker.telemetry.prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/scan/<job_id>')
+def scan_status(job_id):
+    """Status of a scan job: per-site progress and timings, plus new RFPs once finished."""
+    job = scan_jobs.get(job_id)
+    if job is not None:
+        return jsonify({'success': True, 'job': job.to_dict()})
+
+    # Jobs run by the scanning process are published to the store, in the same transaction that
+    # takes their requests off the queue; reading the queue first means a job is always in one of them
+    queued = job_id in tracker.store.get_meta('scan_requests', [])
+    shared = tracker.store.get_meta('scan_jobs', {'jobs': {}, 'aliases': {}})
+    job_data = shared['jobs'].get(shared['aliases'].get(job_id, job_id))
+    if job_data is None and queued:
+        job_data = {'id': job_id, 'trigger': 'manual', 'status': 'queued', 'sites_done': 0, 'sites_total': 0}
+    if job_data is None:
         return jsonify({
             'success': False,
-            'message': f"Scan failed: {str(e)}. Please check server logs for details."
-        }), 500 # Return a 500 status code to indicate a server error
+            'message': f"Unknown scan job {job_id}."
+        }), 404
+    return jsonify({'success': True, 'job': job_data})
+
+def run_scanner_tasks():
+    """One pass of the scanning process: queued manual requests, due sites, and job status publishing."""
+    def start_requested(pending):
+        for job_id in pending:
+            scan_jobs.submit('manual', job_id=job_id)
+        return {'scan_jobs': scan_jobs.snapshot()} if pending else {}
+
+    tracker.store.update_meta('scan_requests', lambda pending: [], [], also=start_requested)
+
+    # Overdue sites (all of them on first start, staggered) are picked up on the first pass.
+    # Scheduled scans go through the job manager too, so they never overlap a manual scan;
+    # sites that are due while another scan runs stay due and are picked up next time round.
+    due_sites = tracker.scheduler.due_sites()
+    if due_sites:
+        scan_jobs.submit('scheduled', due_sites, queue=False)
+
+    snapshot = scan_jobs.snapshot()
+    if snapshot != tracker.store.get_meta('scan_jobs'):
+        tracker.store.set_meta('scan_jobs', snapshot)
 
 def background_scanner():
-    """Background thread to scan for RFPs periodically."""
-    schedule.every(6).hours.do(tracker.search_for_medicaid_rfps)
-    
-    # Run a scan on startup
-    tracker.search_for_medicaid_rfps()
-    
+    """
+    Background loop run in every worker process. The process holding the scanner
+    lock runs scans; the others serve the results it commits to the shared store.
+    """
+    leading = False
     while True:
-        schedule.run_pending()
-        time.sleep(60)
+        try:
+            if scanner_lock.acquire():
+                if not leading:
+                    # Catch up with whatever the previous scanner committed before taking over
+                    logger.info(f"Process {os.getpid()} holds the scanner lock and will run scans")
+                    tracker.refresh_from_store()
+                    tracker.load_scanner_state()
+                    tracker.save_snapshot()
+                    leading = True
+                run_scanner_tasks()
+            else:
+                tracker.refresh_from_store()
+            tracker.visitors.sync()
+        except Exception as e:
+            logger.error(f"Background scanner error: {e}")
+        time.sleep(STATE_SYNC_SECONDS)
+
+def build_search_index():
+    """Build the tracker (if the background loop hasn't yet) and its search index ahead of the first search."""
+    try:
+        started = time.perf_counter()
+        tracker.search_index
+        logger.info(f"Search index ready in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        logger.error(f"Error building the search index: {e}")
+
+def start_background_scanner():
+    """Start the background loop; called once per process (see gunicorn.conf.py for workers)."""
+    thread = threading.Thread(target=background_scanner, name='background-scanner', daemon=True)
+    thread.start()
+    threading.Thread(target=build_search_index, name='search-index', daemon=True).start()
+    return thread
 
 # Create templates directory and HTML template
 templates_dir = 'templates'
@@ -605,6 +1604,5 @@ if __name__ == '__main__':
     # Get the port from the environment variable, defaulting to 5000 for local development
     port = int(os.environ.get("PORT", 5000))
     # Start the background scanning thread
-    thread = threading.Thread(target=background_scanner, daemon=True)
-    thread.start()
+    start_background_scanner()
     app.run(host='0.0.0.0', port=port, debug=True)
@@ -0,0 +1,84 @@
+import threading
+
+COUNTERS = ('checks', 'unchanged', 'changed', 'new', 'links_seen', 'links_skipped')
+
+
+class SiteFingerprints:
+    """
+    Per-site landing-page fingerprints: a hash of the normalized page text plus
+    the set of candidate links it offered.
+
+    A scan compares the current landing page against the fingerprint. If both
+    parts match, the deep crawl is skipped entirely; otherwise only links that
+    weren't there last time need following. Fingerprints are only updated once
+    a site was processed successfully, and only with the links that were
+    actually crawled, so links the crawl budget skipped or whose fetch failed
+    are still followed on a later scan.
+    """
+
+    def __init__(self, state=None):
+        self.lock = threading.Lock()
+        self.sites = dict((state or {}).get('sites', {}))
+        self.totals = dict.fromkeys(COUNTERS, 0)
+        self.totals.update((state or {}).get('totals', {}))
+        self.last_scan = dict.fromkeys(COUNTERS, 0)
+
+    def begin_scan(self):
+        with self.lock:
+            self.last_scan = dict.fromkeys(COUNTERS, 0)
+
+    def _count(self, name, amount=1):
+        self.totals[name] += amount
+        self.last_scan[name] += amount
+
+    def compare(self, site, text_hash, links):
+        """
+        Return (unchanged, new_links) for a landing page. new_links is the set of
+        links not in the previous fingerprint, or every link for a first visit.
+        """
+        links = set(links)
+        with self.lock:
+            previous = self.sites.get(site['url'])
+            self._count('checks')
+            self._count('links_seen', len(links))
+            if previous is None:
+                self._count('new')
+                return False, links
+
+            known_links = set(previous['links'])
+            if previous['text_hash'] == text_hash and links <= known_links:
+                self._count('unchanged')
+                self._count('links_skipped', len(links))
+                return True, set()
+
+            new_links = links - known_links
+            self._count('changed')
+            self._count('links_skipped', len(links) - len(new_links))
+            return False, new_links
+
+    def update(self, site, text_hash, links):
+        with self.lock:
+            self.sites[site['url']] = {'text_hash': text_hash, 'links': sorted(set(links))}
+
+    def to_state(self):
+        """JSON-serializable fingerprints and counters, persisted with the scan stats."""
+        with self.lock:
+            return {
+                'sites': {url: dict(entry) for url, entry in self.sites.items()},
+                'totals': dict(self.totals),
+            }
+
+    def _with_rates(self, counters):
+        stats = dict(counters)
+        stats['skip_rate'] = round(counters['unchanged'] / counters['checks'], 3) if counters['checks'] else None
+        stats['link_skip_rate'] = (round(counters['links_skipped'] / counters['links_seen'], 3)
+                                   if counters['links_seen'] else None)
+        return stats
+
+    def get_stats(self):
+        """Skip counts and rates for the last scan and since the fingerprints were started."""
+        with self.lock:
+            return {
+                'last_scan': self._with_rates(self.last_scan),
+                'total': self._with_rates(self.totals),
+            }
@@ -0,0 +1,128 @@
+import heapq
+import random
+import threading
+import time
+from datetime import datetime
+
+
+class AdaptiveScheduler:
+    """
+    Per-site revisit scheduler driven by how often each site's content changes.
+
+    Every site has its own interval and next-due time, kept in a heap. After a
+    site is checked, a changed content hash halves its interval, an unchanged
+    one stretches it by half again, and a failure doubles it, all clamped to
+    [min_interval, max_interval]. Due times get +/-10% jitter, and sites with
+    no history are staggered over the first min_interval, so requests are
+    spread out instead of arriving as one burst per cycle.
+    """
+
+    def __init__(self, sites, state=None, min_interval=3600, max_interval=48 * 3600,
+                 default_interval=6 * 3600):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_interval = default_interval
+        self.lock = threading.Lock()
+        self.sites = {}
+        self.schedule = {}
+        self.heap = []
+        self.set_sites(sites, state or {})
+
+    def set_sites(self, sites, state=None):
+        """(Re)load the monitored sites, keeping schedules for sites seen before."""
+        now = time.time()
+        with self.lock:
+            previous = dict(state or {}, **self.schedule)
+            self.sites = {site['url']: site for site in sites}
+            self.schedule = {}
+            new_sites = [url for url in self.sites if url not in previous]
+            for url in self.sites:
+                if url in previous:
+                    self.schedule[url] = previous[url]
+            for position, url in enumerate(new_sites):
+                self.schedule[url] = {
+                    'interval': self.default_interval,
+                    'next_due': now + self.min_interval * position / max(len(new_sites), 1),
+                    'last_hash': None,
+                    'last_checked': None,
+                    'checks': 0,
+                    'changes': 0,
+                    'failures': 0,
+                    'consecutive_failures': 0,
+                }
+            self.heap = [(entry['next_due'], url) for url, entry in self.schedule.items()]
+            heapq.heapify(self.heap)
+
+    def due_sites(self, now=None):
+        """Sites whose next-due time has passed, most overdue first."""
+        now = now or time.time()
+        with self.lock:
+            due = []
+            while self.heap and self.heap[0][0] <= now:
+                next_due, url = heapq.heappop(self.heap)
+                entry = self.schedule.get(url)
+                if entry is not None and entry['next_due'] == next_due:
+                    due.append((next_due, url))
+            # Sites stay due until record() reschedules them
+            for item in due:
+                heapq.heappush(self.heap, item)
+            return [self.sites[url] for _, url in due]
+
+    def seconds_until_next(self, now=None):
+        now = now or time.time()
+        with self.lock:
+            if not self.heap:
+                return self.max_interval
+            return max(0.0, self.heap[0][0] - now)
+
+    def record(self, site, content_hash=None, failed=False, now=None):
+        """Reschedule a site after a check, adapting its interval to what was observed."""
+        now = now or time.time()
+        with self.lock:
+            entry = self.schedule.get(site['url'])
+            if entry is None:
+                return
+            entry['checks'] += 1
+            entry['last_checked'] = now
+
+            if failed:
+                entry['failures'] += 1
+                entry['consecutive_failures'] += 1
+                interval = entry['interval'] * 2
+            else:
+                entry['consecutive_failures'] = 0
+                if entry['last_hash'] is not None and content_hash != entry['last_hash']:
+                    entry['changes'] += 1
+                    interval = entry['interval'] / 2
+                elif entry['last_hash'] is None:
+                    interval = entry['interval']
+                else:
+                    interval = entry['interval'] * 1.5
+                entry['last_hash'] = content_hash
+
+            entry['interval'] = min(self.max_interval, max(self.min_interval, interval))
+            entry['next_due'] = now + entry['interval'] * random.uniform(0.9, 1.1)
+            heapq.heappush(self.heap, (entry['next_due'], site['url']))
+
+    def to_state(self):
+        """JSON-serializable schedule, persisted with the scan stats."""
+        with self.lock:
+            return {url: dict(entry) for url, entry in self.schedule.items()}
+
+    def get_stats(self):
+        """Per-site schedule summary for /api/stats."""
+        now = time.time()
+        with self.lock:
+            sites = {}
+            for url, entry in self.schedule.items():
+                site = self.sites[url]
+                sites[site['name']] = {
+                    'interval_hours': round(entry['interval'] / 3600, 2),
+                    'next_due': datetime.fromtimestamp(entry['next_due']).isoformat(),
+                    'change_rate': round(entry['changes'] / entry['checks'], 2) if entry['checks'] else None,
+                    'failures': entry['failures'],
+                }
+            return {
+                'due_now': sum(1 for entry in self.schedule.values() if entry['next_due'] <= now),
+                'sites': sites,
+            }
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_parsing import get_parser  # noqa: E402
+from keyword_matcher import KeywordMatcher  # noqa: E402
+from page_analysis import RFPPageScanner, analyze_rfp_page  # noqa: E402
+
+PAGES = [
+    '<html><head><title>Waiver services</title></head><body><p>HCBS</p><b>RFP 2024-</b>001</body></html>',
+    '<html><head><title>Waiver services</title></head><body><p>HCBS waiver</p><p>Solicitation 12-34567 due soon</p></body></html>',
+    '<html><body><h1>LTSS</h1><p>BID-2023-</p><p>closed</p><p>RFP 555</p></body></html>',
+    '<html><body><h2>Behavioral health</h2><p>See rfp 2024-00</p>1 and bid 99</body></html>',
+    '<html><head><title>Notice</title></head><body><p>Behavioral health RFP 31415</p></body></html>',
+    '<html><head><title>Road paving</title></head><body><p>RFP 2024-001</p></body></html>',
+]
+
+
+def chunks_at(html, offset):
+    return [part for part in (html[:offset], html[offset:]) if part]
+
+
+@pytest.mark.parametrize('html', PAGES)
+def test_scanner_matches_analyze_rfp_page_at_every_split(html):
+    keyword_matcher = KeywordMatcher(['hcbs', 'ltss', 'behavioral health'])
+    expected = analyze_rfp_page(get_parser('stream'), html, keyword_matcher)
+    for offset in range(len(html) + 1):
+        scanner = RFPPageScanner(keyword_matcher)
+        for chunk in chunks_at(html, offset):
+            if scanner.feed(chunk):
+                break  # Early stop, as the fetch loop does
+        assert scanner.finish() == expected, f"split at {offset}: {html[:offset]!r} | {html[offset:]!r}"
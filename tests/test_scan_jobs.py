@@ -0,0 +1,64 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scan_jobs import ScanJobManager  # noqa: E402
+
+SITES = [{'name': f'Site {i}', 'state': f'State {i}'} for i in range(3)]
+
+
+class BlockingScans:
+    """run_scan for a ScanJobManager: records each scan's sites and holds it until released."""
+
+    def __init__(self):
+        self.scans = []
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+
+    def __call__(self, progress, sites):
+        self.scans.append([site['name'] for site in sites])
+        self.started.release()
+        self.release.wait(5)
+        return []
+
+
+def finish(manager, *jobs):
+    for _ in range(500):
+        if manager.current is None:
+            break
+        threading.Event().wait(0.01)
+    assert [job.to_dict(include_sites=False)['status'] for job in jobs] == ['completed'] * len(jobs)
+
+
+def test_full_scan_queues_behind_a_scheduled_scan_of_some_sites():
+    scans = BlockingScans()
+    manager = ScanJobManager(scans, lambda: SITES)
+    scheduled, _ = manager.submit('scheduled', SITES[:1], queue=False)
+    assert scans.started.acquire(timeout=5)
+
+    manual, created = manager.submit('manual')
+    assert created and manual is not scheduled
+    assert manual.to_dict()['status'] == 'queued'
+    again, created = manager.submit('manual', job_id='other-worker')
+    assert again is manual and not created
+    assert manager.get('other-worker') is manual
+
+    scans.release.set()
+    finish(manager, scheduled, manual)
+    assert scans.scans == [['Site 0'], ['Site 0', 'Site 1', 'Site 2']]
+
+
+def test_scan_attaches_to_a_running_job_that_covers_its_sites():
+    scans = BlockingScans()
+    manager = ScanJobManager(scans, lambda: SITES)
+    running, _ = manager.submit('manual')
+    assert scans.started.acquire(timeout=5)
+
+    assert manager.submit('scheduled', SITES[1:], queue=False) == (running, False)
+    assert manager.submit('manual', SITES[:2]) == (running, False)
+
+    scans.release.set()
+    finish(manager, running)
+    assert scans.scans == [['Site 0', 'Site 1', 'Site 2']]
@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scrapper  # noqa: E402
+from scan_telemetry import FetchTiming  # noqa: E402
+
+SITE = {'state': 'Alabama', 'url': 'https://purchasing.example.gov/', 'name': 'Alabama Procurement'}
+SITE_TITLE = 'Alabama Division of Purchasing'
+
+
+@pytest.fixture
+def tracker(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(scrapper, 'RFPS_DB_FILE', str(tmp_path / 'rfps.db'))
+    monkeypatch.setattr(scrapper, 'RFP_SNAPSHOT_FILE', '')
+    monkeypatch.setattr(scrapper, 'HTTP_CACHE_DIR', str(tmp_path / 'http_cache'))
+    monkeypatch.setattr(scrapper, 'PARSE_WORKERS', '0')
+    monkeypatch.setattr(scrapper, 'SCAN_ENGINE', 'threaded')
+    return scrapper.MedicaidRFPTracker()
+
+
+@pytest.fixture
+def portal(tracker, monkeypatch):
+    """Pages served to the tracker's fetches by URL; edit the dict between scans."""
+    pages = {}
+
+    def fetch_page(url, timeout=10, consume=None):
+        html = pages[url]
+        if consume is not None:
+            consume(html)
+        page = tracker.http_cache.store(url, {}, html)
+        page.timing = FetchTiming()
+        return page
+
+    monkeypatch.setattr(tracker, '_fetch_page', fetch_page)
+    return pages
+
+
+def landing_page(*links, note=''):
+    anchors = ''.join(f'<li><a href="/bids/{name}">Solicitation {name}</a></li>' for name in links)
+    return f'<html><body><h1>Purchasing</h1><p>HCBS waiver programs. {note}</p><ul>{anchors}</ul></body></html>'
+
+
+def rfp_page(title, number=None):
+    body = f'<p>RFP {number}</p>' if number else '<p>Closed</p>'
+    return f'<html><head><title>{title}</title></head><body>{body}</body></html>'
+
+
+def scan(tracker, site=SITE):
+    return [rfp['url'] for rfp in tracker.search_for_medicaid_rfps(sites=[site])]
+
+
+def deep_links(*titles):
+    return [(f'https://purchasing.example.gov/bids/{name}', title, None) for name, title in titles]
+
+
+def test_all_mode_keeps_unnumbered_solicitations_sharing_the_site_title(tracker):
+    links = deep_links(('a', SITE_TITLE), ('b', SITE_TITLE), ('c', 'HCBS waiver services'))
+    rfps = tracker._build_rfps(dict(SITE, extraction='all'), set(), ['hcbs'], links)
+    assert [rfp['url'] for rfp in rfps] == [url for url, _, _ in links]
+
+
+def test_all_mode_titles_do_not_hide_later_matches(tracker):
+    tracker._build_rfps(dict(SITE, extraction='all'), set(), ['hcbs'], deep_links(('a', SITE_TITLE)))
+    rfps = tracker._build_rfps(dict(SITE, extraction='all'), set(), ['hcbs'], deep_links(('b', SITE_TITLE)))
+    assert [rfp['url'] for rfp in rfps] == ['https://purchasing.example.gov/bids/b']
+
+
+def test_first_mode_still_collapses_a_solicitation_found_under_another_url(tracker):
+    title = 'HCBS waiver services for older adults'
+    tracker._build_rfps(dict(SITE, extraction='first'), set(), ['hcbs'], deep_links(('a', title)))
+    assert tracker._build_rfps(dict(SITE, extraction='first'), set(), ['hcbs'], deep_links(('b', title))) == []
+
+
+def test_first_mode_links_skipped_after_the_match_are_not_crawled_later(tracker, portal):
+    site = dict(SITE, extraction='first')
+    portal[SITE['url']] = landing_page('a', 'b', 'c')
+    portal['https://purchasing.example.gov/bids/a'] = rfp_page('HCBS waiver services', '2024-001')
+    portal['https://purchasing.example.gov/bids/b'] = rfp_page('Road paving')
+    portal['https://purchasing.example.gov/bids/c'] = rfp_page('Office supplies')
+    assert scan(tracker, site) == ['https://purchasing.example.gov/bids/a']
+    assert scan(tracker, site) == []
+    assert scan(tracker, site) == []
+    assert tracker.fingerprints.get_stats()['total']['unchanged'] == 2
+
+
+def test_changed_landing_text_with_known_links_adds_no_rfp(tracker, portal):
+    portal[SITE['url']] = landing_page('a', 'b')
+    portal['https://purchasing.example.gov/bids/a'] = rfp_page('HCBS waiver services', '2024-001')
+    portal['https://purchasing.example.gov/bids/b'] = rfp_page('Road paving')
+    assert scan(tracker) == ['https://purchasing.example.gov/bids/a']
+
+    portal[SITE['url']] = landing_page('a', 'b', note='Updated October 1.')
+    assert scan(tracker) == []
+
+
+def test_rfps_from_a_scan_that_failed_to_save_are_found_again(tracker, portal, monkeypatch):
+    portal[SITE['url']] = landing_page('a')
+    portal['https://purchasing.example.gov/bids/a'] = rfp_page('HCBS waiver services', '2024-001')
+
+    def fail(*args, **kwargs):
+        raise sqlite3.OperationalError('database is locked')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(tracker.store, 'upsert_rfps', fail)
+        with pytest.raises(sqlite3.OperationalError):
+            scan(tracker)
+    assert tracker.data_version == 0
+    assert scan(tracker) == ['https://purchasing.example.gov/bids/a']
+    assert [rfp['url'] for rfp in tracker.store.load_rfps()[0]] == ['https://purchasing.example.gov/bids/a']
+
+
+def test_other_workers_and_the_snapshot_pick_up_in_place_updates(tracker, tmp_path, monkeypatch):
+    monkeypatch.setattr(scrapper, 'RFP_SNAPSHOT_FILE', str(tmp_path / 'rfps.db.snapshot'))
+    rfp = tracker._build_rfps(SITE, set(), ['hcbs'], deep_links(('a', 'HCBS waiver services')))[0]
+    tracker.store.upsert_rfps([rfp], {'data_version': 1})
+    reader = scrapper.MedicaidRFPTracker()
+    reader.save_snapshot()
+
+    tracker.store.upsert_rfps([dict(rfp, status='Closed')], {'data_version': 2})
+    assert reader.refresh_from_store()
+    assert [rfp['status'] for rfp in reader.rfp_index.all()[0]] == ['Closed']
+    restarted = scrapper.MedicaidRFPTracker()
+    assert restarted.snapshot_state is None
+    assert [rfp['status'] for rfp in restarted.rfp_index.all()[0]] == ['Closed']
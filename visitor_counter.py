@@ -0,0 +1,148 @@
+import base64
+import hashlib
+import math
+import threading
+from datetime import date, timedelta
+
+
+class HyperLogLog:
+    """
+    Cardinality sketch with 2**p one-byte registers (1 KB at the default p=10,
+    about 3% standard error). Merging takes the per-register maximum, so it is
+    commutative and idempotent: sketches from any number of workers can be
+    merged repeatedly without double counting.
+    """
+
+    def __init__(self, p=10, registers=None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+
+    def add(self, item):
+        h = int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'big')
+        index = h >> (64 - self.p)
+        remaining = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError(f"Cannot merge HyperLogLog sketches with p={self.p} and p={other.p}")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            # Small-range correction: linear counting is more accurate here
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+
+    def to_dict(self):
+        return {'p': self.p, 'registers': base64.b64encode(bytes(self.registers)).decode('ascii')}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['p'], base64.b64decode(data['registers']))
+
+
+class VisitorCounter:
+    """
+    Unique-visitor counts for today, the last 7 days and all time, kept as
+    HyperLogLog sketches so memory stays at a few KB whatever the traffic.
+
+    Visits are added to this process's sketches and merged into the shared
+    store's copies by sync(), which also pulls in other workers' visitors and
+    refreshes the counts. The weekly count is the union of the last seven
+    daily sketches.
+    """
+
+    WEEK_DAYS = 7
+
+    def __init__(self, store, p=10):
+        self.store = store
+        self.p = p
+        self.lock = threading.Lock()
+        self.sketches = {}  # meta key -> HyperLogLog
+        self.dirty = set()
+        self.totals = {'daily': 0, 'weekly': 0, 'all_time': 0}
+        self.pruned_key = None  # Last expired day key deleted from the store
+
+    def _day_key(self, day):
+        return f"visitors:day:{day.isoformat()}"
+
+    def _window_keys(self):
+        today = date.today()
+        return ['visitors:all'] + [self._day_key(today - timedelta(days=offset)) for offset in range(self.WEEK_DAYS)]
+
+    def _sketch(self, key):
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = HyperLogLog(self.p)
+        return sketch
+
+    def add(self, visitor_id):
+        with self.lock:
+            for key in ('visitors:all', self._day_key(date.today())):
+                if self._sketch(key).add(visitor_id):
+                    self.dirty.add(key)
+
+    def sync(self):
+        """Merge local visits into the store and load every worker's visits for the current windows."""
+        keys = self._window_keys()
+        with self.lock:
+            # Days that have left the weekly window are no longer needed in memory
+            for key in set(self.sketches) - set(keys):
+                del self.sketches[key]
+            pending = {key: HyperLogLog(self.p, self.sketches[key].registers) for key in self.dirty if key in self.sketches}
+            self.dirty -= set(pending)
+
+        merged = {}
+        for key in keys:
+            if key in pending:
+                local = pending[key]
+                stored = self.store.update_meta(
+                    key, lambda old: HyperLogLog.from_dict(old).merge(local).to_dict() if old else local.to_dict())
+                merged[key] = local.merge(HyperLogLog.from_dict(stored)) if stored else local
+            else:
+                stored = self.store.get_meta(key)
+                if stored:
+                    merged[key] = HyperLogLog.from_dict(stored)
+
+        with self.lock:
+            for key, sketch in merged.items():
+                self._sketch(key).merge(sketch)
+            week = HyperLogLog(self.p)
+            for key in keys[1:]:
+                if key in self.sketches:
+                    week.merge(self.sketches[key])
+            today = self.sketches.get(keys[1])
+            all_time = self.sketches.get(keys[0])
+            self.totals = {
+                'daily': today.count() if today else 0,
+                'weekly': week.count(),
+                'all_time': all_time.count() if all_time else 0,
+            }
+        # The day that just left the window is no longer needed in the store either; delete it once
+        # per day rather than with a write transaction on every sync
+        expired_key = self._day_key(date.today() - timedelta(days=self.WEEK_DAYS))
+        if expired_key != self.pruned_key:
+            self.store.delete_meta(expired_key)
+            self.pruned_key = expired_key
+
+    def counts(self):
+        """Daily, weekly and all-time unique visitors as of the last sync()."""
+        return dict(self.totals)
+
+    def import_ids(self, visitor_ids):
+        """Fold visitor ids recorded before sketches were used into the all-time count."""
+        with self.lock:
+            sketch = self._sketch('visitors:all')
+            for visitor_id in visitor_ids:
+                sketch.add(visitor_id)
+            self.dirty.add('visitors:all')